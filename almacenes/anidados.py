@@ -0,0 +1,61 @@
+# ======================================================
+# apps/almacenes/anidados.py
+# ======================================================
+"""
+Escritura de relaciones anidadas (hijos de un registro) por diferencias.
+
+En lugar de borrar todos los hijos y recrearlos uno por uno, se comparan las
+filas recibidas contra las existentes por una clave natural (ej. componente_id
+en ModeloComponente, modelo_id en LoteDetalle) y se aplica como máximo un
+bulk_create, un bulk_update y un DELETE: el costo no crece con la cantidad de hijos.
+"""
+from prod_a import catalogos
+
+
+def sincronizar_hijos(relacion, clave, filas, campos):
+    """
+    Deja los hijos de `relacion` (related manager, ej. modelo.modelocomponente_set)
+    iguales a `filas`.
+
+    - clave: atributo que identifica al hijo dentro del padre (ej. 'componente_id')
+    - filas: lista de dicts con `clave` y los `campos` a escribir
+    - campos: campos que se comparan y actualizan (ej. ['cantidad'])
+
+    Devuelve un dict con la cantidad de hijos creados, actualizados y eliminados.
+    """
+    claves = [fila[clave] for fila in filas]
+    if len(claves) != len(set(claves)):
+        raise ValueError(f"Hay filas repetidas para {clave}")
+
+    modelo_hijo = relacion.model
+    campo_padre = relacion.field.name
+    existentes = {getattr(hijo, clave): hijo for hijo in relacion.all()}
+
+    nuevos, modificados = [], []
+    for fila in filas:
+        hijo = existentes.pop(fila[clave], None)
+        if hijo is None:
+            nuevos.append(modelo_hijo(
+                **{campo_padre: relacion.instance, clave: fila[clave]},
+                **{campo: fila[campo] for campo in campos if campo in fila}
+            ))
+            continue
+
+        cambios = [c for c in campos if c in fila and getattr(hijo, c) != fila[c]]
+        for campo in cambios:
+            setattr(hijo, campo, fila[campo])
+        if cambios:
+            modificados.append(hijo)
+
+    # Lo que quedó en `existentes` ya no viene en las filas
+    if existentes:
+        modelo_hijo.objects.filter(pk__in=[hijo.pk for hijo in existentes.values()]).delete()
+    if modificados:
+        modelo_hijo.objects.bulk_update(modificados, campos)
+    if nuevos:
+        modelo_hijo.objects.bulk_create(nuevos)
+    if nuevos or modificados:
+        # bulk_create / bulk_update no emiten señales
+        catalogos.modelo_modificado(modelo_hijo)
+
+    return {'creados': len(nuevos), 'actualizados': len(modificados), 'eliminados': len(existentes)}
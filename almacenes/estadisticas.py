@@ -0,0 +1,92 @@
+# ======================================================
+# apps/almacenes/estadisticas.py
+# ======================================================
+"""
+Tableros de estadísticas de almacenes (ver contratos/estadisticas.py).
+
+El tablero de equipos se calcula sobre InventarioContador. Sus contadores se
+actualizan con queryset.update, sin señales: InventarioContadorManager invalida
+el tablero en cada ajuste. Guardar un EquipoONU sin cambiar modelo, estado ni
+lote no ajusta contadores y por lo tanto no invalida el tablero.
+"""
+from django.db import connection
+from django.db.models import Count, Sum
+
+from contratos.estadisticas import tablero, totalizar
+from .models import EstadoEquipo, InventarioContador, Lote, Marca, Modelo
+
+TOP_EQUIPOS = 10
+CAMPOS_ESTADO = ['estado__nombre']
+CAMPOS_MODELO = ['modelo__marca__nombre', 'modelo__nombre']
+CAMPOS_LOTE = ['lote__numero_lote']
+
+
+def _equipos_grouping_sets():
+    """Totales por estado, modelo y lote en una sola consulta con GROUPING SETS (PostgreSQL)"""
+    sql = f"""
+        SELECT GROUPING(e.nombre), GROUPING(ma.nombre, mo.nombre), GROUPING(l.numero_lote),
+               e.nombre, ma.nombre, mo.nombre, l.numero_lote, SUM(c.cantidad)
+        FROM {InventarioContador._meta.db_table} c
+        JOIN {Modelo._meta.db_table} mo ON mo.id = c.modelo_id
+        JOIN {Marca._meta.db_table} ma ON ma.id = mo.marca_id
+        JOIN {Lote._meta.db_table} l ON l.id = c.lote_id
+        LEFT JOIN {EstadoEquipo._meta.db_table} e ON e.id = c.estado_id
+        WHERE c.cantidad > 0
+        GROUP BY GROUPING SETS ((), (e.nombre), (ma.nombre, mo.nombre), (l.numero_lote))
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        filas = cursor.fetchall()
+
+    total, por_estado, por_modelo, por_lote = 0, [], [], []
+    for sin_estado, sin_modelo, sin_lote, estado, marca, modelo, lote, cantidad in filas:
+        if not sin_estado:
+            por_estado.append({'estado__nombre': estado, 'cantidad': cantidad})
+        elif not sin_modelo:
+            por_modelo.append({'modelo__marca__nombre': marca, 'modelo__nombre': modelo, 'cantidad': cantidad})
+        elif not sin_lote:
+            por_lote.append({'lote__numero_lote': lote, 'cantidad': cantidad})
+        else:
+            total = cantidad or 0
+
+    def ordenar(grupo):
+        return sorted(grupo, key=lambda fila: -fila['cantidad'])
+
+    return total, ordenar(por_estado), ordenar(por_modelo), ordenar(por_lote)
+
+
+def _equipos_grano_fino():
+    """Mismo resultado con un GROUP BY estado × modelo × lote totalizado en Python"""
+    filas = list(
+        InventarioContador.objects.filter(cantidad__gt=0).order_by()
+        .values(*CAMPOS_ESTADO, *CAMPOS_MODELO, *CAMPOS_LOTE).annotate(cantidad=Sum('cantidad'))
+    )
+    return (
+        sum(fila['cantidad'] for fila in filas),
+        totalizar(filas, CAMPOS_ESTADO),
+        totalizar(filas, CAMPOS_MODELO),
+        totalizar(filas, CAMPOS_LOTE),
+    )
+
+
+@tablero('equipos', 'almacenes.EstadoEquipo', 'almacenes.Modelo', 'almacenes.Marca', 'almacenes.Lote')
+def equipos():
+    if connection.vendor == 'postgresql':
+        total, por_estado, por_modelo, por_lote = _equipos_grouping_sets()
+    else:
+        total, por_estado, por_modelo, por_lote = _equipos_grano_fino()
+    return {
+        'total_equipos': total,
+        'por_estado': por_estado,
+        'top_modelos': por_modelo[:TOP_EQUIPOS],
+        'top_lotes': por_lote[:TOP_EQUIPOS],
+    }
+
+
+@tablero('lotes', 'almacenes.Lote', 'contratos.TipoServicio')
+def lotes():
+    filas = list(Lote.objects.order_by().values('tipo_servicio__nombre').annotate(cantidad=Count('id')))
+    return {
+        'total_lotes': sum(fila['cantidad'] for fila in filas),
+        'por_tipo_servicio': totalizar(filas, ['tipo_servicio__nombre']),
+    }
@@ -0,0 +1,47 @@
+# ======================================================
+# apps/almacenes/identificadores.py
+# ======================================================
+"""
+Forma canónica de los identificadores de equipos ONU.
+
+- MAC: XX:XX:XX:XX:XX:XX en mayúsculas (acepta ':', '-', '.', espacios o sin separador)
+- GPON serial, serial del fabricante y código interno: sin espacios, en mayúsculas
+
+Es la forma en que se guardan en EquipoONU y en IdentificadorEquipo, y la que se usa
+para resolver un código escaneado con una búsqueda exacta.
+"""
+import re
+
+MAC_REGEX = re.compile(r'^([0-9A-F]{2}[:-]){5}([0-9A-F]{2})$')
+_SEPARADORES_MAC = re.compile(r'[\s:.\-]')
+_HEX_12 = re.compile(r'^[0-9A-F]{12}$')
+
+
+def normalizar_mac(value):
+    """
+    Normaliza una MAC a XX:XX:XX:XX:XX:XX (mayúsculas, separador ':').
+    Lanza ValueError si el formato no es válido.
+    """
+    hexadecimal = _SEPARADORES_MAC.sub('', (value or '').upper())
+    if not _HEX_12.match(hexadecimal):
+        raise ValueError("Formato de MAC inválido. Use XX:XX:XX:XX:XX:XX")
+    return ':'.join(hexadecimal[i:i + 2] for i in range(0, 12, 2))
+
+
+def normalizar_serial(value):
+    """Serial / código en mayúsculas y sin espacios"""
+    return re.sub(r'\s+', '', value or '').upper()
+
+
+def candidatos(valor):
+    """
+    Formas canónicas bajo las que puede estar registrado un identificador escaneado.
+    Un valor de 12 hexadecimales puede ser una MAC sin separadores o un serial.
+    """
+    formas = {normalizar_serial(valor)}
+    try:
+        formas.add(normalizar_mac(valor))
+    except ValueError:
+        pass
+    formas.discard('')
+    return formas
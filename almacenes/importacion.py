@@ -0,0 +1,288 @@
+# ======================================================
+# apps/almacenes/importacion.py
+# ======================================================
+"""
+Importación masiva de equipos ONU para un lote desde CSV/XLSX.
+
+Las filas se leen de forma incremental (prod_a.archivos.leer_filas) y se procesan por bloques:
+- unicidad dentro del archivo con conjuntos en memoria
+- unicidad contra la BD con una sola consulta IN por bloque
+- inserción con bulk_create
+- control de cantidades contra LoteDetalle.cantidad, con los detalles bloqueados
+  (select_for_update) para que dos importaciones al mismo lote no lo excedan
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+
+from contratos.numeracion import codigos_equipo, registrar_codigos_equipo
+from prod_a.archivos import ArchivoInvalido
+
+from .identificadores import normalizar_mac, normalizar_serial
+from .models import EquipoONU, EstadoEquipo, IdentificadorEquipo, InventarioContador, LoteDetalle
+
+CAMPOS_UNICOS = ('codigo_interno', 'mac_address', 'gpon_serial', 'serial_manufacturer')
+COLUMNAS_OBLIGATORIAS = ('mac_address', 'gpon_serial', 'serial_manufacturer')
+
+
+def _entero(valor):
+    """Entero de una celda ('12', o '12.0' si la hoja lo guardó como número); None si no lo es"""
+    try:
+        numero = Decimal(valor)
+    except InvalidOperation:
+        return None
+    if not numero.is_finite() or numero != numero.to_integral_value():
+        return None
+    return int(numero)
+
+
+class ImportadorEquiposLote:
+    """
+    Registra equipos ONU de un lote a partir de un iterable de filas.
+
+    Columnas reconocidas: mac_address, gpon_serial, serial_manufacturer (obligatorias),
+    codigo_modelo (obligatoria si el lote tiene más de un modelo), codigo_interno
+    y observaciones (opcionales). Las filas inválidas se reportan y se omiten;
+    las válidas se insertan por bloques.
+    """
+
+    def __init__(self, lote, estado=None, chunk_size=500, dry_run=False):
+        self.lote = lote
+        self.estado = estado
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+
+        # Modelos esperados en el lote: codigo_modelo -> detalle
+        self.detalles = {
+            detalle.modelo.codigo_modelo: detalle
+            for detalle in lote.detalles.select_related('modelo')
+        }
+        # Equipos ya registrados por modelo (una consulta agrupada)
+        self.registrados = dict(
+            EquipoONU.objects.filter(lote=lote).order_by().values_list('modelo_id').annotate(total=Count('id'))
+        )
+
+        self.vistos = {campo: set() for campo in CAMPOS_UNICOS}
+        self.errores = []
+        self.creados = 0
+        self.filas_leidas = 0
+
+    def procesar(self, filas):
+        if not self.detalles:
+            raise ArchivoInvalido("El lote no tiene detalles (modelos y cantidades) definidos")
+
+        bloque = []
+        for numero, fila in enumerate(filas, start=2):  # fila 1 = encabezados
+            self.filas_leidas += 1
+            bloque.append((numero, fila))
+            if len(bloque) >= self.chunk_size:
+                self._procesar_bloque(bloque)
+                bloque = []
+        if bloque:
+            self._procesar_bloque(bloque)
+
+        return self.reporte()
+
+    def _procesar_bloque(self, bloque):
+        # 1) Validación de formato y unicidad dentro del archivo
+        candidatos = []
+        for numero, fila in bloque:
+            datos = self._validar_fila(numero, fila)
+            if datos:
+                candidatos.append((numero, datos))
+
+        if not candidatos:
+            return
+
+        # 2) Unicidad contra la BD: una sola consulta IN por bloque
+        filtro = Q()
+        for campo in CAMPOS_UNICOS:
+            valores = [d[campo] for _, d in candidatos if d.get(campo)]
+            if valores:
+                filtro |= Q(**{f'{campo}__in': valores})
+
+        existentes = {campo: set() for campo in CAMPOS_UNICOS}
+        for registro in EquipoONU.objects.filter(filtro).values_list(*CAMPOS_UNICOS):
+            for campo, valor in zip(CAMPOS_UNICOS, registro):
+                existentes[campo].add(valor)
+
+        sin_duplicar = []
+        for numero, datos in candidatos:
+            duplicado = next(
+                (c for c in CAMPOS_UNICOS if datos.get(c) and datos[c] in existentes[c]), None
+            )
+            if duplicado:
+                self._error(numero, duplicado, f"Ya existe un equipo con {duplicado} '{datos[duplicado]}'")
+                continue
+            sin_duplicar.append((numero, datos))
+
+        if not sin_duplicar:
+            return
+
+        # El control de cantidad y la inserción van en una transacción con los detalles
+        # del lote bloqueados: otra importación al mismo lote espera y cuenta lo insertado aquí
+        with transaction.atomic():
+            if not self.dry_run:
+                self._bloquear_detalles({datos['detalle'].modelo_id for _, datos in sin_duplicar})
+            self._insertar(self._dentro_de_cantidad(sin_duplicar))
+
+    def _bloquear_detalles(self, modelos):
+        """
+        SELECT ... FOR UPDATE de los LoteDetalle de `modelos` (en orden de id, sin deadlocks)
+        y recuento de los equipos ya registrados, que puede incluir los de otra importación.
+        """
+        cantidades = dict(
+            LoteDetalle.objects.select_for_update().filter(lote=self.lote, modelo_id__in=modelos)
+            .order_by('id').values_list('modelo_id', 'cantidad')
+        )
+        for detalle in self.detalles.values():
+            if detalle.modelo_id in cantidades:
+                detalle.cantidad = cantidades[detalle.modelo_id]
+        registrados = dict(
+            EquipoONU.objects.filter(lote=self.lote, modelo_id__in=modelos).order_by()
+            .values_list('modelo_id').annotate(total=Count('id'))
+        )
+        for modelo_id in modelos:
+            self.registrados[modelo_id] = registrados.get(modelo_id, 0)
+
+    def _dentro_de_cantidad(self, candidatos):
+        """3) Control de cantidad contra LoteDetalle: las filas que exceden se reportan"""
+        validos = []
+        for numero, datos in candidatos:
+            detalle = datos['detalle']
+            registrados = self.registrados.get(detalle.modelo_id, 0)
+            if registrados >= detalle.cantidad:
+                self._error(
+                    numero, 'codigo_modelo',
+                    f"Se excede la cantidad del lote para el modelo {detalle.modelo.codigo_modelo} "
+                    f"({detalle.cantidad})"
+                )
+                continue
+
+            self.registrados[detalle.modelo_id] = registrados + 1
+            validos.append((numero, datos))
+        return validos
+
+    def _insertar(self, validos):
+        if not validos or self.dry_run:
+            self.creados += len(validos)
+            return
+
+        # 4) Códigos internos: los del archivo adelantan la secuencia antes de reservar
+        # los faltantes (un bloque de la secuencia por bloque de filas)
+        registrar_codigos_equipo([d['codigo_interno'] for _, d in validos if d.get('codigo_interno')])
+        sin_codigo = [d for _, d in validos if not d.get('codigo_interno')]
+        if sin_codigo:
+            codigos = [c for c in codigos_equipo(len(sin_codigo)) if c not in self.vistos['codigo_interno']]
+            while len(codigos) < len(sin_codigo):
+                # Algún código del archivo coincidió con la secuencia: pedir los faltantes
+                codigos += [
+                    c for c in codigos_equipo(len(sin_codigo) - len(codigos))
+                    if c not in self.vistos['codigo_interno']
+                ]
+            for datos, codigo in zip(sin_codigo, codigos):
+                datos['codigo_interno'] = codigo
+                self.vistos['codigo_interno'].add(codigo)
+
+        # bulk_create no pasa por EquipoONU.save(): calcular el flag de disponibilidad aquí
+        disponible = EstadoEquipo.objects.es_disponible(self.estado.id if self.estado else None)
+        equipos = [
+            EquipoONU(
+                codigo_interno=datos['codigo_interno'],
+                modelo_id=datos['detalle'].modelo_id,
+                tipo_equipo_id=datos['detalle'].modelo.tipo_equipo_id,
+                lote=self.lote,
+                mac_address=datos['mac_address'],
+                gpon_serial=datos['gpon_serial'],
+                serial_manufacturer=datos['serial_manufacturer'],
+                estado=self.estado,
+                disponible=disponible,
+                observaciones=datos.get('observaciones', ''),
+            )
+            for _, datos in validos
+        ]
+
+        try:
+            # Savepoint: un conflicto revierte solo la inserción, no el bloqueo de los detalles
+            with transaction.atomic():
+                EquipoONU.objects.bulk_create(equipos, batch_size=self.chunk_size)
+                # bulk_create no emite señales: contadores e identificadores en la misma transacción
+                InventarioContador.objects.registrar(equipos)
+                IdentificadorEquipo.objects.sincronizar(equipos)
+        except IntegrityError:
+            # Conflicto concurrente con otro registro: se reporta el bloque completo
+            for numero, datos in validos:
+                self.registrados[datos['detalle'].modelo_id] -= 1
+                self._error(numero, None, "Conflicto de unicidad al guardar el bloque; reintente la fila")
+            return
+
+        self.creados += len(equipos)
+
+    def _validar_fila(self, numero, fila):
+        datos = {}
+
+        for campo in COLUMNAS_OBLIGATORIAS:
+            if not fila.get(campo):
+                self._error(numero, campo, "Campo obligatorio")
+                return None
+
+        try:
+            datos['mac_address'] = normalizar_mac(fila['mac_address'])
+        except ValueError as e:
+            self._error(numero, 'mac_address', str(e))
+            return None
+
+        datos['gpon_serial'] = normalizar_serial(fila['gpon_serial'])
+        datos['serial_manufacturer'] = normalizar_serial(fila['serial_manufacturer'])
+        datos['codigo_interno'] = fila.get('codigo_interno') or None
+        datos['observaciones'] = fila.get('observaciones', '')
+
+        # Modelo del equipo: debe pertenecer al lote
+        codigo_modelo = fila.get('codigo_modelo')
+        if codigo_modelo:
+            detalle = self.detalles.get(_entero(codigo_modelo))
+            if detalle is None:
+                self._error(numero, 'codigo_modelo', f"El modelo {codigo_modelo} no pertenece al lote")
+                return None
+        elif len(self.detalles) == 1:
+            detalle = next(iter(self.detalles.values()))
+        else:
+            self._error(numero, 'codigo_modelo', "Campo obligatorio: el lote tiene varios modelos")
+            return None
+        datos['detalle'] = detalle
+
+        # Unicidad dentro del propio archivo
+        for campo in CAMPOS_UNICOS:
+            valor = datos.get(campo)
+            if valor and valor in self.vistos[campo]:
+                self._error(numero, campo, f"Valor duplicado en el archivo: '{valor}'")
+                return None
+        for campo in CAMPOS_UNICOS:
+            if datos.get(campo):
+                self.vistos[campo].add(datos[campo])
+
+        return datos
+
+    def _error(self, fila, campo, mensaje):
+        self.errores.append({'fila': fila, 'campo': campo, 'error': mensaje})
+
+    def reporte(self):
+        por_modelo = [
+            {
+                'codigo_modelo': codigo,
+                'modelo': detalle.modelo.nombre,
+                'cantidad_lote': detalle.cantidad,
+                'equipos_registrados': self.registrados.get(detalle.modelo_id, 0),
+                'pendientes': max(0, detalle.cantidad - self.registrados.get(detalle.modelo_id, 0)),
+            }
+            for codigo, detalle in self.detalles.items()
+        ]
+        return {
+            'dry_run': self.dry_run,
+            'filas_leidas': self.filas_leidas,
+            'equipos_creados': self.creados,
+            'filas_con_error': len(self.errores),
+            'errores': sorted(self.errores, key=lambda e: e['fila']),
+            'por_modelo': por_modelo,
+        }
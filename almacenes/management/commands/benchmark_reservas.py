@@ -0,0 +1,102 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from almacenes import reservas
+from almacenes.models import EquipoONU
+
+
+class Command(BaseCommand):
+    """
+    Benchmark de reservas concurrentes de equipos ONU (almacenes/reservas.py).
+
+    Varios hilos reservan equipos del mismo modelo/tipo de servicio a la vez, como
+    técnicos preparando instalaciones en paralelo:
+        python manage.py benchmark_reservas --modelo 3
+        python manage.py benchmark_reservas --tipo-servicio 1 -n 200 -c 16 --cantidad 2
+
+    Reporta reservas/segundo, latencias p50/p95/p99, pedidos sin stock y verifica
+    que ningún equipo se haya entregado dos veces. Al terminar libera las reservas
+    creadas (salvo --conservar), devolviendo los equipos a DISPONIBLE.
+    """
+    help = 'Mide throughput y latencia de reservas concurrentes de equipos ONU'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modelo', type=int, help='Id del modelo a reservar')
+        parser.add_argument('--tipo-servicio', type=int, help='Id del tipo de servicio a reservar')
+        parser.add_argument('-n', '--reservas', type=int, default=100, help='Total de reservas (default: 100)')
+        parser.add_argument('-c', '--concurrency', type=int, default=8, help='Hilos concurrentes (default: 8)')
+        parser.add_argument('--cantidad', type=int, default=1, help='Equipos por reserva (default: 1)')
+        parser.add_argument('--conservar', action='store_true', help='No liberar las reservas al terminar')
+
+    def handle(self, *args, **options):
+        total = options['reservas']
+        concurrencia = options['concurrency']
+        pedido = {
+            'modelo_id': options['modelo'],
+            'tipo_servicio_id': options['tipo_servicio'],
+            'cantidad': options['cantidad'],
+        }
+
+        if not pedido['modelo_id'] and not pedido['tipo_servicio_id']:
+            raise CommandError('Indique --modelo y/o --tipo-servicio')
+        if total <= 0 or concurrencia <= 0 or pedido['cantidad'] <= 0:
+            raise CommandError('--reservas, --concurrency y --cantidad deben ser mayores a 0')
+
+        disponibles = EquipoONU.objects.filter(disponible=True)
+        if pedido['modelo_id']:
+            disponibles = disponibles.filter(modelo_id=pedido['modelo_id'])
+        if pedido['tipo_servicio_id']:
+            disponibles = disponibles.filter(lote__tipo_servicio_id=pedido['tipo_servicio_id'])
+        stock_inicial = disponibles.count()
+        self.stdout.write(f"Equipos disponibles al iniciar: {stock_inicial}")
+
+        def reservar():
+            inicio = time.perf_counter()
+            try:
+                creadas = reservas.reservar([pedido], observaciones='benchmark_reservas')
+            except reservas.StockInsuficiente:
+                creadas = None
+            return time.perf_counter() - inicio, creadas
+
+        def worker(cantidad):
+            try:
+                return [reservar() for _ in range(cantidad)]
+            finally:
+                connections.close_all()
+
+        reparto = [total // concurrencia + (1 if i < total % concurrencia else 0) for i in range(concurrencia)]
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+            resultados = [r for lote in executor.map(worker, reparto) for r in lote]
+        duracion = time.perf_counter() - inicio
+
+        latencias = sorted(r[0] for r in resultados)
+        creadas = [reserva for _, lote in resultados if lote for reserva in lote]
+        sin_stock = sum(1 for _, lote in resultados if lote is None)
+        equipos = [reserva.equipo_onu_id for reserva in creadas]
+        duplicados = len(equipos) - len(set(equipos))
+
+        def percentil(p):
+            return latencias[min(len(latencias) - 1, int(round(p / 100 * (len(latencias) - 1))))] * 1000
+
+        exitosas = total - sin_stock
+        self.stdout.write(f"Reservas: {total} | Concurrencia: {concurrencia} | Sin stock: {sin_stock}")
+        self.stdout.write(f"Duración total: {duracion:.2f} s")
+        self.stdout.write(self.style.SUCCESS(
+            f"Throughput: {exitosas / duracion:.1f} reservas/s ({len(equipos) / duracion:.1f} equipos/s)"
+        ))
+        self.stdout.write(
+            f"Latencia ms -> media: {statistics.mean(latencias) * 1000:.1f} | "
+            f"p50: {percentil(50):.1f} | p95: {percentil(95):.1f} | p99: {percentil(99):.1f}"
+        )
+        if duplicados:
+            self.stdout.write(self.style.ERROR(f"Equipos reservados más de una vez: {duplicados}"))
+        else:
+            self.stdout.write(f"Equipos reservados: {len(equipos)} (sin duplicados)")
+
+        if creadas and not options['conservar']:
+            liberadas = reservas.liberar([reserva.id for reserva in creadas])
+            self.stdout.write(f"Reservas liberadas: {liberadas}")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from almacenes.models import IdentificadorEquipo, InventarioContador
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye InventarioContador e IdentificadorEquipo desde EquipoONU.
+
+    Ambos se mantienen con señales; este comando repara desvíos
+    causados por escrituras que no emiten señales (SQL manual, queryset.update):
+        python manage.py recalcular_inventario
+    """
+    help = 'Recalcula los contadores de inventario (modelo × estado × lote) y los identificadores desde EquipoONU'
+
+    def handle(self, *args, **options):
+        InventarioContador.objects.recalcular()
+        self.stdout.write(self.style.SUCCESS(
+            f"Contadores recalculados: {InventarioContador.objects.count()} combinaciones, "
+            f"{InventarioContador.objects.total()} equipos"
+        ))
+
+        IdentificadorEquipo.objects.recalcular()
+        self.stdout.write(self.style.SUCCESS(
+            f"Identificadores recalculados: {IdentificadorEquipo.objects.count()}"
+        ))
@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from almacenes.models import InventarioContador, InventarioDiario
+
+
+class Command(BaseCommand):
+    """
+    Registra el snapshot diario de stock (modelo × estado × tipo de servicio).
+
+    Pensado para ejecutarse una vez al día (cron), al cierre de la jornada:
+        python manage.py snapshot_inventario
+        python manage.py snapshot_inventario --fecha 2025-01-31 --recalcular
+
+    Los totales salen de InventarioContador, por lo que no recorre EquipoONU.
+    Volver a ejecutarlo para la misma fecha reemplaza el snapshot de ese día.
+    """
+    help = 'Guarda el snapshot diario de inventario para las tendencias de stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help='Fecha del snapshot YYYY-MM-DD (default: hoy)')
+        parser.add_argument(
+            '--recalcular',
+            action='store_true',
+            help='Reconstruye InventarioContador desde EquipoONU antes del snapshot'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            fecha = date.fromisoformat(options['fecha']) if options['fecha'] else date.today()
+        except ValueError:
+            raise CommandError('--fecha debe tener formato YYYY-MM-DD')
+
+        if options['recalcular']:
+            InventarioContador.objects.recalcular()
+
+        filas = InventarioDiario.objects.tomar_snapshot(fecha)
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot {fecha}: {len(filas)} combinaciones, {sum(f.cantidad for f in filas)} equipos"
+        ))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def poblar_contadores(apps, schema_editor):
+    EquipoONU = apps.get_model('almacenes', 'EquipoONU')
+    InventarioContador = apps.get_model('almacenes', 'InventarioContador')
+    agrupados = EquipoONU.objects.order_by().values('modelo_id', 'estado_id', 'lote_id').annotate(
+        cantidad=models.Count('id')
+    )
+    InventarioContador.objects.bulk_create(
+        [InventarioContador(**fila) for fila in agrupados], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacenes', '0003_alter_solicitudequipoonu_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventarioContador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.IntegerField(default=0)),
+                ('estado', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='almacenes.estadoequipo')),
+                ('lote', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='almacenes.lote')),
+                ('modelo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='almacenes.modelo')),
+            ],
+            options={
+                'db_table': 'almacenes_inventario_contador',
+                'unique_together': {('modelo', 'estado', 'lote')},
+            },
+        ),
+        migrations.RunPython(poblar_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:11
+
+from django.db import migrations, models
+
+
+def asignar_codigos(apps, schema_editor):
+    """Código canónico inicial a partir del nombre y flag de disponibilidad de equipos"""
+    EstadoEquipo = apps.get_model('almacenes', 'EstadoEquipo')
+    EquipoONU = apps.get_model('almacenes', 'EquipoONU')
+
+    for estado in EstadoEquipo.objects.all():
+        estado.codigo = '_'.join(estado.nombre.strip().upper().split())[:30]
+        estado.save(update_fields=['codigo'])
+
+    EquipoONU.objects.filter(estado__codigo='DISPONIBLE').update(disponible=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacenes', '0004_inventariocontador'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipoonu',
+            name='disponible',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='estadoequipo',
+            name='codigo',
+            field=models.CharField(blank=True, max_length=30, null=True, unique=True),
+        ),
+        migrations.RunPython(asignar_codigos, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='equipoonu',
+            index=models.Index(condition=models.Q(('disponible', True)), fields=['modelo', 'lote'], include=('id',), name='equipo_onu_disponible_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacenes', '0005_estadoequipo_codigo_equipoonu_disponible'),
+        ('contratos', '0007_alter_servicio_plan_comercial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solicitudequipoonu',
+            name='contrato',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='contratos.contrato'),
+        ),
+        migrations.AddField(
+            model_name='solicitudequipoonu',
+            name='observaciones',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from almacenes.identificadores import normalizar_mac, normalizar_serial
+
+
+def normalizar_y_poblar(apps, schema_editor):
+    """
+    Lleva MAC y seriales existentes a la forma canónica (si no choca con otro equipo)
+    y carga el índice de identificadores
+    """
+    EquipoONU = apps.get_model('almacenes', 'EquipoONU')
+    IdentificadorEquipo = apps.get_model('almacenes', 'IdentificadorEquipo')
+
+    campos = ('mac_address', 'gpon_serial', 'serial_manufacturer')
+    equipos = list(EquipoONU.objects.only('id', 'codigo_interno', *campos))
+    usados = {campo: {getattr(e, campo) for e in equipos} for campo in campos}
+
+    def canonico(campo, valor):
+        if campo == 'mac_address':
+            try:
+                return normalizar_mac(valor)
+            except ValueError:
+                return valor
+        return normalizar_serial(valor)
+
+    modificados = []
+    for equipo in equipos:
+        cambio = False
+        for campo in campos:
+            actual = getattr(equipo, campo)
+            nuevo = canonico(campo, actual)
+            if nuevo != actual and nuevo not in usados[campo]:
+                usados[campo].discard(actual)
+                usados[campo].add(nuevo)
+                setattr(equipo, campo, nuevo)
+                cambio = True
+        if cambio:
+            modificados.append(equipo)
+    EquipoONU.objects.bulk_update(modificados, campos, batch_size=1000)
+
+    identificadores = []
+    for equipo in equipos:
+        for tipo, valor in (
+            ('CODIGO', normalizar_serial(equipo.codigo_interno)),
+            ('MAC', equipo.mac_address),
+            ('GPON', equipo.gpon_serial),
+            ('SERIAL', equipo.serial_manufacturer),
+        ):
+            if valor:
+                identificadores.append(IdentificadorEquipo(equipo_id=equipo.id, tipo=tipo, valor=valor))
+    IdentificadorEquipo.objects.bulk_create(identificadores, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacenes', '0006_solicitudequipoonu_contrato'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdentificadorEquipo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('CODIGO', 'Código interno'), ('MAC', 'MAC'), ('GPON', 'GPON serial'), ('SERIAL', 'Serial fabricante')], max_length=10)),
+                ('valor', models.CharField(max_length=100)),
+                ('equipo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='identificadores_equipo', to='almacenes.equipoonu')),
+            ],
+            options={
+                'db_table': 'almacenes_equipo_identificador',
+                'indexes': [models.Index(fields=['valor'], name='equipo_identificador_valor_idx')],
+            },
+        ),
+        migrations.RunPython(normalizar_y_poblar, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacenes', '0007_identificadorequipo'),
+        ('contratos', '0008_eventoestado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventarioDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('cantidad', models.IntegerField(default=0)),
+                ('estado', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='almacenes.estadoequipo')),
+                ('modelo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='almacenes.modelo')),
+                ('tipo_servicio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contratos.tiposervicio')),
+            ],
+            options={
+                'db_table': 'almacenes_inventario_diario',
+                'unique_together': {('fecha', 'modelo', 'estado', 'tipo_servicio')},
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:52
+
+from django.db import migrations, models
+
+
+def unificar_contadores_sin_estado(apps, schema_editor):
+    """Suma en una sola fila los contadores duplicados con estado NULL (la restricción anterior los permitía)"""
+    InventarioContador = apps.get_model('almacenes', 'InventarioContador')
+    duplicados = InventarioContador.objects.filter(estado__isnull=True).order_by().values(
+        'modelo_id', 'lote_id'
+    ).annotate(filas=models.Count('id')).filter(filas__gt=1)
+    for grupo in duplicados:
+        contadores = list(InventarioContador.objects.filter(
+            estado__isnull=True, modelo_id=grupo['modelo_id'], lote_id=grupo['lote_id']
+        ).order_by('id'))
+        primero = contadores[0]
+        primero.cantidad = sum(contador.cantidad for contador in contadores)
+        primero.save(update_fields=['cantidad'])
+        InventarioContador.objects.filter(pk__in=[contador.pk for contador in contadores[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacenes', '0008_inventariodiario'),
+    ]
+
+    operations = [
+        migrations.RunPython(unificar_contadores_sin_estado, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='inventariocontador',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='inventariocontador',
+            constraint=models.UniqueConstraint(
+                fields=('modelo', 'estado', 'lote'), name='almacenes_inventario_contador_unico',
+                nulls_distinct=False
+            ),
+        ),
+    ]
@@ -1,4 +1,11 @@
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Prefetch, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from contratos import estadisticas, numeracion
+
+from .identificadores import normalizar_mac, normalizar_serial
 
 class Marca(models.Model):
     nombre = models.CharField(max_length=100, unique=True)
@@ -39,12 +46,46 @@ class Componente(models.Model):
         db_table = 'almacenes_componente'
 
 
+# codigo -> id de EstadoEquipo en el cache compartido (se invalida con señales de EstadoEquipo)
+CLAVE_ESTADOS_POR_CODIGO = 'almacenes:estados_por_codigo'
+
+
+class EstadoEquipoManager(models.Manager):
+    def id_por_codigo(self, codigo):
+        """Id del estado con el código canónico dado (todos los estados se resuelven juntos y se cachean)"""
+        ids = cache.get(CLAVE_ESTADOS_POR_CODIGO)
+        if ids is None:
+            ids = dict(self.exclude(codigo__isnull=True).values_list('codigo', 'id'))
+            cache.set(CLAVE_ESTADOS_POR_CODIGO, ids, None)
+        return ids.get(codigo)
+
+    def por_codigo(self, codigo):
+        estado_id = self.id_por_codigo(codigo)
+        return self.filter(id=estado_id).first() if estado_id else None
+
+    def es_disponible(self, estado_id):
+        return estado_id is not None and estado_id == self.id_por_codigo(EstadoEquipo.DISPONIBLE)
+
+    def limpiar_cache(self):
+        # Ya y al confirmar: otro worker pudo volver a cachear los valores previos mientras tanto
+        cache.delete(CLAVE_ESTADOS_POR_CODIGO)
+        transaction.on_commit(lambda: cache.delete(CLAVE_ESTADOS_POR_CODIGO))
+
+
 class EstadoEquipo(models.Model):
+    # Códigos canónicos estables (el nombre es editable, el código no debe cambiar)
+    DISPONIBLE = 'DISPONIBLE'
+    RESERVADO = 'RESERVADO'
+    ASIGNADO = 'ASIGNADO'
+
     nombre = models.CharField(max_length=50, unique=True)
+    codigo = models.CharField(max_length=30, unique=True, null=True, blank=True)
     descripcion = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = EstadoEquipoManager()
+
     def __str__(self):
         return self.nombre
 
@@ -79,6 +120,30 @@ class ModeloComponente(models.Model):
         db_table = 'almacenes_modelo_componente'
 
 
+def _contar_equipos(**correlacion):
+    """Subconsulta con el número de equipos ONU que cumplen `correlacion` (con OuterRef)"""
+    totales = EquipoONU.objects.filter(**correlacion).order_by().values('lote').annotate(
+        total=Count('id')
+    ).values('total')
+    return Coalesce(Subquery(totales), 0)
+
+
+class LoteManager(models.Manager):
+    def con_progreso(self):
+        """
+        Lotes con el avance de registro precargado: equipos registrados por lote
+        y por modelo del lote se anotan en las mismas consultas que traen lotes y detalles
+        """
+        detalles = LoteDetalle.objects.select_related('modelo__marca').annotate(
+            equipos_registrados=_contar_equipos(lote=OuterRef('lote'), modelo=OuterRef('modelo'))
+        )
+        return self.select_related('tipo_servicio').prefetch_related(
+            Prefetch('detalles', queryset=detalles)
+        ).annotate(
+            equipos_registrados=_contar_equipos(lote=OuterRef('pk'))
+        )
+
+
 class Lote(models.Model):
     numero_lote = models.CharField(max_length=50, unique=True)
     proveedor = models.CharField(max_length=100)
@@ -92,10 +157,49 @@ class Lote(models.Model):
     def __str__(self):
         return f"{self.numero_lote} - {self.proveedor}"
 
+    objects = LoteManager()
+
     @property
     def cantidad_total(self):
         return sum(detalle.cantidad for detalle in self.detalles.all())
 
+    def progreso(self):
+        """
+        Avance de registro del lote (esperado vs registrado, total y por modelo).
+        Sin consultas adicionales si el lote viene de Lote.objects.con_progreso()
+        """
+        if hasattr(self, 'equipos_registrados'):
+            registrados = self.equipos_registrados
+        else:
+            registrados = self.equipoonu_set.count()
+
+        cantidad_total = 0
+        detalles_por_modelo = []
+        for detalle in self.detalles.all():
+            if hasattr(detalle, 'equipos_registrados'):
+                del_modelo = detalle.equipos_registrados
+            else:
+                del_modelo = self.equipoonu_set.filter(modelo_id=detalle.modelo_id).count()
+
+            cantidad_total += detalle.cantidad
+            detalles_por_modelo.append({
+                'modelo': f"{detalle.modelo.marca.nombre} {detalle.modelo.nombre}",
+                'codigo_modelo': detalle.modelo.codigo_modelo,
+                'cantidad_lote': detalle.cantidad,
+                'equipos_registrados': del_modelo,
+                'pendientes': max(0, detalle.cantidad - del_modelo)
+            })
+
+        return {
+            'cantidad_total': cantidad_total,
+            'equipos_registrados': registrados,
+            'equipos_pendientes': max(0, cantidad_total - registrados),
+            'porcentaje_registro': round(
+                (registrados / cantidad_total * 100) if cantidad_total > 0 else 0, 2
+            ),
+            'detalles_por_modelo': detalles_por_modelo,
+        }
+
     class Meta:
         db_table = 'almacenes_lote'
 
@@ -111,6 +215,34 @@ class LoteDetalle(models.Model):
         db_table = 'almacenes_lote_detalle'
 
 
+class EquipoONUManager(models.Manager):
+    def para_listado(self):
+        """
+        Queryset base de los listados de equipos: relaciones en JOIN y estado de
+        asignación anotado con EXISTS (lo leen los serializers en lugar de consultar por fila)
+        """
+        return self.select_related(
+            'modelo__marca', 'tipo_equipo', 'estado', 'lote'
+        ).annotate(
+            esta_asignado=Exists(
+                EquipoServicio.objects.filter(equipo_onu=OuterRef('pk'), estado_asignacion='ACTIVO')
+            )
+        )
+
+    def por_identificadores(self, valores):
+        """
+        Equipos cuyo código interno, MAC, GPON serial o serial coincide exactamente con
+        alguno de `valores` (ya en forma canónica), en una sola consulta sobre
+        IdentificadorEquipo. Cada fila trae el valor y el tipo que coincidió.
+        """
+        return self.para_listado().filter(
+            identificadores_equipo__valor__in=list(valores)
+        ).annotate(
+            identificador=F('identificadores_equipo__valor'),
+            tipo_identificador=F('identificadores_equipo__tipo'),
+        )
+
+
 class EquipoONU(models.Model):
     codigo_interno = models.CharField(max_length=50, unique=True)
     modelo = models.ForeignKey(Modelo, on_delete=models.CASCADE)
@@ -121,15 +253,244 @@ class EquipoONU(models.Model):
     serial_manufacturer = models.CharField(max_length=100, unique=True)
     fecha_ingreso = models.DateField(auto_now_add=True)
     estado = models.ForeignKey(EstadoEquipo, on_delete=models.SET_NULL, null=True, blank=True)
+    # Denormalizado desde estado.codigo == DISPONIBLE para el índice parcial de disponibles
+    disponible = models.BooleanField(default=False, editable=False)
     observaciones = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = EquipoONUManager()
+
     def __str__(self):
         return f"{self.codigo_interno} - {self.modelo}"
 
+    def identificadores(self):
+        """(tipo, valor canónico) de cada identificador escaneable del equipo"""
+        return [
+            (IdentificadorEquipo.CODIGO, normalizar_serial(self.codigo_interno)),
+            (IdentificadorEquipo.MAC, self.mac_address),
+            (IdentificadorEquipo.GPON, self.gpon_serial),
+            (IdentificadorEquipo.SERIAL, self.serial_manufacturer),
+        ]
+
+    def normalizar_identificadores(self):
+        try:
+            self.mac_address = normalizar_mac(self.mac_address)
+        except ValueError:
+            pass  # El formato se valida en el serializer
+        self.gpon_serial = normalizar_serial(self.gpon_serial)
+        self.serial_manufacturer = normalizar_serial(self.serial_manufacturer)
+
+    def save(self, *args, **kwargs):
+        if not self.codigo_interno:
+            self.codigo_interno = numeracion.codigo_equipo()
+        elif self._state.adding:
+            # Número indicado explícitamente: que la secuencia no lo entregue después
+            numeracion.registrar_codigos_equipo([self.codigo_interno])
+        self.normalizar_identificadores()
+        self.disponible = EstadoEquipo.objects.es_disponible(self.estado_id)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'estado' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'disponible'}
+
+        # Atómico junto con la actualización de InventarioContador (señal post_save)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
     class Meta:
         db_table = 'almacenes_equipo_onu'
+        indexes = [
+            # Búsqueda de equipos disponibles por modelo/lote (ej. al elegir equipo para instalación)
+            models.Index(
+                fields=['modelo', 'lote'],
+                include=['id'],
+                condition=Q(disponible=True),
+                name='equipo_onu_disponible_idx'
+            ),
+        ]
+
+
+class IdentificadorEquipoManager(models.Manager):
+    def sincronizar(self, equipos):
+        """Reescribe los identificadores de los equipos dados (tras crear o editar)"""
+        self.filter(equipo__in=[equipo.pk for equipo in equipos]).delete()
+        self.bulk_create([
+            IdentificadorEquipo(equipo_id=equipo.pk, tipo=tipo, valor=valor)
+            for equipo in equipos
+            for tipo, valor in equipo.identificadores()
+            if valor
+        ])
+
+    def recalcular(self):
+        """Reconstruye la tabla completa desde EquipoONU"""
+        with transaction.atomic():
+            self.all().delete()
+            equipos = EquipoONU.objects.only(
+                'id', 'codigo_interno', 'mac_address', 'gpon_serial', 'serial_manufacturer'
+            ).iterator(chunk_size=2000)
+            bloque = []
+            for equipo in equipos:
+                bloque.append(equipo)
+                if len(bloque) >= 2000:
+                    self.sincronizar(bloque)
+                    bloque = []
+            if bloque:
+                self.sincronizar(bloque)
+
+
+class IdentificadorEquipo(models.Model):
+    """
+    Índice unificado de identificadores de equipos (código interno, MAC, GPON serial,
+    serial del fabricante) en forma canónica: un código escaneado se resuelve con una
+    sola búsqueda exacta por `valor`, sin importar de qué tipo sea.
+    """
+    CODIGO = 'CODIGO'
+    MAC = 'MAC'
+    GPON = 'GPON'
+    SERIAL = 'SERIAL'
+
+    equipo = models.ForeignKey(EquipoONU, on_delete=models.CASCADE, related_name='identificadores_equipo')
+    tipo = models.CharField(max_length=10, choices=[
+        (CODIGO, 'Código interno'),
+        (MAC, 'MAC'),
+        (GPON, 'GPON serial'),
+        (SERIAL, 'Serial fabricante'),
+    ])
+    valor = models.CharField(max_length=100)
+
+    objects = IdentificadorEquipoManager()
+
+    def __str__(self):
+        return f"{self.tipo}: {self.valor}"
+
+    class Meta:
+        db_table = 'almacenes_equipo_identificador'
+        indexes = [
+            models.Index(fields=['valor'], name='equipo_identificador_valor_idx'),
+        ]
+
+
+class InventarioContadorManager(models.Manager):
+    def ajustar(self, modelo_id, estado_id, lote_id, delta):
+        """Suma `delta` al contador modelo × estado × lote (lo crea si no existe)"""
+        if not delta:
+            return
+
+        estadisticas.invalidar('equipos')
+        filtro = {'modelo_id': modelo_id, 'estado_id': estado_id, 'lote_id': lote_id}
+        if self.filter(**filtro).update(cantidad=F('cantidad') + delta) or delta < 0:
+            return
+
+        contador, creado = self.get_or_create(**filtro, defaults={'cantidad': delta})
+        if not creado:
+            self.filter(pk=contador.pk).update(cantidad=F('cantidad') + delta)
+
+    def registrar(self, equipos, signo=1):
+        """Ajusta los contadores para un conjunto de equipos (ej. tras bulk_create)"""
+        deltas = {}
+        for equipo in equipos:
+            clave = (equipo.modelo_id, equipo.estado_id, equipo.lote_id)
+            deltas[clave] = deltas.get(clave, 0) + signo
+        for (modelo_id, estado_id, lote_id), delta in deltas.items():
+            self.ajustar(modelo_id, estado_id, lote_id, delta)
+
+    def total(self, **filtros):
+        """Total de equipos según filtros sobre el contador"""
+        return self.filter(**filtros).aggregate(total=Sum('cantidad'))['total'] or 0
+
+    def subconsulta(self, campo, **filtros):
+        """
+        Expresión para anotar un queryset con el total de equipos,
+        ej: Marca.objects.annotate(equipos_total=InventarioContador.objects.subconsulta('modelo__marca'))
+        """
+        totales = self.filter(**{campo: OuterRef('pk')}, **filtros).order_by().values(campo).annotate(
+            total=Sum('cantidad')
+        ).values('total')
+        return Coalesce(Subquery(totales), 0)
+
+    def recalcular(self):
+        """Reconstruye todos los contadores desde EquipoONU (reparación de desvíos)"""
+        with transaction.atomic():
+            self.all().delete()
+            agrupados = EquipoONU.objects.order_by().values('modelo_id', 'estado_id', 'lote_id').annotate(
+                cantidad=models.Count('id')
+            )
+            self.bulk_create([InventarioContador(**fila) for fila in agrupados], batch_size=1000)
+            estadisticas.invalidar('equipos')
+
+
+class InventarioContador(models.Model):
+    """
+    Contador denormalizado de equipos ONU por modelo × estado × lote.
+    Se mantiene con señales de EquipoONU (almacenes/signals.py) y lo leen los
+    listados de modelos y las acciones de estadísticas en lugar de contar EquipoONU.
+    Los catálogos cacheados no lo usan: cada escritura los invalidaría.
+    """
+    modelo = models.ForeignKey(Modelo, on_delete=models.CASCADE)
+    estado = models.ForeignKey(EstadoEquipo, on_delete=models.CASCADE, null=True, blank=True)
+    lote = models.ForeignKey(Lote, on_delete=models.CASCADE)
+    cantidad = models.IntegerField(default=0)
+
+    objects = InventarioContadorManager()
+
+    def __str__(self):
+        return f"{self.modelo_id}/{self.estado_id}/{self.lote_id}: {self.cantidad}"
+
+    class Meta:
+        db_table = 'almacenes_inventario_contador'
+        constraints = [
+            # Un solo contador "sin estado" por modelo × lote: NULL no es distinto de NULL
+            models.UniqueConstraint(
+                fields=['modelo', 'estado', 'lote'], nulls_distinct=False,
+                name='almacenes_inventario_contador_unico'
+            ),
+        ]
+
+
+class InventarioDiarioManager(models.Manager):
+    def tomar_snapshot(self, fecha):
+        """
+        Guarda los totales del día (modelo × estado × tipo de servicio) a partir de
+        InventarioContador, sin recorrer EquipoONU. Reemplaza el snapshot de esa fecha.
+        """
+        agrupados = InventarioContador.objects.filter(cantidad__gt=0).order_by().values(
+            'modelo_id', 'estado_id', 'lote__tipo_servicio_id'
+        ).annotate(total=Sum('cantidad'))
+
+        with transaction.atomic():
+            self.filter(fecha=fecha).delete()
+            return self.bulk_create([
+                InventarioDiario(
+                    fecha=fecha,
+                    modelo_id=fila['modelo_id'],
+                    estado_id=fila['estado_id'],
+                    tipo_servicio_id=fila['lote__tipo_servicio_id'],
+                    cantidad=fila['total'],
+                )
+                for fila in agrupados
+            ], batch_size=1000)
+
+
+class InventarioDiario(models.Model):
+    """Serie diaria de stock por modelo × estado × tipo de servicio (snapshot_inventario)"""
+    fecha = models.DateField()
+    modelo = models.ForeignKey(Modelo, on_delete=models.CASCADE)
+    estado = models.ForeignKey(EstadoEquipo, on_delete=models.SET_NULL, null=True, blank=True)
+    tipo_servicio = models.ForeignKey('contratos.TipoServicio', on_delete=models.CASCADE)
+    cantidad = models.IntegerField(default=0)
+
+    objects = InventarioDiarioManager()
+
+    def __str__(self):
+        return f"{self.fecha} {self.modelo_id}/{self.estado_id}/{self.tipo_servicio_id}: {self.cantidad}"
+
+    class Meta:
+        unique_together = ['fecha', 'modelo', 'estado', 'tipo_servicio']
+        db_table = 'almacenes_inventario_diario'
 
 
 class EquipoServicio(models.Model):
@@ -157,7 +518,9 @@ class EquipoServicio(models.Model):
 
 
 class SolicitudEquipoONU(models.Model):
+    """Reserva de un equipo para instalación (ver almacenes/reservas.py)"""
     equipo_onu = models.ForeignKey(EquipoONU, on_delete=models.CASCADE)
+    contrato = models.ForeignKey('contratos.Contrato', on_delete=models.SET_NULL, null=True, blank=True)
     estado_asignacion = models.CharField(
         max_length=20,
         choices=[
@@ -168,10 +531,11 @@ class SolicitudEquipoONU(models.Model):
         default='RESERVADO'
     )
     fecha_reserva = models.DateField(auto_now_add=True)
+    observaciones = models.TextField(blank=True)
 
     class Meta:
         db_table = 'solicitud_equipo_onu'
        
 
     def __str__(self):
-        return f"{self.equipo_onu} - {self.solicitud} ({self.estado_asignacion})"
+        return f"{self.equipo_onu} - {self.contrato_id} ({self.estado_asignacion})"
@@ -0,0 +1,141 @@
+# ======================================================
+# apps/almacenes/reservas.py
+# ======================================================
+"""
+Reserva de equipos ONU para instalación sin contención entre técnicos.
+
+Cada pedido toma N equipos disponibles de un modelo y/o tipo de servicio con
+SELECT ... FOR UPDATE SKIP LOCKED: dos reservas concurrentes nunca obtienen el
+mismo equipo y ninguna espera a que la otra libere sus filas. El cambio de estado,
+las filas de SolicitudEquipoONU y los contadores de inventario se escriben en la
+misma transacción; si algún pedido de un lote no tiene stock, no se reserva nada.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EquipoONU, EstadoEquipo, InventarioContador, SolicitudEquipoONU
+
+
+class ReservaError(Exception):
+    """La reserva no se pudo completar (sin stock o estados no configurados)"""
+
+
+class StockInsuficiente(ReservaError):
+    def __init__(self, pedido, disponibles):
+        self.pedido = pedido
+        self.disponibles = disponibles
+        super().__init__(
+            f"Stock insuficiente: se pidieron {pedido['cantidad']} equipos y hay {disponibles} libres "
+            f"(modelo={pedido.get('modelo_id')}, tipo_servicio={pedido.get('tipo_servicio_id')})"
+        )
+
+
+def _estado_id(codigo):
+    estado_id = EstadoEquipo.objects.id_por_codigo(codigo)
+    if estado_id is None:
+        raise ReservaError(f"No existe un EstadoEquipo con código '{codigo}'")
+    return estado_id
+
+
+def _validar_pedido(pedido):
+    if not pedido.get('modelo_id') and not pedido.get('tipo_servicio_id'):
+        raise ReservaError("Cada pedido requiere modelo_id o tipo_servicio_id")
+    try:
+        cantidad = int(pedido.get('cantidad', 1))
+    except (TypeError, ValueError):
+        cantidad = 0
+    if cantidad <= 0:
+        raise ReservaError("La cantidad de cada pedido debe ser un entero mayor a 0")
+    return {**pedido, 'cantidad': cantidad}
+
+
+def _tomar_disponibles(pedido, excluir=()):
+    """
+    Bloquea hasta `cantidad` equipos libres del pedido, saltando los que otra transacción ya tomó.
+    SKIP LOCKED no salta las filas bloqueadas por la propia transacción: los equipos ya
+    tomados por pedidos anteriores del mismo lote se excluyen explícitamente.
+    """
+    equipos = EquipoONU.objects.filter(disponible=True).exclude(id__in=excluir)
+    if pedido.get('modelo_id'):
+        equipos = equipos.filter(modelo_id=pedido['modelo_id'])
+    if pedido.get('tipo_servicio_id'):
+        equipos = equipos.filter(lote__tipo_servicio_id=pedido['tipo_servicio_id'])
+
+    return list(
+        equipos.order_by('id')
+        .select_for_update(skip_locked=True, of=('self',))
+        .only('id', 'modelo_id', 'estado_id', 'lote_id')[:pedido['cantidad']]
+    )
+
+
+def _cambiar_estado(equipos, estado_id, disponible):
+    """Cambio de estado en bloque: queryset.update no emite señales, los contadores se ajustan aquí"""
+    InventarioContador.objects.registrar(equipos, signo=-1)
+    EquipoONU.objects.filter(id__in=[e.id for e in equipos]).update(
+        estado_id=estado_id, disponible=disponible, updated_at=timezone.now()
+    )
+    for equipo in equipos:
+        equipo.estado_id = estado_id
+    InventarioContador.objects.registrar(equipos)
+
+
+def reservar(pedidos, contrato=None, observaciones=''):
+    """
+    Reserva equipos para uno o varios pedidos en una sola transacción.
+
+    `pedidos`: lista de dicts con 'cantidad' y al menos uno de 'modelo_id' / 'tipo_servicio_id'.
+    Devuelve la lista de SolicitudEquipoONU creadas. Lanza StockInsuficiente si algún
+    pedido no se puede cubrir completo (en ese caso no se reserva ningún equipo).
+    """
+    pedidos = [_validar_pedido(pedido) for pedido in pedidos]
+    if not pedidos:
+        raise ReservaError("Debe indicar al menos un pedido")
+
+    estado_reservado = _estado_id(EstadoEquipo.RESERVADO)
+
+    with transaction.atomic():
+        equipos = []
+        for pedido in pedidos:
+            tomados = _tomar_disponibles(pedido, excluir=[e.id for e in equipos])
+            if len(tomados) < pedido['cantidad']:
+                raise StockInsuficiente(pedido, len(tomados))
+            equipos.extend(tomados)
+
+        _cambiar_estado(equipos, estado_reservado, disponible=False)
+
+        return SolicitudEquipoONU.objects.bulk_create([
+            SolicitudEquipoONU(
+                equipo_onu=equipo, contrato=contrato,
+                estado_asignacion='RESERVADO', observaciones=observaciones
+            )
+            for equipo in equipos
+        ])
+
+
+def liberar(reserva_ids):
+    """
+    Cancela reservas vigentes (RESERVADO -> DESASIGNADO) y devuelve sus equipos a DISPONIBLE.
+    Devuelve la cantidad de reservas liberadas.
+    """
+    estado_disponible = _estado_id(EstadoEquipo.DISPONIBLE)
+
+    with transaction.atomic():
+        reservas = list(
+            SolicitudEquipoONU.objects.filter(id__in=reserva_ids, estado_asignacion='RESERVADO')
+            .select_for_update(of=('self',))
+            .values_list('id', 'equipo_onu_id')
+        )
+        if not reservas:
+            return 0
+
+        equipos = list(
+            EquipoONU.objects.filter(id__in=[equipo_id for _, equipo_id in reservas])
+            .select_for_update()
+            .only('id', 'modelo_id', 'estado_id', 'lote_id')
+        )
+        _cambiar_estado(equipos, estado_disponible, disponible=True)
+
+        SolicitudEquipoONU.objects.filter(id__in=[reserva_id for reserva_id, _ in reservas]).update(
+            estado_asignacion='DESASIGNADO'
+        )
+        return len(reservas)
@@ -5,41 +5,40 @@ from django.db import transaction
 from rest_framework import serializers
 from .models import (
     Marca, TipoEquipo, Componente, EstadoEquipo, Modelo,
-    ModeloComponente, Lote, LoteDetalle, EquipoONU, EquipoServicio, SolicitudEquipoONU
+    ModeloComponente, Lote, LoteDetalle, EquipoONU, EquipoServicio, SolicitudEquipoONU,
+    InventarioContador
 )
+from .anidados import sincronizar_hijos
+from .identificadores import normalizar_mac, normalizar_serial
 
 
 class MarcaSerializer(serializers.ModelSerializer):
     modelos_count = serializers.SerializerMethodField()
-    equipos_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Marca
-        fields = ['id', 'nombre', 'descripcion', 'modelos_count', 'equipos_count', 'created_at', 'updated_at']
+        fields = ['id', 'nombre', 'descripcion', 'modelos_count', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
     def get_modelos_count(self, obj):
+        if hasattr(obj, 'modelos_total'):
+            return obj.modelos_total
         return obj.modelo_set.count()
 
-    def get_equipos_count(self, obj):
-        return sum(modelo.equipoonu_set.count() for modelo in obj.modelo_set.all())
-
 
 class TipoEquipoSerializer(serializers.ModelSerializer):
     modelos_count = serializers.SerializerMethodField()
-    equipos_count = serializers.SerializerMethodField()
 
     class Meta:
         model = TipoEquipo
-        fields = ['id', 'nombre', 'descripcion', 'modelos_count', 'equipos_count', 'created_at', 'updated_at']
+        fields = ['id', 'nombre', 'descripcion', 'modelos_count', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
     def get_modelos_count(self, obj):
+        if hasattr(obj, 'modelos_total'):
+            return obj.modelos_total
         return obj.modelo_set.count()
 
-    def get_equipos_count(self, obj):
-        return obj.equipoonu_set.count()
-
 
 class ComponenteSerializer(serializers.ModelSerializer):
     modelos_usando = serializers.SerializerMethodField()
@@ -50,19 +49,20 @@ class ComponenteSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
     def get_modelos_usando(self, obj):
+        if hasattr(obj, 'modelos_total'):
+            return obj.modelos_total
         return obj.modelocomponente_set.count()
 
 
 class EstadoEquipoSerializer(serializers.ModelSerializer):
-    equipos_count = serializers.SerializerMethodField()
-
     class Meta:
         model = EstadoEquipo
-        fields = ['id', 'nombre', 'descripcion', 'equipos_count', 'created_at', 'updated_at']
+        fields = ['id', 'nombre', 'codigo', 'descripcion', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
-    def get_equipos_count(self, obj):
-        return obj.equipoonu_set.count()
+    def validate_codigo(self, value):
+        """Códigos canónicos en mayúsculas; vacío se guarda como NULL"""
+        return value.strip().upper() if value else None
 
 
 class ModeloComponenteSerializer(serializers.ModelSerializer):
@@ -95,12 +95,32 @@ class ModeloSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at']
 
+    def validate_componentes_data(self, value):
+        """Normaliza a [{'componente_id', 'cantidad'}] y verifica los componentes con una consulta"""
+        componentes = []
+        for item in value:
+            try:
+                componentes.append({
+                    'componente_id': int(item['componente_id']),
+                    'cantidad': int(item.get('cantidad', 1)),
+                })
+            except (KeyError, TypeError, ValueError):
+                raise serializers.ValidationError("Cada componente requiere componente_id y cantidad numéricos")
+
+        ids = {c['componente_id'] for c in componentes}
+        if len(ids) != len(componentes):
+            raise serializers.ValidationError("Hay componentes repetidos")
+        faltantes = ids - set(Componente.objects.filter(id__in=ids).values_list('id', flat=True))
+        if faltantes:
+            raise serializers.ValidationError(f"Componentes inexistentes: {sorted(faltantes)}")
+        return componentes
+
     def create(self, validated_data):
         componentes_data = validated_data.pop('componentes_data', [])
 
         with transaction.atomic():
             modelo = Modelo.objects.create(**validated_data)
-            self._crear_componentes(modelo, componentes_data)
+            sincronizar_hijos(modelo.modelocomponente_set, 'componente_id', componentes_data, ['cantidad'])
 
         return modelo
 
@@ -113,29 +133,25 @@ class ModeloSerializer(serializers.ModelSerializer):
                 setattr(instance, attr, value)
             instance.save()
 
-            # Si se proporcionaron componentes, reemplazarlos
+            # Si se proporcionaron componentes, aplicar solo las diferencias
             if componentes_data is not None:
-                instance.modelocomponente_set.all().delete()
-                self._crear_componentes(instance, componentes_data)
+                sincronizar_hijos(
+                    instance.modelocomponente_set, 'componente_id', componentes_data, ['cantidad']
+                )
 
         return instance
 
-    def _crear_componentes(self, modelo, componentes_data):
-        for comp_data in componentes_data:
-            ModeloComponente.objects.create(
-                modelo=modelo,
-                componente_id=comp_data['componente_id'],
-                cantidad=comp_data.get('cantidad', 1)
-            )
-
     def get_equipos_count(self, obj):
-        return obj.equipoonu_set.count()
+        if hasattr(obj, 'equipos_total'):
+            return obj.equipos_total
+        return InventarioContador.objects.total(modelo=obj)
 
     def get_equipos_disponibles(self, obj):
-        # Asumiendo que estado con nombre 'DISPONIBLE' indica disponibilidad
-        return obj.equipoonu_set.filter(
-            estado__nombre__icontains='DISPONIBLE'
-        ).count()
+        if hasattr(obj, 'equipos_disponibles_total'):
+            return obj.equipos_disponibles_total
+        return InventarioContador.objects.total(
+            modelo=obj, estado_id=EstadoEquipo.objects.id_por_codigo(EstadoEquipo.DISPONIBLE)
+        )
 
 
 class LoteDetalleSerializer(serializers.ModelSerializer):
@@ -168,13 +184,16 @@ class LoteSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['fecha_ingreso', 'created_at', 'updated_at']
 
+    def to_representation(self, instance):
+        # Un solo cálculo de avance por lote, compartido por los campos de progreso
+        self._progreso = instance.progreso()
+        return super().to_representation(instance)
+
     def get_equipos_registrados(self, obj):
-        return obj.equipoonu_set.count()
+        return self._progreso['equipos_registrados']
 
     def get_equipos_pendientes(self, obj):
-        registrados = obj.equipoonu_set.count()
-        total = obj.cantidad_total
-        return max(0, total - registrados)
+        return self._progreso['equipos_pendientes']
 
 
 class LoteCreateSerializer(serializers.ModelSerializer):
@@ -185,13 +204,25 @@ class LoteCreateSerializer(serializers.ModelSerializer):
         model = Lote
         fields = ['numero_lote', 'proveedor', 'tipo_servicio', 'observaciones', 'detalles']
 
+    def validate_detalles(self, value):
+        modelos = [detalle['modelo'].id for detalle in value]
+        if len(modelos) != len(set(modelos)):
+            raise serializers.ValidationError("Hay modelos repetidos en los detalles")
+        return value
+
+    def _filas_detalle(self, detalles_data):
+        return [
+            {'modelo_id': detalle['modelo'].id, 'cantidad': detalle['cantidad']}
+            for detalle in detalles_data
+        ]
+
     def create(self, validated_data):
         """Crear lote con detalles"""
         detalles_data = validated_data.pop('detalles')
-        lote = Lote.objects.create(**validated_data)
 
-        for detalle_data in detalles_data:
-            LoteDetalle.objects.create(lote=lote, **detalle_data)
+        with transaction.atomic():
+            lote = Lote.objects.create(**validated_data)
+            sincronizar_hijos(lote.detalles, 'modelo_id', self._filas_detalle(detalles_data), ['cantidad'])
 
         return lote
 
@@ -199,24 +230,18 @@ class LoteCreateSerializer(serializers.ModelSerializer):
         """Actualizar lote con detalles - NUEVO"""
         detalles_data = validated_data.pop('detalles', [])
 
-        # Actualizar campos básicos del lote
-        instance.numero_lote = validated_data.get('numero_lote', instance.numero_lote)
-        instance.proveedor = validated_data.get('proveedor', instance.proveedor)
-        instance.tipo_servicio = validated_data.get('tipo_servicio', instance.tipo_servicio)
-        instance.observaciones = validated_data.get('observaciones', instance.observaciones)
-        instance.save()
-
-        # Actualizar detalles si se proporcionaron
-        if detalles_data:
-            # Eliminar detalles existentes para reemplazarlos
-            instance.detalles.all().delete()
-
-            # Crear nuevos detalles
-            for detalle_data in detalles_data:
-                LoteDetalle.objects.create(
-                    lote=instance,
-                    modelo=detalle_data['modelo'],
-                    cantidad=detalle_data['cantidad']
+        with transaction.atomic():
+            # Actualizar campos básicos del lote
+            instance.numero_lote = validated_data.get('numero_lote', instance.numero_lote)
+            instance.proveedor = validated_data.get('proveedor', instance.proveedor)
+            instance.tipo_servicio = validated_data.get('tipo_servicio', instance.tipo_servicio)
+            instance.observaciones = validated_data.get('observaciones', instance.observaciones)
+            instance.save()
+
+            # Actualizar detalles si se proporcionaron: solo las diferencias por modelo
+            if detalles_data:
+                sincronizar_hijos(
+                    instance.detalles, 'modelo_id', self._filas_detalle(detalles_data), ['cantidad']
                 )
 
         return instance
@@ -243,31 +268,38 @@ class EquipoONUSerializer(serializers.ModelSerializer):
             'observaciones', 'created_at', 'updated_at'
         ]
         read_only_fields = ['fecha_ingreso', 'created_at', 'updated_at']
+        # Si se omite, EquipoONU.save() lo asigna desde la secuencia de códigos (contratos/numeracion.py)
+        extra_kwargs = {'codigo_interno': {'required': False, 'allow_blank': True}}
 
     def get_esta_asignado(self, obj):
+        # Anotado con Exists(...) por EquipoONU.objects.para_listado()
+        if hasattr(obj, 'esta_asignado'):
+            return obj.esta_asignado
         return obj.equiposervicio_set.filter(estado_asignacion='ACTIVO').exists()
 
     def validate_mac_address(self, value):
         """Validación personalizada para MAC address"""
         if value:
             # Normalizar formato (convertir a mayúsculas con :)
-            import re
-            value = value.upper().replace('-', ':')
-            if not re.match(r'^([0-9A-F]{2}[:-]){5}([0-9A-F]{2})$', value):
-                raise serializers.ValidationError(
-                    "Formato de MAC inválido. Use XX:XX:XX:XX:XX:XX"
-                )
+            try:
+                value = normalizar_mac(value)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
         return value
 
-    def validate_codigo_interno(self, value):
-        """Generar código interno si no se proporciona"""
-        if not value:
-            import uuid
-            while True:
-                codigo = f"EQ-{str(uuid.uuid4().int)[:6]}"
-                if not EquipoONU.objects.filter(codigo_interno=codigo).exists():
-                    return codigo
-        return value
+    def to_internal_value(self, data):
+        # Forma canónica antes de las validaciones de unicidad (UniqueValidator compara exacto)
+        if hasattr(data, 'copy'):
+            data = data.copy()
+            for campo in ('gpon_serial', 'serial_manufacturer'):
+                if isinstance(data.get(campo), str):
+                    data[campo] = normalizar_serial(data[campo])
+            if isinstance(data.get('mac_address'), str):
+                try:
+                    data['mac_address'] = normalizar_mac(data['mac_address'])
+                except ValueError:
+                    pass  # validate_mac_address reporta el error
+        return super().to_internal_value(data)
 
 
 class EquipoONUListSerializer(serializers.ModelSerializer):
@@ -290,6 +322,9 @@ class EquipoONUListSerializer(serializers.ModelSerializer):
         ]
 
     def get_esta_asignado(self, obj):
+        # Anotado con Exists(...) por EquipoONU.objects.para_listado()
+        if hasattr(obj, 'esta_asignado'):
+            return obj.esta_asignado
         return obj.equiposervicio_set.filter(estado_asignacion='ACTIVO').exists()
 
     def get_modelo_completo(self, obj):
@@ -320,35 +355,41 @@ class EquipoServicioSerializer(serializers.ModelSerializer):
 
 class SolicitudEquipoONUSerializer(serializers.ModelSerializer):
     equipo_onu_info = serializers.SerializerMethodField()
-    solicitud_info = serializers.SerializerMethodField()
+    contrato_numero = serializers.CharField(source='contrato.numero_contrato', read_only=True)
     estado_display = serializers.CharField(source='get_estado_asignacion_display', read_only=True)
     
     class Meta:
         model = SolicitudEquipoONU
         fields = [
             'id',
-            'solicitud',
-            'solicitud_info',
+            'contrato',
+            'contrato_numero',
             'equipo_onu',
             'equipo_onu_info',
             'estado_asignacion',
             'estado_display',
             'fecha_reserva',
-            'fecha_asignacion',
-            'fecha_desasignacion',
             'observaciones'
         ]
         read_only_fields = ['fecha_reserva']
     
     def get_equipo_onu_info(self, obj):
-        from almacenes.serializers import EquipoONUListSerializer
         return EquipoONUListSerializer(obj.equipo_onu).data
-    
-    def get_solicitud_info(self, obj):
-        from solicitud.serializers import SolicitudSerializer
-        return {
-            'id': obj.solicitud.id,
-            'codigo': f"SOL-{obj.solicitud.id:06d}",
-            'fecha_solicitud': obj.solicitud.fecha_solicitud,
-            'cliente_nombre': f"{obj.solicitud.cliente.nombre} {obj.solicitud.cliente.apellido}"
-        }
\ No newline at end of file
+
+
+class PedidoReservaSerializer(serializers.Serializer):
+    """Un pedido de reserva: N equipos libres de un modelo y/o tipo de servicio"""
+    modelo_id = serializers.IntegerField(required=False)
+    tipo_servicio_id = serializers.IntegerField(required=False)
+    cantidad = serializers.IntegerField(min_value=1, default=1)
+
+    def validate(self, data):
+        if not data.get('modelo_id') and not data.get('tipo_servicio_id'):
+            raise serializers.ValidationError("Debe indicar modelo_id o tipo_servicio_id")
+        return data
+
+
+class ReservaEquiposSerializer(serializers.Serializer):
+    pedidos = PedidoReservaSerializer(many=True, allow_empty=False)
+    contrato_id = serializers.IntegerField(required=False, allow_null=True)
+    observaciones = serializers.CharField(required=False, allow_blank=True, default='')
@@ -0,0 +1,111 @@
+# ======================================================
+# apps/almacenes/signals.py
+# ======================================================
+from django.db.models.signals import post_init, post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from prod_a import catalogos
+from .models import EquipoONU, EstadoEquipo, IdentificadorEquipo, InventarioContador
+
+CAMPOS_INVENTARIO = ('modelo_id', 'estado_id', 'lote_id')
+CAMPOS_IDENTIFICADOR = ('codigo_interno', 'mac_address', 'gpon_serial', 'serial_manufacturer')
+
+
+def _clave_inventario(equipo):
+    return tuple(getattr(equipo, campo) for campo in CAMPOS_INVENTARIO)
+
+
+@receiver(post_init, sender=EquipoONU)
+def recordar_clave_inventario(sender, instance, **kwargs):
+    """Guarda modelo/estado/lote originales para detectar cambios sin consultar la BD"""
+    diferidos = instance.get_deferred_fields()
+    if instance._state.adding or any(campo in diferidos for campo in CAMPOS_INVENTARIO):
+        instance._clave_inventario = None
+    else:
+        instance._clave_inventario = _clave_inventario(instance)
+
+    if instance._state.adding or any(campo in diferidos for campo in CAMPOS_IDENTIFICADOR):
+        instance._identificadores = None
+    else:
+        instance._identificadores = instance.identificadores()
+
+
+@receiver(pre_save, sender=EquipoONU)
+def cargar_clave_inventario(sender, instance, **kwargs):
+    """Si la instancia se cargó con campos diferidos, obtener la clave original de la BD"""
+    if instance._state.adding or getattr(instance, '_clave_inventario', None) is not None:
+        return
+    instance._clave_inventario = EquipoONU.objects.filter(pk=instance.pk).values_list(
+        *CAMPOS_INVENTARIO
+    ).first()
+
+
+@receiver(post_save, sender=EquipoONU)
+def actualizar_contador_guardado(sender, instance, created, **kwargs):
+    nueva = _clave_inventario(instance)
+    anterior = None if created else getattr(instance, '_clave_inventario', None)
+
+    if anterior != nueva:
+        if anterior is not None:
+            InventarioContador.objects.ajustar(*anterior, -1)
+        InventarioContador.objects.ajustar(*nueva, 1)
+
+    instance._clave_inventario = nueva
+
+
+@receiver(post_save, sender=EquipoONU)
+def actualizar_identificadores(sender, instance, created, **kwargs):
+    """Mantiene IdentificadorEquipo si cambió algún identificador (o al crear)"""
+    actuales = instance.identificadores()
+    if created or getattr(instance, '_identificadores', None) != actuales:
+        IdentificadorEquipo.objects.sincronizar([instance])
+    instance._identificadores = actuales
+
+
+@receiver(post_delete, sender=EquipoONU)
+def actualizar_contador_eliminado(sender, instance, **kwargs):
+    clave = getattr(instance, '_clave_inventario', None) or _clave_inventario(instance)
+    InventarioContador.objects.ajustar(*clave, -1)
+
+
+@receiver(pre_delete, sender=EstadoEquipo)
+def mover_contadores_estado(sender, instance, **kwargs):
+    """Los equipos del estado eliminado quedan sin estado (SET_NULL): mover sus contadores"""
+    for contador in InventarioContador.objects.filter(estado=instance):
+        InventarioContador.objects.ajustar(contador.modelo_id, None, contador.lote_id, contador.cantidad)
+    if instance.codigo == EstadoEquipo.DISPONIBLE:
+        EquipoONU.objects.filter(estado=instance).update(disponible=False)
+
+
+@receiver(post_init, sender=EstadoEquipo)
+def recordar_codigo_estado(sender, instance, **kwargs):
+    if 'codigo' not in instance.get_deferred_fields():
+        instance._codigo_original = instance.codigo
+
+
+@receiver(post_save, sender=EstadoEquipo)
+def actualizar_codigo_estado(sender, instance, created, **kwargs):
+    """Invalida la cache de códigos y sincroniza EquipoONU.disponible si cambió el código"""
+    EstadoEquipo.objects.limpiar_cache()
+
+    anterior = getattr(instance, '_codigo_original', None)
+    if not created and anterior != instance.codigo and EstadoEquipo.DISPONIBLE in (anterior, instance.codigo):
+        EquipoONU.objects.filter(estado=instance).update(
+            disponible=instance.codigo == EstadoEquipo.DISPONIBLE
+        )
+    instance._codigo_original = instance.codigo
+
+
+@receiver(post_delete, sender=EstadoEquipo)
+def limpiar_cache_estado(sender, instance, **kwargs):
+    EstadoEquipo.objects.limpiar_cache()
+
+
+# ---------------------------------------------------------------------------
+# Catálogos cacheados (prod_a/catalogos.py)
+# ---------------------------------------------------------------------------
+# Sin cantidades de equipos (cambian con cada alta o cambio de estado de un equipo):
+# se consultan en marcas/estadisticas, tipos-equipo/estadisticas y estados-equipo/distribucion
+catalogos.registrar('almacenes.marcas', 'almacenes.Marca', 'almacenes.Modelo')
+catalogos.registrar('almacenes.tipos_equipo', 'almacenes.TipoEquipo', 'almacenes.Modelo')
+catalogos.registrar('almacenes.estados_equipo', 'almacenes.EstadoEquipo')
+catalogos.registrar('almacenes.componentes', 'almacenes.Componente', 'almacenes.ModeloComponente')
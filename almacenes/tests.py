@@ -1,3 +1,481 @@
+from datetime import date
+
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from contratos.models import Cliente, Contrato, PlanComercial, Servicio, TipoServicio
+from prod_a import catalogos
+from . import reservas
+from .importacion import ImportadorEquiposLote
+from .models import (
+    EquipoONU, EquipoServicio, EstadoEquipo, InventarioContador, InventarioDiario, Lote, LoteDetalle,
+    Marca, Modelo, SolicitudEquipoONU, TipoEquipo
+)
+
+
+class EquipoONUListadoQueriesTest(TestCase):
+    """Los listados de equipos tienen un número fijo de consultas, sin importar la cantidad de filas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        tipo_servicio = TipoServicio.objects.create(nombre='FIBRA')
+        marca = Marca.objects.create(nombre='Huawei')
+        tipo_equipo = TipoEquipo.objects.create(nombre='ONU')
+        cls.modelo = Modelo.objects.create(
+            marca=marca, tipo_equipo=tipo_equipo, nombre='HG8245', codigo_modelo=1
+        )
+        disponible = EstadoEquipo.objects.create(nombre='Disponible', codigo=EstadoEquipo.DISPONIBLE)
+        lote = Lote.objects.create(numero_lote='L-001', proveedor='Proveedor', tipo_servicio=tipo_servicio)
+        LoteDetalle.objects.create(lote=lote, modelo=cls.modelo, cantidad=10)
+
+        cls.equipos = [
+            EquipoONU.objects.create(
+                codigo_interno=f'EQ-{i:06d}', modelo=cls.modelo, tipo_equipo=tipo_equipo, lote=lote,
+                mac_address=f'AA:BB:CC:DD:EE:{i:02X}', gpon_serial=f'GPON{i}',
+                serial_manufacturer=f'SN{i}', estado=disponible
+            )
+            for i in range(6)
+        ]
+
+        cliente = Cliente.objects.create(ci='1234567', nombres='Juan', apellidos='Perez')
+        contrato = Contrato.objects.create(cliente=cliente, direccion_instalacion='Calle 1')
+        plan = PlanComercial.objects.create(tipo_servicio=tipo_servicio, nombre='Plan 50', codigo_plan='P50')
+        servicio = Servicio.objects.create(contrato=contrato, plan_comercial=plan)
+        EquipoServicio.objects.create(equipo_onu=cls.equipos[0], contrato=contrato, servicio=servicio)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_listado_equipos(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/almacenes/equipos/')
+        self.assertEqual(response.status_code, 200)
+        asignados = [e['esta_asignado'] for e in response.json()['results'] if e['id'] == self.equipos[0].id]
+        self.assertEqual(asignados, [True])
+
+    def test_listado_equipos_por_cursor(self):
+        response = self.client.get('/api/almacenes/equipos/', {'limite': 4})
+        pagina = response.json()
+        self.assertNotIn('count', pagina)
+        self.assertEqual(len(pagina['results']), 4)
+
+        response = self.client.get(pagina['next'])
+        vistos = [e['id'] for e in pagina['results'] + response.json()['results']]
+        self.assertEqual(vistos, sorted((e.id for e in self.equipos), reverse=True))
+        self.assertIsNone(response.json()['next'])
+
+    def test_codigo_interno_desde_secuencia(self):
+        response = self.client.post('/api/almacenes/equipos/', {
+            'modelo': self.modelo.id, 'tipo_equipo': self.equipos[0].tipo_equipo_id,
+            'lote': self.equipos[0].lote_id, 'mac_address': 'aa-bb-cc-dd-ee-ff',
+            'gpon_serial': 'GPON-NUEVO', 'serial_manufacturer': 'SN-NUEVO'
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['codigo_interno'], 'EQ-000006')
+
+    def test_buscar_por_identificador(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/almacenes/equipos/buscar/', {'identificador': 'aabbccddee02'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['equipo']['id'], self.equipos[2].id)
+        self.assertEqual(response.json()['coincide_por'], 'MAC')
+
+        response = self.client.get('/api/almacenes/equipos/buscar/', {'identificador': 'no-existe'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_buscar_lote(self):
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/almacenes/equipos/buscar_lote/', {
+                'identificadores': ['gpon1', 'eq-000003', 'SN4', 'desconocido']
+            }, format='json')
+        data = response.json()
+        self.assertEqual(
+            sorted(e['equipo']['id'] for e in data['encontrados']),
+            [self.equipos[1].id, self.equipos[3].id, self.equipos[4].id]
+        )
+        self.assertEqual(data['no_encontrados'], ['desconocido'])
+
+    def test_cambiar_estado_registra_evento(self):
+        equipo = self.equipos[1]
+        asignado = EstadoEquipo.objects.create(nombre='Asignado', codigo=EstadoEquipo.ASIGNADO)
+        response = self.client.post(
+            f'/api/almacenes/equipos/{equipo.id}/cambiar_estado/',
+            {'estado_id': asignado.id, 'observaciones': 'Instalación'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        equipo.refresh_from_db()
+        self.assertEqual(equipo.observaciones, '')
+
+        response = self.client.get(f'/api/almacenes/equipos/{equipo.id}/eventos/')
+        eventos = response.json()['results']
+        self.assertEqual(len(eventos), 1)
+        self.assertEqual(
+            (eventos[0]['estado_anterior'], eventos[0]['estado_nuevo'], eventos[0]['nota']),
+            ('Disponible', 'Asignado', 'Instalación')
+        )
+
+    def test_tendencia_desde_snapshots(self):
+        InventarioDiario.objects.tomar_snapshot(date(2025, 1, 1))
+        self.equipos[5].delete()
+        InventarioDiario.objects.tomar_snapshot(date(2025, 1, 2))
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/almacenes/equipos/tendencia/', {
+                'desde': '2025-01-01', 'hasta': '2025-01-31', 'agrupar': 'total'
+            })
+        self.assertEqual(
+            [(fila['fecha'], fila['cantidad']) for fila in response.json()['serie']],
+            [('2025-01-01', 6), ('2025-01-02', 5)]
+        )
+
+    def test_equipos_disponibles(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/almacenes/equipos/disponibles/')
+        self.assertEqual(len(response.json()), len(self.equipos))
+
+    def test_equipos_de_modelo(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/almacenes/modelos/{self.modelo.id}/equipos/')
+        self.assertEqual(len(response.json()), len(self.equipos))
+
+    def test_disponibles_de_modelo(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/almacenes/modelos/{self.modelo.id}/disponibles/')
+        self.assertEqual(len(response.json()), len(self.equipos))
+
+
+    def test_estadisticas_cacheadas(self):
+        self.client.get('/api/almacenes/equipos/estadisticas/')
+        # Worker sin el resultado en su cache local: generación (cache compartido) + el tablero
+        caches['local'].clear()
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/almacenes/equipos/estadisticas/')
+        self.assertEqual(response.json()['total_equipos'], len(self.equipos))
+        self.assertEqual(response.json()['top_modelos'][0]['cantidad'], len(self.equipos))
+
+        # Cacheado: solo la lectura de la generación
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/almacenes/equipos/estadisticas/')
+        self.assertIn('edad_segundos', response.json()['cache'])
+        self.assertIn('Age', response)
+
+        # Al confirmar una escritura en equipos el tablero se recalcula
+        with self.captureOnCommitCallbacks(execute=True):
+            self.equipos[1].delete()
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/almacenes/equipos/estadisticas/')
+        self.assertEqual(response.json()['total_equipos'], len(self.equipos) - 1)
+
+
+class LoteProgresoQueriesTest(TestCase):
+    """El avance de los lotes se calcula con las consultas de lotes y detalles, sin consultas por fila"""
+
+    @classmethod
+    def setUpTestData(cls):
+        tipo_servicio = TipoServicio.objects.create(nombre='FIBRA')
+        marca = Marca.objects.create(nombre='Huawei')
+        tipo_equipo = TipoEquipo.objects.create(nombre='ONU')
+        modelos = [
+            Modelo.objects.create(marca=marca, tipo_equipo=tipo_equipo, nombre=f'M{i}', codigo_modelo=i)
+            for i in range(1, 3)
+        ]
+        cls.lotes = []
+        for n in range(3):
+            lote = Lote.objects.create(numero_lote=f'L-{n}', proveedor='Proveedor', tipo_servicio=tipo_servicio)
+            for modelo in modelos:
+                LoteDetalle.objects.create(lote=lote, modelo=modelo, cantidad=4)
+            for i in range(n + 1):
+                EquipoONU.objects.create(
+                    codigo_interno=f'EQ-{n}{i}', modelo=modelos[0], tipo_equipo=tipo_equipo, lote=lote,
+                    mac_address=f'AA:BB:CC:DD:{n:02X}:{i:02X}', gpon_serial=f'GPON{n}{i}',
+                    serial_manufacturer=f'SN{n}{i}'
+                )
+            cls.lotes.append(lote)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_listado_lotes(self):
+        # Conteo de la página + lotes + detalles
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/almacenes/lotes/')
+        self.assertEqual(response.json()['count'], len(self.lotes))
+        por_numero = {lote['numero_lote']: lote for lote in response.json()['results']}
+        self.assertEqual(por_numero['L-2']['cantidad_total'], 8)
+        self.assertEqual(por_numero['L-2']['equipos_registrados'], 3)
+        self.assertEqual(por_numero['L-2']['equipos_pendientes'], 5)
+
+    def test_editar_detalles_aplica_diferencias(self):
+        lote = self.lotes[0]
+        detalle_conservado = lote.detalles.get(modelo__codigo_modelo=1)
+        modelo_nuevo = Modelo.objects.create(
+            marca=detalle_conservado.modelo.marca, tipo_equipo=detalle_conservado.modelo.tipo_equipo,
+            nombre='M3', codigo_modelo=3
+        )
+
+        response = self.client.patch(f'/api/almacenes/lotes/{lote.id}/', {
+            'detalles': [
+                {'modelo': detalle_conservado.modelo_id, 'cantidad': 9},
+                {'modelo': modelo_nuevo.id, 'cantidad': 2},
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+        detalles = {d.modelo.codigo_modelo: d for d in lote.detalles.select_related('modelo')}
+        self.assertEqual(sorted(detalles), [1, 3])
+        self.assertEqual(detalles[1].pk, detalle_conservado.pk)
+        self.assertEqual(detalles[1].cantidad, 9)
+
+    def test_resumen_lote(self):
+        lote = self.lotes[1]
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/almacenes/lotes/{lote.id}/resumen/')
+        data = response.json()
+        self.assertEqual(data['equipos_registrados'], 2)
+        self.assertEqual(data['porcentaje_registro'], 25.0)
+        self.assertEqual(
+            sorted((d['codigo_modelo'], d['equipos_registrados'], d['pendientes']) for d in data['detalles_por_modelo']),
+            [(1, 2, 2), (2, 0, 4)]
+        )
+
+
+class ReservaEquiposTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        tipo_servicio = TipoServicio.objects.create(nombre='FIBRA')
+        marca = Marca.objects.create(nombre='Huawei')
+        tipo_equipo = TipoEquipo.objects.create(nombre='ONU')
+        cls.modelo = Modelo.objects.create(marca=marca, tipo_equipo=tipo_equipo, nombre='HG8245', codigo_modelo=1)
+        cls.disponible = EstadoEquipo.objects.create(nombre='Disponible', codigo=EstadoEquipo.DISPONIBLE)
+        cls.reservado = EstadoEquipo.objects.create(nombre='Reservado', codigo=EstadoEquipo.RESERVADO)
+        lote = Lote.objects.create(numero_lote='L-001', proveedor='Proveedor', tipo_servicio=tipo_servicio)
+        for i in range(3):
+            EquipoONU.objects.create(
+                codigo_interno=f'EQ-{i:06d}', modelo=cls.modelo, tipo_equipo=tipo_equipo, lote=lote,
+                mac_address=f'AA:BB:CC:DD:EE:{i:02X}', gpon_serial=f'GPON{i}',
+                serial_manufacturer=f'SN{i}', estado=cls.disponible
+            )
+
+    def setUp(self):
+        EstadoEquipo.objects.limpiar_cache()
+
+    def test_reservar_y_liberar(self):
+        creadas = reservas.reservar([{'modelo_id': self.modelo.id, 'cantidad': 2}])
+
+        self.assertEqual(len(creadas), 2)
+        self.assertEqual(EquipoONU.objects.filter(disponible=True).count(), 1)
+        self.assertEqual(EquipoONU.objects.filter(estado=self.reservado).count(), 2)
+        self.assertEqual(InventarioContador.objects.total(estado=self.reservado), 2)
+        self.assertEqual(InventarioContador.objects.total(estado=self.disponible), 1)
+
+        self.assertEqual(reservas.liberar([r.id for r in creadas]), 2)
+        self.assertEqual(EquipoONU.objects.filter(disponible=True).count(), 3)
+        self.assertEqual(InventarioContador.objects.total(estado=self.disponible), 3)
+        self.assertFalse(SolicitudEquipoONU.objects.filter(estado_asignacion='RESERVADO').exists())
+
+    def test_lote_sin_stock_no_reserva_nada(self):
+        with self.assertRaises(reservas.StockInsuficiente):
+            reservas.reservar([
+                {'modelo_id': self.modelo.id, 'cantidad': 2},
+                {'modelo_id': self.modelo.id, 'cantidad': 2},
+            ])
+
+        self.assertEqual(EquipoONU.objects.filter(disponible=True).count(), 3)
+        self.assertFalse(SolicitudEquipoONU.objects.exists())
+
+    def test_endpoint_reservar(self):
+        response = APIClient().post(
+            '/api/almacenes/solicitud-equipo-onu/reservar/',
+            {'pedidos': [{'modelo_id': self.modelo.id, 'cantidad': 4}]}, format='json'
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['disponibles'], 3)
+
+
+class ImportarEquiposLoteTest(TestCase):
+    """Importación masiva de equipos de un lote: unicidad, cantidades del lote y reporte de errores"""
+
+    @classmethod
+    def setUpTestData(cls):
+        tipo_servicio = TipoServicio.objects.create(nombre='FIBRA')
+        marca = Marca.objects.create(nombre='Huawei')
+        tipo_equipo = TipoEquipo.objects.create(nombre='ONU')
+        cls.modelo = Modelo.objects.create(marca=marca, tipo_equipo=tipo_equipo, nombre='HG8245', codigo_modelo=7)
+        cls.disponible = EstadoEquipo.objects.create(nombre='Disponible', codigo=EstadoEquipo.DISPONIBLE)
+        cls.lote = Lote.objects.create(numero_lote='L-001', proveedor='Proveedor', tipo_servicio=tipo_servicio)
+        LoteDetalle.objects.create(lote=cls.lote, modelo=cls.modelo, cantidad=3)
+        EquipoONU.objects.create(
+            codigo_interno='EQ-000100', modelo=cls.modelo, tipo_equipo=tipo_equipo, lote=cls.lote,
+            mac_address='AA:BB:CC:DD:EE:00', gpon_serial='GPON0', serial_manufacturer='SN0', estado=cls.disponible
+        )
+
+    def setUp(self):
+        EstadoEquipo.objects.limpiar_cache()
+        self.url = f'/api/almacenes/lotes/{self.lote.id}/importar_equipos/'
+
+    def importar(self, contenido, codificacion='utf-8', **datos):
+        archivo = SimpleUploadedFile('equipos.csv', contenido.encode(codificacion), content_type='text/csv')
+        return APIClient().post(self.url, {'archivo': archivo, **datos}, format='multipart')
+
+    def test_reporte_de_errores(self):
+        response = self.importar(
+            'mac_address;gpon_serial;serial_manufacturer;codigo_modelo;observaciones\n'
+            'aa-bb-cc-dd-ee-00;GPON-A;SN-A;7;\n'      # MAC ya registrada
+            'aa-bb-cc-dd-ee-01;GPON-B;SN-B;7.0;\n'    # válida (celda numérica de Excel)
+            'aa-bb-cc-dd-ee-02;gpon-b;SN-C;7;\n'      # serial GPON repetido en el archivo
+            'aa-bb-cc-dd-ee-03;GPON-D;SN-D;inf;\n'    # código de modelo inválido
+            'aa-bb-cc-dd-ee-04;GPON-E;SN-E;7;\n'      # válida: completa las 3 del lote
+            'aa-bb-cc-dd-ee-05;GPON-F;SN-F;7;\n'      # excede la cantidad del lote
+            'no-es-mac;GPON-G;SN-G;7;\n'
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        reporte = response.json()
+        self.assertEqual((reporte['filas_leidas'], reporte['equipos_creados']), (7, 2))
+        self.assertEqual(
+            [(e['fila'], e['campo']) for e in reporte['errores']],
+            [(2, 'mac_address'), (4, 'gpon_serial'), (5, 'codigo_modelo'), (7, 'codigo_modelo'), (8, 'mac_address')]
+        )
+        self.assertEqual(reporte['por_modelo'][0]['pendientes'], 0)
+        self.assertEqual(EquipoONU.objects.filter(lote=self.lote).count(), 3)
+        self.assertEqual(InventarioContador.objects.total(modelo=self.modelo), 3)
+
+    def test_csv_windows_1252(self):
+        response = self.importar(
+            'mac_address,gpon_serial,serial_manufacturer,observaciones\n'
+            'aa-bb-cc-dd-ee-01,GPON-B,SN-B,Caja dañada\n',
+            codificacion='cp1252'
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(EquipoONU.objects.get(gpon_serial='GPON-B').observaciones, 'Caja dañada')
+
+    def test_dry_run_y_archivo_invalido(self):
+        response = self.importar(
+            'mac_address,gpon_serial,serial_manufacturer\naa-bb-cc-dd-ee-01,G1,S1\n', dry_run='true'
+        )
+        self.assertEqual((response.status_code, response.json()['equipos_creados']), (200, 1))
+        self.assertEqual(EquipoONU.objects.filter(lote=self.lote).count(), 1)
+
+        response = self.importar('mac_address,gpon_serial\naa-bb-cc-dd-ee-01,G1\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('serial_manufacturer', response.json()['error'])
+
+    def test_cantidad_con_importacion_concurrente(self):
+        importador = ImportadorEquiposLote(self.lote, estado=self.disponible)
+        # Otra importación completa el lote después de que este importador leyó los conteos
+        for i in (1, 2):
+            EquipoONU.objects.create(
+                codigo_interno=f'EQ-00010{i}', modelo=self.modelo, tipo_equipo=self.modelo.tipo_equipo,
+                lote=self.lote, mac_address=f'AA:BB:CC:DD:EE:1{i}', gpon_serial=f'GPON1{i}',
+                serial_manufacturer=f'SN1{i}', estado=self.disponible
+            )
+        with self.assertNumQueries(5):
+            # Duplicados, SAVEPOINT, detalles bloqueados, recuento y RELEASE: sin insertar
+            reporte = importador.procesar([
+                {'mac_address': 'aa-bb-cc-dd-ee-20', 'gpon_serial': 'G20', 'serial_manufacturer': 'S20'}
+            ])
+        self.assertEqual(reporte['equipos_creados'], 0)
+        self.assertEqual([e['campo'] for e in reporte['errores']], ['codigo_modelo'])
+        self.assertEqual(EquipoONU.objects.filter(lote=self.lote).count(), 3)
+
+
+class InventarioContadorTest(TestCase):
+    """Los contadores modelo × estado × lote siguen a EquipoONU por señales y por los caminos masivos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tipo_servicio = TipoServicio.objects.create(nombre='FIBRA')
+        marca = Marca.objects.create(nombre='Huawei')
+        cls.tipo_equipo = TipoEquipo.objects.create(nombre='ONU')
+        cls.modelo = Modelo.objects.create(marca=marca, tipo_equipo=cls.tipo_equipo, nombre='HG8245', codigo_modelo=1)
+        cls.disponible = EstadoEquipo.objects.create(nombre='Disponible', codigo=EstadoEquipo.DISPONIBLE)
+        cls.asignado = EstadoEquipo.objects.create(nombre='Asignado', codigo=EstadoEquipo.ASIGNADO)
+        cls.lote = Lote.objects.create(numero_lote='L-001', proveedor='Proveedor', tipo_servicio=cls.tipo_servicio)
+
+    def setUp(self):
+        cache.clear()
+        EstadoEquipo.objects.limpiar_cache()
+
+    def equipo(self, i, estado=None):
+        return EquipoONU(
+            codigo_interno=f'EQ-{i:06d}', modelo=self.modelo, tipo_equipo=self.tipo_equipo, lote=self.lote,
+            mac_address=f'AA:BB:CC:DD:EE:{i:02X}', gpon_serial=f'GPON{i}', serial_manufacturer=f'SN{i}',
+            estado=estado
+        )
+
+    def contadores(self):
+        return {
+            (c.estado_id, c.cantidad) for c in InventarioContador.objects.filter(cantidad__gt=0)
+        }
+
+    def test_guardar_cambiar_estado_y_eliminar(self):
+        equipos = [self.equipo(i, self.disponible) for i in range(3)]
+        for equipo in equipos:
+            equipo.save()
+        self.assertEqual(self.contadores(), {(self.disponible.id, 3)})
+
+        equipos[0].estado = self.asignado
+        equipos[0].save()
+        # Cargado con campos diferidos: la clave original se lee de la BD
+        diferido = EquipoONU.objects.only('id').get(pk=equipos[1].pk)
+        diferido.estado = self.asignado
+        diferido.save()
+        self.assertEqual(self.contadores(), {(self.disponible.id, 1), (self.asignado.id, 2)})
+
+        equipos[2].delete()
+        self.assertEqual(self.contadores(), {(self.asignado.id, 2)})
+
+    def test_equipos_sin_estado(self):
+        for i in range(2):
+            self.equipo(i).save()
+        self.assertEqual(InventarioContador.objects.filter(estado__isnull=True).count(), 1)
+        self.assertEqual(self.contadores(), {(None, 2)})
+
+    def test_camino_masivo(self):
+        equipos = EquipoONU.objects.bulk_create([self.equipo(i, self.disponible) for i in range(4)])
+        InventarioContador.objects.registrar(equipos)
+        self.assertEqual(self.contadores(), {(self.disponible.id, 4)})
+
+        # queryset.update tampoco emite señales: salida y entrada con registrar
+        movidos = equipos[:3]
+        InventarioContador.objects.registrar(movidos, signo=-1)
+        EquipoONU.objects.filter(pk__in=[e.pk for e in movidos]).update(estado=self.asignado)
+        for equipo in movidos:
+            equipo.estado = self.asignado
+        InventarioContador.objects.registrar(movidos)
+        self.assertEqual(self.contadores(), {(self.disponible.id, 1), (self.asignado.id, 3)})
+
+        # recalcular repara un desvío
+        InventarioContador.objects.update(cantidad=99)
+        InventarioContador.objects.recalcular()
+        self.assertEqual(self.contadores(), {(self.disponible.id, 1), (self.asignado.id, 3)})
+
+    def test_guardar_sin_cambiar_dimensiones_no_invalida(self):
+        equipo = self.equipo(0, self.disponible)
+        with self.captureOnCommitCallbacks(execute=True):
+            equipo.save()
+        version = catalogos.version('almacenes.marcas')
+        generacion = cache.get('estadisticas:equipos:generacion')
+
+        equipo.observaciones = 'Revisado'
+        with self.captureOnCommitCallbacks(execute=True):
+            equipo.save()
+        self.assertEqual(catalogos.version('almacenes.marcas'), version)
+        self.assertEqual(cache.get('estadisticas:equipos:generacion'), generacion)
+
+        # Un cambio de estado o un alta cambia el tablero, no los catálogos (no llevan cantidades)
+        nombres = ('almacenes.marcas', 'almacenes.tipos_equipo', 'almacenes.estados_equipo')
+        versiones = catalogos.versiones(*nombres)
+        equipo.estado = self.asignado
+        with self.captureOnCommitCallbacks(execute=True):
+            equipo.save()
+            self.equipo(1, self.disponible).save()
+        self.assertEqual(catalogos.versiones(*nombres), versiones)
+        self.assertNotEqual(cache.get('estadisticas:equipos:generacion'), generacion)
 
-# Create your tests here.
+        # Las cantidades por tipo se leen en vivo de los contadores
+        response = APIClient().get('/api/almacenes/tipos-equipo/estadisticas/')
+        self.assertEqual(
+            response.json(), [{'id': self.tipo_equipo.id, 'nombre': 'ONU', 'total_modelos': 1, 'total_equipos': 2}]
+        )
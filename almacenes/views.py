@@ -1,29 +1,61 @@
 # ======================================================
 # apps/almacenes/views.py
 # ======================================================
-from datetime import timezone
+from datetime import date, timedelta
 
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from contratos.estadisticas import respuesta as respuesta_estadistica
+from contratos.eventos import HistorialEstadosMixin, actor_de
+from contratos.models import EventoEstado
+from prod_a.archivos import ArchivoInvalido, leer_filas
+from prod_a.catalogos import CatalogoCacheadoMixin
+from prod_a.paginacion import PaginacionCursor
 from .models import (
     Marca, TipoEquipo, Componente, EstadoEquipo, Modelo,
-    Lote, LoteDetalle, EquipoONU, EquipoServicio, ModeloComponente, SolicitudEquipoONU
+    Lote, LoteDetalle, EquipoONU, EquipoServicio, ModeloComponente, SolicitudEquipoONU,
+    InventarioContador, InventarioDiario
 )
 from .serializers import (
     MarcaSerializer, TipoEquipoSerializer, ComponenteSerializer,
     EstadoEquipoSerializer, ModeloSerializer, LoteSerializer,
     LoteCreateSerializer, LoteDetalleSerializer, EquipoONUSerializer,
     EquipoONUListSerializer, EquipoServicioSerializer, ModeloComponenteSerializer,
-    SolicitudEquipoONUSerializer
+    SolicitudEquipoONUSerializer, ReservaEquiposSerializer
 )
+from .importacion import COLUMNAS_OBLIGATORIAS, ImportadorEquiposLote
+from .identificadores import candidatos
+from . import reservas
+
+MAX_IDENTIFICADORES_LOTE = 1000
+MAX_DIAS_TENDENCIA = 366
+AGRUPACIONES_TENDENCIA = {
+    'estado': ('estado_id', 'estado__nombre'),
+    'modelo': ('modelo_id', 'modelo__nombre'),
+    'tipo_servicio': ('tipo_servicio_id', 'tipo_servicio__nombre'),
+    'total': (),
+}
+
+
+def anotar_inventario_modelos(queryset):
+    """Anota totales de equipos por modelo desde InventarioContador (sin N+1 en ModeloSerializer)"""
+    return queryset.annotate(
+        equipos_total=InventarioContador.objects.subconsulta('modelo'),
+        equipos_disponibles_total=InventarioContador.objects.subconsulta(
+            'modelo', estado__codigo=EstadoEquipo.DISPONIBLE
+        )
+    )
 
 
-class MarcaViewSet(viewsets.ModelViewSet):
-    queryset = Marca.objects.all()
+class MarcaViewSet(CatalogoCacheadoMixin, viewsets.ModelViewSet):
+    queryset = Marca.objects.annotate(modelos_total=Count('modelo'))
     serializer_class = MarcaSerializer
+    catalogo = 'almacenes.marcas'
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'descripcion']
     ordering_fields = ['nombre', 'created_at']
@@ -33,7 +65,9 @@ class MarcaViewSet(viewsets.ModelViewSet):
     def modelos(self, request, pk=None):
         """Obtiene todos los modelos de una marca"""
         marca = self.get_object()
-        modelos = marca.modelo_set.all()
+        modelos = anotar_inventario_modelos(
+            marca.modelo_set.select_related('marca', 'tipo_equipo')
+        )
         serializer = ModeloSerializer(modelos, many=True)
         return Response(serializer.data)
 
@@ -42,7 +76,7 @@ class MarcaViewSet(viewsets.ModelViewSet):
         """Estadísticas de marcas"""
         marcas_stats = Marca.objects.annotate(
             total_modelos=Count('modelo'),
-            total_equipos=Count('modelo__equipoonu')
+            total_equipos=InventarioContador.objects.subconsulta('modelo__marca')
         ).order_by('-total_equipos')
 
         data = []
@@ -57,9 +91,10 @@ class MarcaViewSet(viewsets.ModelViewSet):
         return Response(data)
 
 
-class TipoEquipoViewSet(viewsets.ModelViewSet):
-    queryset = TipoEquipo.objects.all()
+class TipoEquipoViewSet(CatalogoCacheadoMixin, viewsets.ModelViewSet):
+    queryset = TipoEquipo.objects.annotate(modelos_total=Count('modelo'))
     serializer_class = TipoEquipoSerializer
+    catalogo = 'almacenes.tipos_equipo'
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'descripcion']
     ordering = ['nombre']
@@ -68,22 +103,36 @@ class TipoEquipoViewSet(viewsets.ModelViewSet):
     def modelos(self, request, pk=None):
         """Modelos de este tipo de equipo"""
         tipo_equipo = self.get_object()
-        modelos = tipo_equipo.modelo_set.all()
+        modelos = anotar_inventario_modelos(
+            tipo_equipo.modelo_set.select_related('marca', 'tipo_equipo')
+        )
         serializer = ModeloSerializer(modelos, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def estadisticas(self, request):
+        """Modelos y equipos por tipo de equipo (en vivo, desde InventarioContador)"""
+        tipos = TipoEquipo.objects.annotate(
+            total_modelos=Count('modelo'),
+            total_equipos=InventarioContador.objects.subconsulta('modelo__tipo_equipo')
+        ).order_by('-total_equipos').values('id', 'nombre', 'total_modelos', 'total_equipos')
+
+        return Response(list(tipos))
 
-class ComponenteViewSet(viewsets.ModelViewSet):
-    queryset = Componente.objects.all()
+
+class ComponenteViewSet(CatalogoCacheadoMixin, viewsets.ModelViewSet):
+    queryset = Componente.objects.annotate(modelos_total=Count('modelocomponente'))
     serializer_class = ComponenteSerializer
+    catalogo = 'almacenes.componentes'
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'descripcion']
     ordering = ['nombre']
 
 
-class EstadoEquipoViewSet(viewsets.ModelViewSet):
+class EstadoEquipoViewSet(CatalogoCacheadoMixin, viewsets.ModelViewSet):
     queryset = EstadoEquipo.objects.all()
     serializer_class = EstadoEquipoSerializer
+    catalogo = 'almacenes.estados_equipo'
     filter_backends = [filters.OrderingFilter]
     ordering = ['nombre']
 
@@ -91,14 +140,14 @@ class EstadoEquipoViewSet(viewsets.ModelViewSet):
     def distribucion(self, request):
         """Distribución de equipos por estado"""
         distribucion = EstadoEquipo.objects.annotate(
-            cantidad_equipos=Count('equipoonu')
+            cantidad_equipos=InventarioContador.objects.subconsulta('estado')
         ).values('id', 'nombre', 'cantidad_equipos')
 
         return Response(list(distribucion))
 
 
 class ModeloViewSet(viewsets.ModelViewSet):
-    queryset = Modelo.objects.select_related('marca', 'tipo_equipo')
+    queryset = anotar_inventario_modelos(Modelo.objects.select_related('marca', 'tipo_equipo'))
     serializer_class = ModeloSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'marca__nombre', 'codigo_modelo']
@@ -110,7 +159,7 @@ class ModeloViewSet(viewsets.ModelViewSet):
     def equipos(self, request, pk=None):
         """Equipos de este modelo"""
         modelo = self.get_object()
-        equipos = modelo.equipoonu_set.all()
+        equipos = EquipoONU.objects.para_listado().filter(modelo=modelo)
 
         # Filtros opcionales
         estado = request.query_params.get('estado')
@@ -124,9 +173,8 @@ class ModeloViewSet(viewsets.ModelViewSet):
     def disponibles(self, request, pk=None):
         """Equipos disponibles de este modelo"""
         modelo = self.get_object()
-        equipos = modelo.equipoonu_set.filter(
-            estado__nombre__icontains='DISPONIBLE'
-        )
+        # Usa el índice parcial de disponibles (modelo, lote) WHERE disponible
+        equipos = EquipoONU.objects.para_listado().filter(modelo=modelo, disponible=True)
         serializer = EquipoONUListSerializer(equipos, many=True)
         return Response(serializer.data)
 
@@ -207,7 +255,7 @@ class ModeloViewSet(viewsets.ModelViewSet):
 
 
 class LoteViewSet(viewsets.ModelViewSet):
-    queryset = Lote.objects.select_related('tipo_servicio')
+    queryset = Lote.objects.con_progreso()
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['numero_lote', 'proveedor']
     ordering_fields = ['numero_lote', 'fecha_ingreso', 'proveedor']
@@ -236,58 +284,70 @@ class LoteViewSet(viewsets.ModelViewSet):
     def resumen(self, request, pk=None):
         """Resumen estadístico del lote"""
         lote = self.get_object()
-        equipos_registrados = lote.equipoonu_set.count()
-        cantidad_total = lote.cantidad_total
-
-        detalles_info = []
-        for detalle in lote.detalles.all():
-            equipos_del_modelo = detalle.modelo.equipoonu_set.filter(lote=lote).count()
-            detalles_info.append({
-                'modelo': f"{detalle.modelo.marca.nombre} {detalle.modelo.nombre}",
-                'codigo_modelo': detalle.modelo.codigo_modelo,
-                'cantidad_lote': detalle.cantidad,
-                'equipos_registrados': equipos_del_modelo,
-                'pendientes': max(0, detalle.cantidad - equipos_del_modelo)
-            })
 
         return Response({
             'numero_lote': lote.numero_lote,
             'proveedor': lote.proveedor,
             'tipo_servicio': lote.tipo_servicio.nombre,
             'fecha_ingreso': lote.fecha_ingreso,
-            'cantidad_total': cantidad_total,
-            'equipos_registrados': equipos_registrados,
-            'equipos_pendientes': max(0, cantidad_total - equipos_registrados),
-            'porcentaje_registro': round(
-                (equipos_registrados / cantidad_total * 100) if cantidad_total > 0 else 0, 2
-            ),
-            'detalles_por_modelo': detalles_info
+            **lote.progreso()
         })
 
+    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def importar_equipos(self, request, pk=None):
+        """
+        Registro masivo de equipos ONU del lote desde un archivo CSV/XLSX.
+        Campo 'archivo' (multipart); opcionales: 'estado_id', 'dry_run'.
+        Devuelve el reporte de filas creadas y errores por fila.
+        """
+        lote = self.get_object()
+        archivo = request.FILES.get('archivo')
+        if not archivo:
+            return Response(
+                {'error': 'Debe adjuntar un archivo en el campo "archivo"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        estado_id = request.data.get('estado_id')
+        if estado_id:
+            try:
+                estado = EstadoEquipo.objects.get(id=estado_id)
+            except (EstadoEquipo.DoesNotExist, ValueError):
+                return Response(
+                    {'error': 'Estado no encontrado'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            # Por defecto los equipos nuevos quedan disponibles
+            estado = EstadoEquipo.objects.por_codigo(EstadoEquipo.DISPONIBLE)
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'si')
+
+        importador = ImportadorEquiposLote(lote, estado=estado, dry_run=dry_run)
+        try:
+            reporte = importador.procesar(leer_filas(archivo, COLUMNAS_OBLIGATORIAS))
+        except ArchivoInvalido as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if reporte['equipos_creados'] and not dry_run:
+            return Response(reporte, status=status.HTTP_201_CREATED)
+        return Response(reporte)
+
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
-        """Estadísticas generales de lotes"""
-        total_lotes = self.queryset.count()
-        lotes_por_servicio = self.queryset.values(
-            'tipo_servicio__nombre'
-        ).annotate(
-            cantidad=Count('id')
-        ).order_by('-cantidad')
+        """Estadísticas generales de lotes (cacheadas, ver almacenes/estadisticas.py)"""
+        return respuesta_estadistica('lotes')
 
-        return Response({
-            'total_lotes': total_lotes,
-            'por_tipo_servicio': list(lotes_por_servicio)
-        })
 
-
-class EquipoONUViewSet(viewsets.ModelViewSet):
-    queryset = EquipoONU.objects.select_related(
-        'modelo__marca', 'tipo_equipo', 'estado', 'lote'
-    )
+class EquipoONUViewSet(HistorialEstadosMixin, viewsets.ModelViewSet):
+    queryset = EquipoONU.objects.para_listado()
+    entidad_eventos = EventoEstado.EQUIPO_ONU
+    pagination_class = PaginacionCursor
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['codigo_interno', 'mac_address', 'gpon_serial', 'serial_manufacturer']
     ordering_fields = ['codigo_interno', 'fecha_ingreso']
-    ordering = ['-fecha_ingreso']
+    # Mismo orden que -fecha_ingreso (auto_now_add) pero único: estable para el cursor
+    ordering = ['-id']
 
     # *** CORREGIR LOS FILTROS PARA INCLUIR MARCA ***
     filterset_fields = [
@@ -314,23 +374,78 @@ class EquipoONUViewSet(viewsets.ModelViewSet):
 
         return queryset
 
-    def perform_create(self, serializer):
-        # Generar código interno si no se proporciona
-        if not serializer.validated_data.get('codigo_interno'):
-            import uuid
-            while True:
-                codigo = f"EQ-{str(uuid.uuid4().int)[:6]}"
-                if not EquipoONU.objects.filter(codigo_interno=codigo).exists():
-                    serializer.validated_data['codigo_interno'] = codigo
-                    break
-        serializer.save()
+    def _resolver_identificadores(self, valores):
+        """Resuelve identificadores escaneados -> (encontrados, no_encontrados) con una consulta"""
+        formas = {valor: candidatos(valor) for valor in valores}
+        coincidencias = {}
+        for equipo in EquipoONU.objects.por_identificadores(set().union(*formas.values())):
+            coincidencias.setdefault(equipo.identificador, equipo)
+
+        encontrados, no_encontrados = [], []
+        for valor, opciones in formas.items():
+            equipo = next((coincidencias[o] for o in opciones if o in coincidencias), None)
+            if equipo is None:
+                no_encontrados.append(valor)
+                continue
+            encontrados.append({
+                'identificador': valor,
+                'coincide_por': equipo.tipo_identificador,
+                'equipo': EquipoONUListSerializer(equipo).data
+            })
+        return encontrados, no_encontrados
+
+    @action(detail=False, methods=['get'])
+    def buscar(self, request):
+        """
+        Resuelve un código escaneado (código interno, MAC, GPON serial o serial
+        del fabricante) con una búsqueda exacta: ?identificador=...
+        """
+        identificador = (request.query_params.get('identificador') or '').strip()
+        if not identificador:
+            return Response(
+                {'error': 'Debe indicar el parámetro identificador'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        encontrados, _ = self._resolver_identificadores([identificador])
+        if not encontrados:
+            return Response(
+                {'error': f'No existe un equipo con identificador {identificador}'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(encontrados[0])
+
+    @action(detail=False, methods=['post'])
+    def buscar_lote(self, request):
+        """
+        Resuelve varios códigos escaneados a la vez (ej. un pallet completo):
+        {"identificadores": ["48575443A1B2C3D4", "AA:BB:CC:DD:EE:FF", ...]}
+        """
+        identificadores = request.data.get('identificadores')
+        if not isinstance(identificadores, list) or not identificadores:
+            return Response(
+                {'error': 'Debe indicar identificadores (lista)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(identificadores) > MAX_IDENTIFICADORES_LOTE:
+            return Response(
+                {'error': f'Máximo {MAX_IDENTIFICADORES_LOTE} identificadores por consulta'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        valores = list(dict.fromkeys(str(v).strip() for v in identificadores if str(v).strip()))
+        encontrados, no_encontrados = self._resolver_identificadores(valores)
+        return Response({
+            'total': len(valores),
+            'encontrados': encontrados,
+            'no_encontrados': no_encontrados
+        })
 
     @action(detail=False, methods=['get'])
     def disponibles(self, request):
         """Equipos disponibles para asignación"""
-        equipos = self.queryset.filter(
-            estado__nombre__icontains='DISPONIBLE'
-        )
+        # Usa el índice parcial de disponibles (modelo, lote) WHERE disponible
+        equipos = self.queryset.filter(disponible=True)
 
         # Filtros opcionales
         modelo_id = request.query_params.get('modelo_id')
@@ -358,60 +473,85 @@ class EquipoONUViewSet(viewsets.ModelViewSet):
 
         try:
             estado = EstadoEquipo.objects.get(id=estado_id)
+            estado_anterior = equipo.estado
             equipo.estado = estado
 
-            if observaciones:
-                timestamp = timezone.now().strftime('%Y-%m-%d %H:%M')
-                nueva_obs = f"[{timestamp}] {observaciones}"
-                if equipo.observaciones:
-                    equipo.observaciones = f"{equipo.observaciones}\n{nueva_obs}"
-                else:
-                    equipo.observaciones = nueva_obs
-
-            equipo.save()
+            with transaction.atomic():
+                equipo.save(update_fields=['estado', 'updated_at'])
+                EventoEstado.objects.registrar(
+                    EventoEstado.EQUIPO_ONU, equipo.pk, estado.nombre,
+                    estado_anterior.nombre if estado_anterior else '',
+                    actor=actor_de(request), nota=observaciones
+                )
 
             serializer = self.get_serializer(equipo)
             return Response(serializer.data)
 
-        except EstadoEquipo.DoesNotExist:
+        except (EstadoEquipo.DoesNotExist, ValueError, TypeError):
             return Response(
                 {'error': 'Estado no encontrado'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
     @action(detail=False, methods=['get'])
-    def estadisticas(self, request):
-        """Estadísticas generales de equipos"""
-        total_equipos = self.queryset.count()
-
-        # Por estado
-        por_estado = self.queryset.values(
-            'estado__nombre'
-        ).annotate(
-            cantidad=Count('id')
-        ).order_by('-cantidad')
-
-        # Por modelo (top 10)
-        por_modelo = self.queryset.values(
-            'modelo__marca__nombre', 'modelo__nombre'
-        ).annotate(
-            cantidad=Count('id')
-        ).order_by('-cantidad')[:10]
-
-        # Por lote
-        por_lote = self.queryset.values(
-            'lote__numero_lote'
-        ).annotate(
-            cantidad=Count('id')
-        ).order_by('-cantidad')[:10]
+    def tendencia(self, request):
+        """
+        Serie diaria de stock desde los snapshots de InventarioDiario:
+        ?desde=YYYY-MM-DD&hasta=YYYY-MM-DD (default: últimos 30 días)
+        &agrupar=estado|modelo|tipo_servicio|total (default: estado)
+        &modelo=&estado=&tipo_servicio= (filtros opcionales por id)
+        """
+        agrupar = request.query_params.get('agrupar', 'estado')
+        if agrupar not in AGRUPACIONES_TENDENCIA:
+            return Response(
+                {'error': f'agrupar inválido. Opciones: {list(AGRUPACIONES_TENDENCIA)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            hasta = date.fromisoformat(request.query_params['hasta']) \
+                if request.query_params.get('hasta') else date.today()
+            desde = date.fromisoformat(request.query_params['desde']) \
+                if request.query_params.get('desde') else hasta - timedelta(days=30)
+        except ValueError:
+            return Response(
+                {'error': 'Las fechas deben tener formato YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if desde > hasta or (hasta - desde).days > MAX_DIAS_TENDENCIA:
+            return Response(
+                {'error': f'Rango inválido (máximo {MAX_DIAS_TENDENCIA} días)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        filas = InventarioDiario.objects.filter(fecha__range=(desde, hasta))
+        for filtro in ('modelo', 'estado', 'tipo_servicio'):
+            valor = request.query_params.get(filtro)
+            if valor:
+                if not valor.isdigit():
+                    return Response(
+                        {'error': f'{filtro} debe ser un id numérico'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                filas = filas.filter(**{f'{filtro}_id': valor})
+
+        campos = AGRUPACIONES_TENDENCIA[agrupar]
+        serie = filas.values('fecha', *campos).annotate(
+            cantidad=Sum('cantidad')
+        ).order_by('fecha', *campos)
 
         return Response({
-            'total_equipos': total_equipos,
-            'por_estado': list(por_estado),
-            'top_modelos': list(por_modelo),
-            'top_lotes': list(por_lote)
+            'desde': desde,
+            'hasta': hasta,
+            'agrupar': agrupar,
+            'serie': list(serie)
         })
 
+    @action(detail=False, methods=['get'])
+    def estadisticas(self, request):
+        """Estadísticas generales de equipos (cacheadas, desde InventarioContador)"""
+        return respuesta_estadistica('equipos')
+
     @action(detail=True, methods=['get'])
     def historial(self, request, pk=None):
         """Historial de asignaciones del equipo"""
@@ -421,6 +561,66 @@ class EquipoONUViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 class SolicitudEquipoONUViewSet(viewsets.ModelViewSet):
-    queryset = SolicitudEquipoONU.objects.all()
+    queryset = SolicitudEquipoONU.objects.select_related(
+        'contrato', 'equipo_onu__modelo__marca', 'equipo_onu__tipo_equipo',
+        'equipo_onu__estado', 'equipo_onu__lote'
+    )
     serializer_class = SolicitudEquipoONUSerializer
+    pagination_class = PaginacionCursor
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['contrato', 'estado_asignacion', 'equipo_onu']
+    ordering = ['-id']
+
+    @action(detail=False, methods=['post'])
+    def reservar(self, request):
+        """
+        Reserva equipos disponibles para uno o varios pedidos (todo o nada):
+        {"pedidos": [{"modelo_id": 1, "cantidad": 2}, {"tipo_servicio_id": 3}],
+         "contrato_id": 10, "observaciones": "..."}
+        """
+        entrada = ReservaEquiposSerializer(data=request.data)
+        entrada.is_valid(raise_exception=True)
+        datos = entrada.validated_data
+
+        contrato = None
+        if datos.get('contrato_id'):
+            from contratos.models import Contrato
+            contrato = Contrato.objects.filter(id=datos['contrato_id']).first()
+            if contrato is None:
+                return Response({'error': 'Contrato no encontrado'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            creadas = reservas.reservar(
+                datos['pedidos'], contrato=contrato, observaciones=datos.get('observaciones', '')
+            )
+        except reservas.StockInsuficiente as e:
+            return Response({
+                'error': str(e),
+                'pedido': e.pedido,
+                'disponibles': e.disponibles
+            }, status=status.HTTP_409_CONFLICT)
+        except reservas.ReservaError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(
+            self.get_queryset().filter(id__in=[r.id for r in creadas]), many=True
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def liberar(self, request):
+        """Cancela reservas vigentes y devuelve los equipos a disponibles: {"reserva_ids": [1, 2]}"""
+        reserva_ids = request.data.get('reserva_ids')
+        if not isinstance(reserva_ids, list) or not reserva_ids:
+            return Response(
+                {'error': 'Debe indicar reserva_ids (lista de ids)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            liberadas = reservas.liberar(reserva_ids)
+        except (reservas.ReservaError, ValueError, TypeError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'reservas_liberadas': liberadas})
         
\ No newline at end of file
@@ -0,0 +1,122 @@
+# ======================================================
+# apps/contratos/contadores.py
+# ======================================================
+"""
+Contadores denormalizados de los catálogos de contratos.
+
+- Cliente.total_contratos / total_contratos_activos   (Contrato)
+- TipoTramite.total_contratos, FormaPago.total_contratos (Contrato)
+- PlanComercial.total_servicios                        (Servicio)
+- TipoServicio.total_planes (PlanComercial), total_lotes (almacenes.Lote)
+
+Se ajustan con UPDATE ... SET campo = campo + delta desde las señales de
+contratos/signals.py, en la misma transacción que la escritura que los origina.
+Los caminos masivos (bulk_create, queryset.update) deben llamar a registrar().
+`python manage.py recalcular_contadores` los reconstruye si se desvían.
+"""
+from collections import Counter, defaultdict
+
+from django.apps import apps as django_apps
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from prod_a import catalogos
+
+# Campos de cada modelo que determinan qué contadores lo incluyen
+CAMPOS = {
+    'contratos.Contrato': ('cliente_id', 'tipo_tramite_id', 'forma_pago_id', 'estado_contrato'),
+    'contratos.Servicio': ('plan_comercial_id',),
+    'contratos.PlanComercial': ('tipo_servicio_id',),
+    'almacenes.Lote': ('tipo_servicio_id',),
+}
+
+
+def referencias(instancia):
+    """Contadores (modelo, campo, pk) en los que cuenta `instancia`"""
+    etiqueta = instancia._meta.label
+    if etiqueta == 'contratos.Contrato':
+        refs = [
+            ('contratos.Cliente', 'total_contratos', instancia.cliente_id),
+            ('contratos.TipoTramite', 'total_contratos', instancia.tipo_tramite_id),
+            ('contratos.FormaPago', 'total_contratos', instancia.forma_pago_id),
+        ]
+        if instancia.estado_contrato == 'ACTIVO':
+            refs.append(('contratos.Cliente', 'total_contratos_activos', instancia.cliente_id))
+    elif etiqueta == 'contratos.Servicio':
+        refs = [('contratos.PlanComercial', 'total_servicios', instancia.plan_comercial_id)]
+    elif etiqueta == 'contratos.PlanComercial':
+        refs = [('contratos.TipoServicio', 'total_planes', instancia.tipo_servicio_id)]
+    elif etiqueta == 'almacenes.Lote':
+        refs = [('contratos.TipoServicio', 'total_lotes', instancia.tipo_servicio_id)]
+    else:
+        refs = []
+    return frozenset(ref for ref in refs if ref[2] is not None)
+
+
+def aplicar(deltas):
+    """
+    Aplica {(modelo, campo, pk): delta}. Los pks con el mismo delta sobre el mismo
+    campo se actualizan en un solo UPDATE.
+    """
+    agrupados = defaultdict(list)
+    for (modelo, campo, pk), delta in deltas.items():
+        if delta:
+            agrupados[(modelo, campo, delta)].append(pk)
+    for (modelo, campo, delta), pks in agrupados.items():
+        django_apps.get_model(modelo).objects.filter(pk__in=pks).update(**{campo: F(campo) + delta})
+    # Los contadores se muestran en los catálogos cacheados
+    catalogos.modelo_modificado(*{django_apps.get_model(modelo) for modelo, _, _ in agrupados})
+
+
+def registrar(instancias, signo=1):
+    """Suma (o resta con signo=-1) un conjunto de instancias a sus contadores (ej. tras bulk_create)"""
+    deltas = Counter()
+    for instancia in instancias:
+        for ref in referencias(instancia):
+            deltas[ref] += signo
+    aplicar(deltas)
+
+
+def mover(anteriores, nuevas):
+    """Pasa una instancia de los contadores `anteriores` a los `nuevos` (solo los que cambiaron)"""
+    deltas = Counter()
+    for ref in anteriores - nuevas:
+        deltas[ref] -= 1
+    for ref in nuevas - anteriores:
+        deltas[ref] += 1
+    aplicar(deltas)
+
+
+def _conteo(modelo, campo, **filtros):
+    totales = modelo.objects.filter(**{campo: OuterRef('pk')}, **filtros).order_by().values(campo).annotate(
+        total=Count('id')
+    ).values('total')
+    return Coalesce(Subquery(totales), 0)
+
+
+def recalcular():
+    """
+    Reconstruye todos los contadores con un UPDATE por catálogo. La migración
+    contratos/0009 repite el cálculo sobre los modelos históricos.
+    """
+    Cliente = django_apps.get_model('contratos', 'Cliente')
+    TipoTramite = django_apps.get_model('contratos', 'TipoTramite')
+    FormaPago = django_apps.get_model('contratos', 'FormaPago')
+    TipoServicio = django_apps.get_model('contratos', 'TipoServicio')
+    PlanComercial = django_apps.get_model('contratos', 'PlanComercial')
+    Contrato = django_apps.get_model('contratos', 'Contrato')
+    Servicio = django_apps.get_model('contratos', 'Servicio')
+    Lote = django_apps.get_model('almacenes', 'Lote')
+
+    Cliente.objects.update(
+        total_contratos=_conteo(Contrato, 'cliente'),
+        total_contratos_activos=_conteo(Contrato, 'cliente', estado_contrato='ACTIVO'),
+    )
+    TipoTramite.objects.update(total_contratos=_conteo(Contrato, 'tipo_tramite'))
+    FormaPago.objects.update(total_contratos=_conteo(Contrato, 'forma_pago'))
+    PlanComercial.objects.update(total_servicios=_conteo(Servicio, 'plan_comercial'))
+    TipoServicio.objects.update(
+        total_planes=_conteo(PlanComercial, 'tipo_servicio'),
+        total_lotes=_conteo(Lote, 'tipo_servicio'),
+    )
+    catalogos.modelo_modificado(Cliente, TipoTramite, FormaPago, PlanComercial, TipoServicio)
@@ -0,0 +1,114 @@
+# ======================================================
+# apps/contratos/cortes.py
+# ======================================================
+"""
+Corte y reposición masiva de servicios por deuda.
+
+La deuda sale de las facturas migradas (soli.CobfactuLocal) en estado G / NP,
+cuyo campo `contrato` es el número de contrato (Contrato.numero_contrato).
+Un contrato es moroso si tiene al menos `minimo_facturas` facturas impagas
+emitidas hace `dias` días o más.
+
+- suspender: servicios ACTIVOS de contratos morosos pasan a SUSPENDIDO.
+- reactivar: servicios SUSPENDIDOS por este proceso (su último evento lleva
+  NOTA_CORTE) cuyo contrato ya no es moroso vuelven a ACTIVO.
+
+Los cambios se aplican por bloques de `chunk_size` servicios: cada bloque es
+una transacción con un UPDATE por conjunto de ids y un INSERT de los eventos
+(EventoEstado.registrar_varios). Con dry_run solo se cuentan contratos y servicios.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CharField, Count, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, LPad
+from django.utils import timezone
+
+from soli.models import CobfactuLocal
+from .models import Contrato, EventoEstado, Servicio
+
+ESTADOS_DEUDA = ('G', 'NP')
+DIGITOS_CONTRATO = 8
+DIAS_DEUDA = 60
+NOTA_CORTE = 'Corte por deuda'
+NOTA_REPOSICION = 'Reposición por pago de deuda'
+
+
+def numeros_morosos(dias=None, minimo_facturas=1):
+    """Subconsulta con los números de contrato (8 dígitos) con deuda vencida"""
+    dias = getattr(settings, 'CORTES_DIAS_DEUDA', DIAS_DEUDA) if dias is None else dias
+    limite = timezone.localdate() - timedelta(days=dias)
+    # Solo contratos de hasta 8 dígitos: LPAD trunca los más largos y coincidirían con otro número
+    return CobfactuLocal.objects.filter(
+        estado__in=ESTADOS_DEUDA, fecha_emision__lte=limite, contrato__gte=0, contrato__lt=10 ** DIGITOS_CONTRATO
+    ).order_by().values('contrato').annotate(
+        facturas=Count('id')
+    ).filter(facturas__gte=minimo_facturas).values(
+        numero=LPad(Cast('contrato', CharField()), DIGITOS_CONTRATO, Value('0'))
+    )
+
+
+def _a_suspender(morosos):
+    return Servicio.objects.filter(
+        estado_servicio='ACTIVO',
+        contrato_id__in=Contrato.objects.filter(numero_contrato__in=morosos).values('id')
+    )
+
+
+def _a_reactivar(morosos):
+    ultima_nota = EventoEstado.objects.filter(
+        entidad=EventoEstado.SERVICIO, entidad_id=OuterRef('pk')
+    ).order_by('-fecha', '-id').values('nota')[:1]
+    return Servicio.objects.filter(estado_servicio='SUSPENDIDO').exclude(
+        contrato_id__in=Contrato.objects.filter(numero_contrato__in=morosos).values('id')
+    ).annotate(ultima_nota=Subquery(ultima_nota)).filter(ultima_nota=NOTA_CORTE)
+
+
+def _aplicar(servicios, estado_nuevo, nota, chunk_size, actor, **campos):
+    """Cambia de estado los servicios del queryset por bloques; devuelve cuántos cambió"""
+    total = 0
+    while True:
+        with transaction.atomic():
+            # Bloquear el bloque: los servicios cambiados dejan de cumplir el filtro
+            bloque = list(
+                Servicio.objects.select_for_update().filter(pk__in=servicios.values('pk'))
+                .order_by('pk').values_list('pk', 'estado_servicio')[:chunk_size]
+            )
+            if not bloque:
+                return total
+            Servicio.objects.filter(pk__in=[pk for pk, _ in bloque]).update(
+                estado_servicio=estado_nuevo, updated_at=timezone.now(), **campos
+            )
+            EventoEstado.objects.registrar_varios([
+                {
+                    'entidad': EventoEstado.SERVICIO, 'entidad_id': pk, 'estado_anterior': anterior,
+                    'estado_nuevo': estado_nuevo, 'actor': actor, 'nota': nota,
+                }
+                for pk, anterior in bloque
+            ])
+        total += len(bloque)
+
+
+def _resumen(servicios):
+    return servicios.aggregate(servicios=Count('id'), contratos=Count('contrato', distinct=True))
+
+
+def suspender_morosos(dias=None, minimo_facturas=1, chunk_size=1000, dry_run=False, actor=None):
+    """Suspende los servicios activos de contratos morosos. Devuelve el resumen"""
+    servicios = _a_suspender(numeros_morosos(dias, minimo_facturas))
+    resumen = _resumen(servicios)
+    if not dry_run and resumen['servicios']:
+        resumen['servicios'] = _aplicar(servicios, 'SUSPENDIDO', NOTA_CORTE, chunk_size, actor)
+    return {'dry_run': dry_run, **resumen}
+
+
+def reactivar_pagados(dias=None, minimo_facturas=1, chunk_size=1000, dry_run=False, actor=None):
+    """Reactiva los servicios cortados por deuda cuyo contrato ya no es moroso. Devuelve el resumen"""
+    servicios = _a_reactivar(numeros_morosos(dias, minimo_facturas))
+    resumen = _resumen(servicios)
+    if not dry_run and resumen['servicios']:
+        resumen['servicios'] = _aplicar(
+            servicios, 'ACTIVO', NOTA_REPOSICION, chunk_size, actor, fecha_desactivacion=None
+        )
+    return {'dry_run': dry_run, **resumen}
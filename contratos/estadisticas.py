@@ -0,0 +1,173 @@
+# ======================================================
+# apps/contratos/estadisticas.py
+# ======================================================
+"""
+Tableros de estadísticas cacheados.
+
+Cada tablero es una función que arma todo el payload con una sola consulta por
+fuente (GROUP BY al grano más fino y totales calculados en Python, o GROUPING
+SETS en PostgreSQL cuando el grano fino crece con los datos). El resultado se guarda en
+el cache local del proceso por ESTADISTICAS_CACHE_TTL segundos (default 60) y se
+invalida al confirmar cualquier escritura (post_save / post_delete) en los modelos
+de los que depende. Los caminos masivos que no emiten señales (bulk_create, update)
+deben llamar a invalidar().
+
+Un tablero puede recibir parámetros (ej. un rango de fechas): cada combinación
+se cachea por separado y todas se invalidan juntas, porque la clave incluye una
+generación del tablero que invalidar() reemplaza. La generación vive en el cache
+compartido ('default'), así una escritura atendida por un worker invalida los
+resultados de todos.
+
+La respuesta incluye la antigüedad del resultado ('cache' en el payload y el
+header Age).
+"""
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.db.models import Count, Sum
+from django.utils import timezone
+from django.utils.http import urlencode
+from rest_framework.response import Response
+
+PREFIJO_CACHE = 'estadisticas'
+TTL_DEFAULT = 60
+
+_TABLEROS = {}
+
+
+def _clave_generacion(nombre):
+    return f'{PREFIJO_CACHE}:{nombre}:generacion'
+
+
+def _clave(nombre, parametros):
+    generacion = cache.get(_clave_generacion(nombre))
+    if generacion is None:
+        cache.add(_clave_generacion(nombre), uuid.uuid4().hex, None)
+        generacion = cache.get(_clave_generacion(nombre))
+    return f'{PREFIJO_CACHE}:{nombre}:{generacion}:{urlencode(sorted(parametros.items()))}'
+
+
+def tablero(nombre, *modelos):
+    """
+    Registra la función decorada como tablero `nombre`, invalidado al escribir en
+    `modelos` ('app_label.Modelo').
+    """
+    def registrar(calcular):
+        _TABLEROS[nombre] = calcular
+
+        def invalidar_tablero(sender, **kwargs):
+            invalidar(nombre)
+
+        for modelo in modelos:
+            for senal in (post_save, post_delete):
+                senal.connect(
+                    invalidar_tablero, sender=modelo, weak=False,
+                    dispatch_uid=f'{PREFIJO_CACHE}:{nombre}:{modelo}:{senal is post_save}'
+                )
+        return calcular
+    return registrar
+
+
+def invalidar(*nombres):
+    """Descarta los tableros indicados (con todos sus parámetros) cuando la transacción actual se confirma"""
+    claves = [_clave_generacion(nombre) for nombre in nombres]
+    transaction.on_commit(lambda: cache.set_many({clave: uuid.uuid4().hex for clave in claves}, None))
+
+
+def obtener(nombre, **parametros):
+    """Devuelve (datos, generado) del tablero, calculándolo si no está en cache"""
+    clave = _clave(nombre, parametros)
+    entrada = caches['local'].get(clave)
+    if entrada is None:
+        entrada = {'datos': _TABLEROS[nombre](**parametros), 'generado': timezone.now()}
+        caches['local'].set(clave, entrada, getattr(settings, 'ESTADISTICAS_CACHE_TTL', TTL_DEFAULT))
+    return entrada['datos'], entrada['generado']
+
+
+def respuesta(nombre, clave_lista=None, **parametros):
+    """
+    Response con el tablero y su antigüedad. Los tableros que son una lista se
+    entregan bajo `clave_lista` para poder agregar los datos de cache.
+    `parametros` se pasan a la función del tablero.
+    """
+    datos, generado = obtener(nombre, **parametros)
+    edad = max(0, int((timezone.now() - generado).total_seconds()))
+    payload = {clave_lista: datos} if clave_lista else dict(datos)
+    payload['cache'] = {'generado_en': generado, 'edad_segundos': edad}
+    return Response(payload, headers={'Age': str(edad)})
+
+
+def totalizar(filas, campos, medida='cantidad'):
+    """
+    Suma `medida` de filas agrupadas al grano fino agrupando solo por `campos`
+    (equivalente a un grouping set), ordenado de mayor a menor.
+    """
+    totales = defaultdict(int)
+    for fila in filas:
+        totales[tuple(fila[campo] for campo in campos)] += fila[medida] or 0
+    return sorted(
+        ({**dict(zip(campos, clave)), medida: total} for clave, total in totales.items()),
+        key=lambda fila: -fila[medida]
+    )
+
+
+# ---------------------------------------------------------------------------
+# Tableros de contratos
+# ---------------------------------------------------------------------------
+@tablero('tipos_servicio', 'contratos.TipoServicio', 'contratos.PlanComercial', 'contratos.Servicio')
+def tipos_servicio():
+    from .models import TipoServicio
+    return list(
+        TipoServicio.objects.annotate(
+            total_planes=Count('plancomercial', distinct=True),
+            total_servicios=Count('plancomercial__servicio')
+        ).order_by('-total_servicios').values('id', 'nombre', 'total_planes', 'total_servicios')
+    )
+
+
+@tablero('clientes', 'contratos.Cliente')
+def clientes():
+    from .models import Cliente
+    filas = list(Cliente.objects.order_by().values('estado', 'zona').annotate(cantidad=Count('id')))
+    return {
+        'total_clientes': sum(fila['cantidad'] for fila in filas),
+        'por_estado': totalizar(filas, ['estado']),
+        'top_zonas': totalizar(filas, ['zona'])[:10],
+    }
+
+
+@tablero('contratos', 'contratos.Contrato')
+def contratos():
+    """
+    Meses cerrados desde el resumen ContratoMensual; el mes en curso se cuenta en
+    vivo sobre Contrato (fecha_firma >= primer día del mes).
+    """
+    from .models import Contrato, ContratoMensual
+    mes_actual = timezone.localdate().replace(day=1)
+    # Primer día del mes de hace 11 meses: los últimos 12 meses calendario
+    mes, anio = mes_actual.month - 11, mes_actual.year
+    if mes <= 0:
+        mes, anio = mes + 12, anio - 1
+    desde = mes_actual.replace(year=anio, month=mes)
+
+    filas = list(
+        ContratoMensual.objects.filter(mes__lt=mes_actual, cantidad__gt=0).order_by()
+        .values('mes', 'estado_contrato').annotate(cantidad=Sum('cantidad'))
+    )
+    filas += [
+        {**fila, 'mes': mes_actual}
+        for fila in Contrato.objects.filter(fecha_firma__gte=mes_actual).order_by()
+        .values('estado_contrato').annotate(cantidad=Count('id'))
+    ]
+    return {
+        'total_contratos': sum(fila['cantidad'] for fila in filas),
+        'por_estado': totalizar(filas, ['estado_contrato']),
+        'por_mes': sorted(
+            (fila for fila in totalizar(filas, ['mes']) if fila['mes'] >= desde),
+            key=lambda fila: fila['mes']
+        ),
+    }
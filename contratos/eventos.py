@@ -0,0 +1,40 @@
+# ======================================================
+# apps/contratos/eventos.py
+# ======================================================
+"""
+Historial de cambios de estado (EventoEstado) expuesto en los ViewSets.
+
+Los ViewSets de equipos, contratos y servicios agregan HistorialEstadosMixin e
+indican su `entidad_eventos`; la acción `eventos` pagina por cursor sobre el
+índice (entidad, entidad_id, fecha), sin contar filas ni usar OFFSET.
+"""
+from rest_framework.decorators import action
+
+from prod_a.paginacion import PaginacionCursor
+from .models import EventoEstado
+from .serializers import EventoEstadoSerializer
+
+
+class EventoEstadoPagination(PaginacionCursor):
+    ordering = ('-fecha', '-id')
+
+
+def actor_de(request):
+    """Usuario autenticado que ejecuta la acción (None si la petición es anónima)"""
+    usuario = getattr(request, 'user', None)
+    return usuario if getattr(usuario, 'is_authenticated', False) else None
+
+
+class HistorialEstadosMixin:
+    entidad_eventos = None
+
+    @action(detail=True, methods=['get'])
+    def eventos(self, request, pk=None):
+        """Historial de cambios de estado, del más reciente al más antiguo (?cursor=, ?limite=)"""
+        objeto = self.get_object()
+        eventos = EventoEstado.objects.de(self.entidad_eventos, objeto.pk).select_related('actor')
+
+        # Sin view: el OrderingFilter del ViewSet no debe cambiar el orden del cursor
+        paginador = EventoEstadoPagination()
+        pagina = paginador.paginate_queryset(eventos, request)
+        return paginador.get_paginated_response(EventoEstadoSerializer(pagina, many=True).data)
@@ -0,0 +1,234 @@
+# ======================================================
+# apps/contratos/importacion.py
+# ======================================================
+"""
+Importación masiva de contratos (con sus servicios) desde CSV/XLSX, para la
+migración desde el sistema anterior.
+
+Las filas se leen de forma incremental (prod_a.archivos.leer_filas) y se
+procesan por bloques:
+- catálogos (tipos de trámite, formas de pago, planes) cargados una sola vez
+- clientes y números de contrato existentes con una consulta IN por bloque
+- números de contrato faltantes reservados en bloque (numeracion.numeros_contrato),
+  después de adelantar la secuencia más allá de los números del archivo
+- contratos y servicios insertados con bulk_create en una transacción por bloque
+"""
+import re
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import contadores, estadisticas
+from .models import Cliente, Contrato, ContratoMensual, FormaPago, PlanComercial, Servicio, TipoTramite
+from .numeracion import numeros_contrato, registrar_contratos
+
+COLUMNAS_OBLIGATORIAS = ('ci', 'direccion_instalacion')
+ESTADOS_CONTRATO = {estado for estado, _ in Contrato._meta.get_field('estado_contrato').choices}
+# Los códigos de plan de una fila van separados por '|' (',' y ';' son separadores del CSV)
+SEPARADOR_PLANES = re.compile(r'\s*\|\s*')
+# fecha_firma: ISO (también la de una celda de fecha XLSX, 'AAAA-MM-DD 00:00:00') o DD/MM/AAAA
+FORMATOS_FECHA = ('%Y-%m-%d', '%d/%m/%Y')
+
+
+def _fecha(valor):
+    """Fecha de la celda (hoy si está vacía); None si no tiene un formato reconocido"""
+    if not valor:
+        return timezone.localdate()
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(valor.split(' ')[0], formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+class ImportadorContratos:
+    """
+    Registra contratos a partir de un iterable de filas.
+
+    Columnas reconocidas: ci (del cliente, ya registrado) y direccion_instalacion
+    (obligatorias); numero_contrato (se reserva de la secuencia si falta),
+    tipo_tramite y forma_pago (por nombre), estado_contrato (default ACTIVO),
+    fecha_firma (default hoy), observaciones y planes (códigos de plan separados
+    por '|'). Las filas inválidas se reportan y se omiten; las válidas se
+    insertan por bloques.
+    """
+
+    def __init__(self, chunk_size=500, dry_run=False):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+
+        self.tipos_tramite = {t.nombre.upper(): t.id for t in TipoTramite.objects.filter(activo=True)}
+        self.formas_pago = {f.nombre.upper(): f.id for f in FormaPago.objects.filter(activo=True)}
+        self.planes = dict(PlanComercial.objects.filter(activo=True).values_list('codigo_plan', 'id'))
+
+        self.numeros_vistos = set()
+        self.errores = []
+        self.contratos_creados = 0
+        self.servicios_creados = 0
+        self.filas_leidas = 0
+
+    def procesar(self, filas):
+        bloque = []
+        for numero, fila in enumerate(filas, start=2):  # fila 1 = encabezados
+            self.filas_leidas += 1
+            bloque.append((numero, fila))
+            if len(bloque) >= self.chunk_size:
+                self._procesar_bloque(bloque)
+                bloque = []
+        if bloque:
+            self._procesar_bloque(bloque)
+
+        if self.contratos_creados and not self.dry_run:
+            # bulk_create no emite señales
+            estadisticas.invalidar('contratos', 'tipos_servicio')
+        return self.reporte()
+
+    def _procesar_bloque(self, bloque):
+        # 1) Validación de formato, catálogos y unicidad dentro del archivo
+        candidatos = []
+        for numero, fila in bloque:
+            datos = self._validar_fila(numero, fila)
+            if datos:
+                candidatos.append((numero, datos))
+
+        if not candidatos:
+            return
+
+        # 2) Clientes y números de contrato contra la BD: una consulta IN cada uno
+        clientes = dict(
+            Cliente.objects.filter(ci__in={d['ci'] for _, d in candidatos}).values_list('ci', 'id')
+        )
+        existentes = set(Contrato.objects.filter(
+            numero_contrato__in=[d['numero_contrato'] for _, d in candidatos if d['numero_contrato']]
+        ).values_list('numero_contrato', flat=True))
+
+        validos = []
+        for numero, datos in candidatos:
+            if datos['ci'] not in clientes:
+                self._error(numero, 'ci', f"No existe un cliente con CI '{datos['ci']}'")
+            elif datos['numero_contrato'] in existentes:
+                self._error(numero, 'numero_contrato', f"Ya existe el contrato '{datos['numero_contrato']}'")
+            else:
+                datos['cliente_id'] = clientes[datos['ci']]
+                validos.append((numero, datos))
+
+        if not validos or self.dry_run:
+            self.contratos_creados += len(validos)
+            self.servicios_creados += sum(len(d['planes']) for _, d in validos)
+            return
+
+        # 3) Números: los del archivo adelantan la secuencia antes de reservar los
+        # faltantes (un bloque de la secuencia por bloque de filas)
+        registrar_contratos([d['numero_contrato'] for _, d in validos if d['numero_contrato']])
+        sin_numero = [d for _, d in validos if not d['numero_contrato']]
+        if sin_numero:
+            numeros = [n for n in numeros_contrato(len(sin_numero)) if n not in self.numeros_vistos]
+            while len(numeros) < len(sin_numero):
+                # Algún número del archivo coincidió con la secuencia: pedir los faltantes
+                numeros += [
+                    n for n in numeros_contrato(len(sin_numero) - len(numeros))
+                    if n not in self.numeros_vistos
+                ]
+            for datos, numero_contrato in zip(sin_numero, numeros):
+                datos['numero_contrato'] = numero_contrato
+                self.numeros_vistos.add(numero_contrato)
+
+        contratos = [
+            Contrato(
+                numero_contrato=datos['numero_contrato'],
+                cliente_id=datos['cliente_id'],
+                tipo_tramite_id=datos['tipo_tramite_id'],
+                forma_pago_id=datos['forma_pago_id'],
+                estado_contrato=datos['estado_contrato'],
+                fecha_firma=datos['fecha_firma'],
+                direccion_instalacion=datos['direccion_instalacion'],
+                observaciones=datos['observaciones'],
+            )
+            for _, datos in validos
+        ]
+
+        try:
+            with transaction.atomic():
+                Contrato.objects.bulk_create(contratos, batch_size=self.chunk_size)
+                servicios = [
+                    Servicio(contrato=contrato, plan_comercial_id=plan_id)
+                    for contrato, (_, datos) in zip(contratos, validos)
+                    for plan_id in datos['planes']
+                ]
+                Servicio.objects.bulk_create(servicios, batch_size=self.chunk_size)
+                # bulk_create no emite señales: contadores y resumen mensual en la misma transacción
+                contadores.registrar(contratos + servicios)
+                ContratoMensual.objects.registrar(contratos)
+        except IntegrityError:
+            # Conflicto concurrente con otro registro: se reporta el bloque completo
+            for numero, _ in validos:
+                self._error(numero, None, "Conflicto de unicidad al guardar el bloque; reintente la fila")
+            return
+
+        self.contratos_creados += len(contratos)
+        self.servicios_creados += len(servicios)
+
+    def _validar_fila(self, numero, fila):
+        for campo in COLUMNAS_OBLIGATORIAS:
+            if not fila.get(campo):
+                self._error(numero, campo, "Campo obligatorio")
+                return None
+
+        datos = {
+            'ci': fila['ci'],
+            'direccion_instalacion': fila['direccion_instalacion'],
+            'observaciones': fila.get('observaciones', ''),
+            'numero_contrato': fila.get('numero_contrato') or None,
+            'estado_contrato': (fila.get('estado_contrato') or 'ACTIVO').upper(),
+        }
+
+        if datos['estado_contrato'] not in ESTADOS_CONTRATO:
+            self._error(numero, 'estado_contrato', f"Estado inválido: '{fila['estado_contrato']}'")
+            return None
+
+        datos['fecha_firma'] = _fecha(fila.get('fecha_firma'))
+        if datos['fecha_firma'] is None or datos['fecha_firma'] > timezone.localdate():
+            self._error(numero, 'fecha_firma', f"Fecha inválida: '{fila['fecha_firma']}' (use AAAA-MM-DD)")
+            return None
+
+        numero_contrato = datos['numero_contrato']
+        if numero_contrato:
+            if not re.fullmatch(r'[0-9]{8}', numero_contrato):
+                self._error(numero, 'numero_contrato', "Debe tener 8 dígitos")
+                return None
+            if numero_contrato in self.numeros_vistos:
+                self._error(numero, 'numero_contrato', f"Valor duplicado en el archivo: '{numero_contrato}'")
+                return None
+
+        for campo, catalogo in (('tipo_tramite', self.tipos_tramite), ('forma_pago', self.formas_pago)):
+            nombre = fila.get(campo)
+            if nombre and nombre.upper() not in catalogo:
+                self._error(numero, campo, f"No existe o no está activo: '{nombre}'")
+                return None
+            datos[f'{campo}_id'] = catalogo[nombre.upper()] if nombre else None
+
+        codigos = [c for c in SEPARADOR_PLANES.split(fila.get('planes', '')) if c]
+        desconocidos = [c for c in codigos if c not in self.planes]
+        if desconocidos:
+            self._error(numero, 'planes', f"Planes inexistentes o inactivos: {', '.join(desconocidos)}")
+            return None
+        datos['planes'] = list(dict.fromkeys(self.planes[c] for c in codigos))
+
+        if numero_contrato:
+            self.numeros_vistos.add(numero_contrato)
+        return datos
+
+    def _error(self, fila, campo, mensaje):
+        self.errores.append({'fila': fila, 'campo': campo, 'error': mensaje})
+
+    def reporte(self):
+        return {
+            'dry_run': self.dry_run,
+            'filas_leidas': self.filas_leidas,
+            'contratos_creados': self.contratos_creados,
+            'servicios_creados': self.servicios_creados,
+            'filas_con_error': len(self.errores),
+            'errores': sorted(self.errores, key=lambda e: e['fila']),
+        }
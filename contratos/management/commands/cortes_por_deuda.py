@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from contratos import cortes
+
+
+class Command(BaseCommand):
+    """
+    Corte (y reposición) masiva de servicios según la deuda de facturas migradas
+    (soli.CobfactuLocal, estados G / NP). Ver contratos/cortes.py.
+
+    Pensado para ejecutarse en cada ciclo de cobranza (cron), primero en seco:
+        python manage.py cortes_por_deuda --dry-run
+        python manage.py cortes_por_deuda --dias 60 --minimo-facturas 2
+        python manage.py cortes_por_deuda --reactivar
+
+    --dias por defecto es el setting CORTES_DIAS_DEUDA (60).
+    """
+    help = 'Suspende los servicios de contratos con deuda vencida (o reactiva los ya pagados)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, help='Antigüedad mínima de la factura impaga en días')
+        parser.add_argument('--minimo-facturas', type=int, default=1, help='Facturas impagas mínimas (default: 1)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Servicios por transacción (default: 1000)')
+        parser.add_argument(
+            '--reactivar', action='store_true',
+            help='Reactiva los servicios cortados por deuda cuyo contrato ya no es moroso'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta contratos y servicios afectados')
+
+    def handle(self, *args, **options):
+        if options['dias'] is not None and options['dias'] < 0:
+            raise CommandError('--dias no puede ser negativo')
+
+        proceso = cortes.reactivar_pagados if options['reactivar'] else cortes.suspender_morosos
+        resumen = proceso(
+            dias=options['dias'], minimo_facturas=options['minimo_facturas'],
+            chunk_size=options['chunk_size'], dry_run=options['dry_run']
+        )
+
+        accion = 'reactivar' if options['reactivar'] else 'suspender'
+        if resumen['dry_run']:
+            self.stdout.write(
+                f"[dry-run] {resumen['servicios']} servicios de {resumen['contratos']} contratos por {accion}"
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"{resumen['servicios']} servicios de {resumen['contratos']} contratos "
+                f"{'reactivados' if options['reactivar'] else 'suspendidos'}"
+            ))
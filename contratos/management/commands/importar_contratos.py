@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from prod_a.archivos import ArchivoInvalido, leer_filas
+from contratos.importacion import COLUMNAS_OBLIGATORIAS, ImportadorContratos
+
+
+class Command(BaseCommand):
+    """
+    Importa contratos (y sus servicios) del sistema anterior desde un CSV/XLSX.
+
+    Uso:
+        python manage.py importar_contratos contratos.csv --dry-run
+        python manage.py importar_contratos contratos.xlsx --chunk-size 1000
+
+    Columnas: ver contratos/importacion.py. Cada bloque de filas se guarda en su
+    propia transacción, por lo que un error no revierte los bloques anteriores;
+    las filas con error se listan al final y se pueden corregir y reimportar.
+    """
+    help = 'Importación masiva de contratos con sus servicios desde un archivo CSV/XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .xlsx')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Filas por bloque (default: 500)')
+        parser.add_argument('--dry-run', action='store_true', help='Solo valida, no guarda nada')
+
+    def handle(self, *args, **options):
+        importador = ImportadorContratos(chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                reporte = importador.procesar(leer_filas(archivo, COLUMNAS_OBLIGATORIAS))
+        except (OSError, ArchivoInvalido) as e:
+            raise CommandError(str(e))
+
+        for error in reporte['errores']:
+            self.stderr.write(f"Fila {error['fila']} [{error['campo'] or '-'}]: {error['error']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'[dry-run] ' if reporte['dry_run'] else ''}{reporte['filas_leidas']} filas leídas, "
+            f"{reporte['contratos_creados']} contratos y {reporte['servicios_creados']} servicios creados, "
+            f"{reporte['filas_con_error']} filas con error"
+        ))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from contratos import contadores
+from contratos.models import Cliente, ContratoMensual, FormaPago, PlanComercial, TipoServicio, TipoTramite
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye los contadores denormalizados de los catálogos de contratos
+    (contratos/contadores.py) desde Contrato, Servicio, PlanComercial y Lote, y el
+    resumen mensual de contratos (ContratoMensual).
+
+    Se mantienen con señales; este comando repara desvíos causados por escrituras
+    que no las emiten (SQL manual, queryset.update). Puede programarse en cron:
+        python manage.py recalcular_contadores
+        0 4 * * * cd /ruta/proyecto && python manage.py recalcular_contadores
+    """
+    help = 'Recalcula los contadores de los catálogos de contratos y el resumen mensual de contratos'
+
+    def handle(self, *args, **options):
+        catalogos = [
+            (Cliente, ['total_contratos', 'total_contratos_activos']),
+            (TipoTramite, ['total_contratos']),
+            (FormaPago, ['total_contratos']),
+            (PlanComercial, ['total_servicios']),
+            (TipoServicio, ['total_planes', 'total_lotes']),
+        ]
+        antes = {modelo: dict((fila[0], fila[1:]) for fila in modelo.objects.values_list('pk', *campos))
+                 for modelo, campos in catalogos}
+
+        contadores.recalcular()
+
+        for modelo, campos in catalogos:
+            corregidos = sum(
+                1 for pk, *valores in modelo.objects.values_list('pk', *campos)
+                if antes[modelo].get(pk) != tuple(valores)
+            )
+            self.stdout.write(f"{modelo.__name__}: {corregidos} filas con desvío corregidas")
+        self.stdout.write(self.style.SUCCESS("Contadores recalculados"))
+
+        ContratoMensual.objects.recalcular()
+        self.stdout.write(self.style.SUCCESS(
+            f"Resumen mensual recalculado: {ContratoMensual.objects.count()} combinaciones"
+        ))
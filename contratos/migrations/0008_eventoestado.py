@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0007_alter_servicio_plan_comercial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoEstado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entidad', models.CharField(choices=[('EQUIPO_ONU', 'Equipo ONU'), ('CONTRATO', 'Contrato'), ('SERVICIO', 'Servicio')], max_length=20)),
+                ('entidad_id', models.BigIntegerField()),
+                ('estado_anterior', models.CharField(blank=True, max_length=50)),
+                ('estado_nuevo', models.CharField(max_length=50)),
+                ('nota', models.TextField(blank=True)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'contratos_evento_estado',
+                'indexes': [models.Index(fields=['entidad', 'entidad_id', 'fecha'], name='evento_estado_entidad_idx')],
+            },
+        ),
+    ]
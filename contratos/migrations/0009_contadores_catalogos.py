@@ -0,0 +1,83 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _conteo(modelo, campo, **filtros):
+    totales = modelo.objects.filter(**{campo: OuterRef('pk')}, **filtros).order_by().values(campo).annotate(
+        total=Count('id')
+    ).values('total')
+    return Coalesce(Subquery(totales), 0)
+
+
+def poblar_contadores(apps, schema_editor):
+    """Mismo cálculo que contratos.contadores.recalcular(), sobre los modelos históricos"""
+    Cliente = apps.get_model('contratos', 'Cliente')
+    TipoTramite = apps.get_model('contratos', 'TipoTramite')
+    FormaPago = apps.get_model('contratos', 'FormaPago')
+    TipoServicio = apps.get_model('contratos', 'TipoServicio')
+    PlanComercial = apps.get_model('contratos', 'PlanComercial')
+    Contrato = apps.get_model('contratos', 'Contrato')
+    Servicio = apps.get_model('contratos', 'Servicio')
+    Lote = apps.get_model('almacenes', 'Lote')
+
+    Cliente.objects.update(
+        total_contratos=_conteo(Contrato, 'cliente'),
+        total_contratos_activos=_conteo(Contrato, 'cliente', estado_contrato='ACTIVO'),
+    )
+    TipoTramite.objects.update(total_contratos=_conteo(Contrato, 'tipo_tramite'))
+    FormaPago.objects.update(total_contratos=_conteo(Contrato, 'forma_pago'))
+    PlanComercial.objects.update(total_servicios=_conteo(Servicio, 'plan_comercial'))
+    TipoServicio.objects.update(
+        total_planes=_conteo(PlanComercial, 'tipo_servicio'),
+        total_lotes=_conteo(Lote, 'tipo_servicio'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacenes', '0008_inventariodiario'),
+        ('contratos', '0008_eventoestado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='total_contratos',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='total_contratos_activos',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='formapago',
+            name='total_contratos',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='plancomercial',
+            name='total_servicios',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tiposervicio',
+            name='total_lotes',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tiposervicio',
+            name='total_planes',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tipotramite',
+            name='total_contratos',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(poblar_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def _normalizar(texto):
+    return ' '.join((texto or '').upper().split())
+
+
+def vincular_tecnicos(apps, schema_editor):
+    """
+    Asocia las OTs existentes a un Usuario a partir del texto de tecnico_asignado:
+    código Cotel o nombre completo exacto (sin distinguir mayúsculas ni espacios).
+    Las que no coinciden conservan solo el texto.
+    """
+    OrdenTrabajo = apps.get_model('contratos', 'OrdenTrabajo')
+    Usuario = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    por_clave = {}
+    for usuario in Usuario.objects.only('id', 'codigocotel', 'nombres', 'apellidopaterno', 'apellidomaterno'):
+        por_clave[str(usuario.codigocotel)] = usuario.id
+        nombre = f"{usuario.nombres or ''} {usuario.apellidopaterno or ''} {usuario.apellidomaterno or ''}"
+        por_clave.setdefault(_normalizar(nombre), usuario.id)
+
+    textos = OrdenTrabajo.objects.exclude(tecnico_asignado='').values_list('tecnico_asignado', flat=True).distinct()
+    for texto in textos:
+        usuario_id = por_clave.get(_normalizar(texto))
+        if usuario_id:
+            OrdenTrabajo.objects.filter(tecnico_asignado=texto).update(tecnico_id=usuario_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0009_contadores_catalogos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordentrabajo',
+            name='tecnico',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ordenes_trabajo', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(vincular_tecnicos, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ordentrabajo',
+            index=models.Index(fields=['tecnico', 'fecha_programada', 'estado_ot'], name='ot_tecnico_agenda_idx'),
+        ),
+    ]
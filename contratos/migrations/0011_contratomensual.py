@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def poblar_resumen(apps, schema_editor):
+    Contrato = apps.get_model('contratos', 'Contrato')
+    ContratoMensual = apps.get_model('contratos', 'ContratoMensual')
+    agrupados = Contrato.objects.order_by().annotate(mes=TruncMonth('fecha_firma')).values(
+        'mes', 'estado_contrato', 'tipo_tramite_id'
+    ).annotate(cantidad=Count('id'))
+    ContratoMensual.objects.bulk_create([ContratoMensual(**fila) for fila in agrupados], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0010_ordentrabajo_tecnico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContratoMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('estado_contrato', models.CharField(max_length=20)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('tipo_tramite', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='contratos.tipotramite')),
+            ],
+            options={
+                'db_table': 'contratos_contrato_mensual',
+                'unique_together': {('mes', 'estado_contrato', 'tipo_tramite')},
+            },
+        ),
+        migrations.RunPython(poblar_resumen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:05
+
+from django.db import migrations
+from django.db.models import BigIntegerField, Max
+from django.db.models.functions import Cast, Substr
+
+CONTRATO_INICIO = 80000000
+
+
+def crear_secuencias(apps, schema_editor):
+    """
+    Crea las secuencias de numeración (contratos/numeracion.py) iniciadas después
+    del mayor número existente. Si ya se habían creado al primer uso, solo se adelantan.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    Contrato = apps.get_model('contratos', 'Contrato')
+    EquipoONU = apps.get_model('almacenes', 'EquipoONU')
+
+    ultimo_contrato = Contrato.objects.filter(numero_contrato__regex=r'^[0-9]{8}$').annotate(
+        numero=Cast('numero_contrato', BigIntegerField())
+    ).aggregate(max_num=Max('numero'))['max_num']
+    ultimo_equipo = EquipoONU.objects.filter(codigo_interno__regex=r'^EQ-[0-9]+$').annotate(
+        correlativo=Cast(Substr('codigo_interno', 4), BigIntegerField())
+    ).aggregate(max_num=Max('correlativo'))['max_num']
+
+    siguientes = {
+        'contratos_numero_contrato_seq': max(CONTRATO_INICIO, (ultimo_contrato or 0) + 1),
+        'almacenes_codigo_interno_seq': (ultimo_equipo or 0) + 1,
+    }
+    quote = schema_editor.connection.ops.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for secuencia, siguiente in siguientes.items():
+            cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {quote(secuencia)} START WITH {int(siguiente)}")
+            # setval(..., false): el próximo nextval() devuelve exactamente el valor indicado
+            cursor.execute(
+                f"SELECT setval(%s, GREATEST(%s, CASE WHEN is_called THEN last_value + 1 ELSE last_value END), "
+                f"false) FROM {quote(secuencia)}",
+                [secuencia, siguiente]
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0011_contratomensual'),
+        ('almacenes', '0009_inventario_contador_nulls_no_distintos'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_secuencias, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:56
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0012_secuencias_numeracion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contrato',
+            name='fecha_firma',
+            field=models.DateField(default=django.utils.timezone.localdate, editable=False),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+def unificar_resumenes_sin_tramite(apps, schema_editor):
+    """Suma en una sola fila los resúmenes duplicados sin tipo de trámite (la restricción anterior los permitía)"""
+    ContratoMensual = apps.get_model('contratos', 'ContratoMensual')
+    duplicados = ContratoMensual.objects.filter(tipo_tramite__isnull=True).order_by().values(
+        'mes', 'estado_contrato'
+    ).annotate(filas=models.Count('id')).filter(filas__gt=1)
+    for grupo in duplicados:
+        resumenes = list(ContratoMensual.objects.filter(
+            tipo_tramite__isnull=True, mes=grupo['mes'], estado_contrato=grupo['estado_contrato']
+        ).order_by('id'))
+        primero = resumenes[0]
+        primero.cantidad = sum(resumen.cantidad for resumen in resumenes)
+        primero.save(update_fields=['cantidad'])
+        ContratoMensual.objects.filter(pk__in=[resumen.pk for resumen in resumenes[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0013_contrato_fecha_firma_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(unificar_resumenes_sin_tramite, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='contratomensual',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='contratomensual',
+            constraint=models.UniqueConstraint(
+                fields=('mes', 'estado_contrato', 'tipo_tramite'), name='contratos_contrato_mensual_unico',
+                nulls_distinct=False
+            ),
+        ),
+    ]
@@ -1,5 +1,12 @@
-from django.db import models
-from django.db.models import Max
+from collections import Counter
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from . import estadisticas, numeracion
 
 
 class Cliente(models.Model):
@@ -20,6 +27,9 @@ class Cliente(models.Model):
     ])
     fecha_registro = models.DateField(auto_now_add=True)
     observaciones = models.TextField(blank=True)
+    # Contadores denormalizados (contratos/contadores.py)
+    total_contratos = models.IntegerField(default=0, editable=False)
+    total_contratos_activos = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -34,6 +44,7 @@ class TipoTramite(models.Model):
     nombre = models.CharField(max_length=50, unique=True)
     descripcion = models.TextField(blank=True)
     activo = models.BooleanField(default=True)
+    total_contratos = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -48,6 +59,7 @@ class FormaPago(models.Model):
     nombre = models.CharField(max_length=50, unique=True)
     descripcion = models.TextField(blank=True)
     activo = models.BooleanField(default=True)
+    total_contratos = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -61,6 +73,8 @@ class FormaPago(models.Model):
 class TipoServicio(models.Model):
     nombre = models.CharField(max_length=50, unique=True)
     descripcion = models.TextField(blank=True)
+    total_planes = models.IntegerField(default=0, editable=False)
+    total_lotes = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -81,6 +95,7 @@ class PlanComercial(models.Model):
     precio_instalacion = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
     descripcion = models.TextField(blank=True)
     activo = models.BooleanField(default=True)
+    total_servicios = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -91,10 +106,34 @@ class PlanComercial(models.Model):
         db_table = 'contratos_plan_comercial'
 
 
+def _contar_por_contrato(modelo):
+    """Subconsulta con el número de filas de `modelo` del contrato (sin multiplicar filas con JOINs)"""
+    totales = modelo.objects.filter(contrato=OuterRef('pk')).order_by().values('contrato').annotate(
+        total=Count('id')
+    ).values('total')
+    return Coalesce(Subquery(totales), 0)
+
+
+class ContratoManager(models.Manager):
+    def para_listado(self):
+        """
+        Contratos con todo lo que lee ContratoSerializer: cliente y catálogos por JOIN,
+        servicios (con plan y tipo de servicio) en una consulta aparte y los conteos
+        de servicios y órdenes de trabajo anotados.
+        """
+        return self.select_related('cliente', 'tipo_tramite', 'forma_pago').prefetch_related(
+            Prefetch('servicios', queryset=Servicio.objects.select_related('plan_comercial__tipo_servicio'))
+        ).annotate(
+            servicios_total=_contar_por_contrato(Servicio),
+            ordenes_trabajo_total=_contar_por_contrato(OrdenTrabajo)
+        )
+
+
 class Contrato(models.Model):
     numero_contrato = models.CharField(max_length=8, unique=True, blank=True)
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='contratos')
-    fecha_firma = models.DateField(auto_now_add=True)
+    # default en lugar de auto_now_add: la importación de contratos heredados indica la fecha original
+    fecha_firma = models.DateField(default=timezone.localdate, editable=False)
     # Campos adicionales para integración con solicitudes
     tipo_tramite = models.ForeignKey(TipoTramite, on_delete=models.CASCADE, null=True, blank=True)
     forma_pago = models.ForeignKey(FormaPago, on_delete=models.CASCADE, null=True, blank=True)
@@ -109,13 +148,14 @@ class Contrato(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ContratoManager()
+
     def save(self, *args, **kwargs):
         if not self.numero_contrato:
-            ultimo = Contrato.objects.aggregate(max_num=Max('numero_contrato'))['max_num'] or '00000000'
-            siguiente = str(int(ultimo) + 1).zfill(8)
-            if int(siguiente) < 80000000:
-                siguiente = '80000000'
-            self.numero_contrato = siguiente
+            self.numero_contrato = numeracion.numero_contrato()
+        elif self._state.adding:
+            # Número indicado explícitamente: que la secuencia no lo entregue después
+            numeracion.registrar_contratos([self.numero_contrato])
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -125,6 +165,69 @@ class Contrato(models.Model):
         db_table = 'contratos_contrato'
 
 
+class ContratoMensualManager(models.Manager):
+    def ajustar(self, mes, estado_contrato, tipo_tramite_id, delta):
+        """Suma `delta` al resumen mes × estado × tipo de trámite (lo crea si no existe)"""
+        if not delta:
+            return
+
+        filtro = {'mes': mes, 'estado_contrato': estado_contrato, 'tipo_tramite_id': tipo_tramite_id}
+        if self.filter(**filtro).update(cantidad=F('cantidad') + delta) or delta < 0:
+            return
+
+        resumen, creado = self.get_or_create(**filtro, defaults={'cantidad': delta})
+        if not creado:
+            self.filter(pk=resumen.pk).update(cantidad=F('cantidad') + delta)
+
+    def registrar(self, contratos, signo=1):
+        """Ajusta el resumen para un conjunto de contratos (ej. tras bulk_create)"""
+        deltas = Counter(ContratoMensual.clave(contrato) for contrato in contratos)
+        for clave, cantidad in deltas.items():
+            self.ajustar(*clave, signo * cantidad)
+
+    def recalcular(self):
+        """Reconstruye el resumen desde Contrato (reparación de desvíos)"""
+        with transaction.atomic():
+            self.all().delete()
+            agrupados = Contrato.objects.order_by().annotate(mes=TruncMonth('fecha_firma')).values(
+                'mes', 'estado_contrato', 'tipo_tramite_id'
+            ).annotate(cantidad=Count('id'))
+            self.bulk_create([ContratoMensual(**fila) for fila in agrupados], batch_size=1000)
+            estadisticas.invalidar('contratos')
+
+
+class ContratoMensual(models.Model):
+    """
+    Contratos firmados por mes × estado actual × tipo de trámite. Se mantiene con
+    señales de Contrato (contratos/signals.py) y lo lee la estadística de contratos
+    para los meses cerrados.
+    """
+    mes = models.DateField()
+    estado_contrato = models.CharField(max_length=20)
+    tipo_tramite = models.ForeignKey(TipoTramite, on_delete=models.CASCADE, null=True, blank=True)
+    cantidad = models.IntegerField(default=0)
+
+    objects = ContratoMensualManager()
+
+    @staticmethod
+    def clave(contrato):
+        """(mes, estado, tipo de trámite) en el que cuenta un contrato"""
+        return contrato.fecha_firma.replace(day=1), contrato.estado_contrato, contrato.tipo_tramite_id
+
+    def __str__(self):
+        return f"{self.mes:%Y-%m} {self.estado_contrato}/{self.tipo_tramite_id}: {self.cantidad}"
+
+    class Meta:
+        db_table = 'contratos_contrato_mensual'
+        constraints = [
+            # Una sola fila "sin tipo de trámite" por mes × estado: NULL no es distinto de NULL
+            models.UniqueConstraint(
+                fields=['mes', 'estado_contrato', 'tipo_tramite'], nulls_distinct=False,
+                name='contratos_contrato_mensual_unico'
+            ),
+        ]
+
+
 class Servicio(models.Model):
     contrato = models.ForeignKey(Contrato, on_delete=models.CASCADE, related_name='servicios')
     plan_comercial = models.ForeignKey(PlanComercial, on_delete=models.CASCADE)
@@ -147,9 +250,44 @@ class Servicio(models.Model):
         db_table = 'contratos_servicio'
 
 
+class OrdenTrabajoManager(models.Manager):
+    def para_listado(self):
+        """OTs con contrato, cliente, técnico y servicios activos del contrato precargados"""
+        return self.select_related('contrato__cliente', 'tecnico').prefetch_related(
+            Prefetch(
+                'contrato__servicios',
+                queryset=Servicio.objects.filter(estado_servicio='ACTIVO').select_related(
+                    'plan_comercial__tipo_servicio'
+                ),
+                to_attr='servicios_activos'
+            )
+        )
+
+    def agenda(self, desde, hasta, tecnicos=None):
+        """
+        OTs abiertas programadas entre `desde` y `hasta` (inclusive) de los técnicos
+        indicados, ordenadas por técnico y fecha: una consulta sobre ot_tecnico_agenda_idx.
+        """
+        ordenes = self.select_related('contrato__cliente', 'tecnico').filter(
+            fecha_programada__range=(desde, hasta),
+            estado_ot__in=OrdenTrabajo.ESTADOS_ABIERTOS,
+            tecnico__isnull=False
+        )
+        if tecnicos:
+            ordenes = ordenes.filter(tecnico_id__in=tecnicos)
+        return ordenes.order_by('tecnico_id', 'fecha_programada', 'id')
+
+
 class OrdenTrabajo(models.Model):
+    ESTADOS_ABIERTOS = ('PENDIENTE', 'ASIGNADA', 'EN_PROCESO')
+
     numero_ot = models.CharField(max_length=20, unique=True, blank=True)
     contrato = models.ForeignKey(Contrato, on_delete=models.CASCADE, related_name='ordenes_trabajo')
+    tecnico = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='ordenes_trabajo'
+    )
+    # Nombre del técnico al momento de asignar (y texto libre de OTs anteriores al FK)
     tecnico_asignado = models.CharField(max_length=100, blank=True)
     fecha_asignacion = models.DateField(null=True, blank=True)
     fecha_programada = models.DateField(null=True, blank=True)
@@ -167,22 +305,14 @@ class OrdenTrabajo(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OrdenTrabajoManager()
+
     def save(self, *args, **kwargs):
         if not self.numero_ot:
-            from datetime import datetime
-            anio = datetime.now().year
-            ultimo = OrdenTrabajo.objects.filter(
-                numero_ot__startswith=f'OT{anio}'
-            ).aggregate(
-                max_num=Max('numero_ot')
-            )['max_num']
-
-            if ultimo:
-                siguiente_num = int(ultimo[6:]) + 1
-            else:
-                siguiente_num = 1
-
-            self.numero_ot = f'OT{anio}{str(siguiente_num).zfill(4)}'
+            self.numero_ot = numeracion.numero_ot()
+        elif self._state.adding:
+            # Número indicado explícitamente: que la secuencia no lo entregue después
+            numeracion.registrar_ots([self.numero_ot])
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -190,3 +320,72 @@ class OrdenTrabajo(models.Model):
 
     class Meta:
         db_table = 'contratos_orden_trabajo'
+        indexes = [
+            # Agenda de técnicos: rango de fechas por técnico, filtrando estados abiertos
+            models.Index(fields=['tecnico', 'fecha_programada', 'estado_ot'], name='ot_tecnico_agenda_idx'),
+        ]
+
+
+class EventoEstadoManager(models.Manager):
+    def registrar(self, entidad, entidad_id, estado_nuevo, estado_anterior='', actor=None, nota=''):
+        return self.create(
+            entidad=entidad, entidad_id=entidad_id,
+            estado_anterior=estado_anterior or '', estado_nuevo=estado_nuevo or '',
+            actor=actor if getattr(actor, 'is_authenticated', False) else None,
+            nota=nota or ''
+        )
+
+    def registrar_varios(self, eventos):
+        """Inserta varios eventos de una vez (dicts con los mismos argumentos que registrar)"""
+        return self.bulk_create([
+            EventoEstado(
+                entidad=e['entidad'], entidad_id=e['entidad_id'],
+                estado_anterior=e.get('estado_anterior') or '', estado_nuevo=e.get('estado_nuevo') or '',
+                actor=e['actor'] if getattr(e.get('actor'), 'is_authenticated', False) else None,
+                nota=e.get('nota') or ''
+            )
+            for e in eventos
+        ], batch_size=1000)
+
+    def de(self, entidad, entidad_id):
+        return self.filter(entidad=entidad, entidad_id=entidad_id)
+
+
+class EventoEstado(models.Model):
+    """
+    Bitácora de cambios de estado (solo inserción) de equipos, contratos y servicios.
+    Reemplaza las líneas con fecha que se agregaban a `observaciones`.
+    """
+    EQUIPO_ONU = 'EQUIPO_ONU'
+    CONTRATO = 'CONTRATO'
+    SERVICIO = 'SERVICIO'
+
+    entidad = models.CharField(max_length=20, choices=[
+        (EQUIPO_ONU, 'Equipo ONU'),
+        (CONTRATO, 'Contrato'),
+        (SERVICIO, 'Servicio'),
+    ])
+    entidad_id = models.BigIntegerField()
+    estado_anterior = models.CharField(max_length=50, blank=True)
+    estado_nuevo = models.CharField(max_length=50)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    nota = models.TextField(blank=True)
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    objects = EventoEstadoManager()
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("EventoEstado es de solo inserción; no se puede modificar")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.entidad} {self.entidad_id}: {self.estado_anterior} -> {self.estado_nuevo}"
+
+    class Meta:
+        db_table = 'contratos_evento_estado'
+        indexes = [
+            models.Index(fields=['entidad', 'entidad_id', 'fecha'], name='evento_estado_entidad_idx'),
+        ]
@@ -0,0 +1,180 @@
+# ======================================================
+# apps/contratos/numeracion.py
+# ======================================================
+"""
+Numeración de documentos respaldada por secuencias de PostgreSQL.
+
+- Contratos: 8 dígitos desde 80000000          (contratos_numero_contrato_seq)
+- Órdenes de trabajo: OT<año><correlativo 4>   (contratos_numero_ot_<año>_seq, una por año)
+- Equipos ONU: EQ-<correlativo>                (almacenes_codigo_interno_seq)
+
+nextval() no bloquea ni colisiona entre transacciones concurrentes y los bloques
+(reservar N números para importaciones masivas) se obtienen en una sola consulta.
+Las secuencias de contratos y equipos se crean en la migración
+contratos/0012_secuencias_numeracion, iniciadas desde los datos existentes; las
+de órdenes de trabajo (una por año) se crean al primer uso, serializando la
+creación con un advisory lock para que dos transacciones no compitan por ella.
+Los números consumidos por transacciones revertidas no se reutilizan (puede haber huecos).
+
+Los números indicados explícitamente (serializer, importación de datos heredados)
+deben registrarse con registrar_contratos / registrar_ots / registrar_codigos_equipo,
+que adelantan la secuencia para que nextval() no entregue después un número usado.
+Model.save() lo hace al crear; los caminos con bulk_create lo llaman por bloque.
+
+Fuera de PostgreSQL (ej. SQLite en desarrollo) se usa el máximo actual de la tabla,
+sin garantías de concurrencia.
+"""
+import re
+from datetime import date
+
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, IntegerField, Max
+from django.db.models.functions import Cast, Substr
+
+CONTRATO_INICIO = 80000000
+SECUENCIA_CONTRATO = 'contratos_numero_contrato_seq'
+SECUENCIA_EQUIPO = 'almacenes_codigo_interno_seq'
+
+def _secuencia_ot(anio):
+    return f'contratos_numero_ot_{int(anio)}_seq'
+
+
+def _reservar(secuencia, cantidad, siguiente_libre):
+    """
+    Reserva `cantidad` valores de la secuencia (creándola si no existe).
+    `siguiente_libre()` devuelve el primer valor no usado en la tabla de origen.
+    """
+    if cantidad <= 0:
+        return []
+
+    if connection.vendor != 'postgresql':
+        inicio = siguiente_libre()
+        return list(range(inicio, inicio + cantidad))
+
+    _asegurar(secuencia, siguiente_libre)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [secuencia, cantidad])
+        return [fila[0] for fila in cursor.fetchall()]
+
+
+def _avanzar(secuencia, usado, siguiente_libre):
+    """Adelanta la secuencia para que el próximo nextval() sea mayor que `usado`"""
+    if connection.vendor != 'postgresql':
+        return  # siguiente_libre() ya considera los números guardados
+
+    _asegurar(secuencia, siguiente_libre)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT setval(%s, %s) FROM {connection.ops.quote_name(secuencia)} WHERE last_value <= %s",
+            [secuencia, usado, usado]
+        )
+
+
+def _asegurar(secuencia, siguiente_libre):
+    """Crea la secuencia si no existe, iniciando en `siguiente_libre()`"""
+    # Se consulta el catálogo cada vez (sin recordarlo por proceso): es una búsqueda
+    # por nombre en pg_class y sigue siendo correcta si la secuencia se elimina o restaura
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [secuencia])
+        if cursor.fetchone()[0] is not None:
+            return
+    # El lock dura hasta el fin de la transacción: quien espera ve la secuencia ya
+    # confirmada (IF NOT EXISTS no hace nada) o, si la otra se revirtió, la crea
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [secuencia])
+        cursor.execute(
+            f"CREATE SEQUENCE IF NOT EXISTS {connection.ops.quote_name(secuencia)} "
+            f"START WITH {int(siguiente_libre())}"
+        )
+
+
+# ---------------------------------------------------------------------------
+# Contratos
+# ---------------------------------------------------------------------------
+def _siguiente_contrato_libre():
+    from .models import Contrato
+    ultimo = Contrato.objects.filter(numero_contrato__regex=r'^[0-9]{8}$').aggregate(
+        max_num=Max('numero_contrato')
+    )['max_num']
+    return max(CONTRATO_INICIO, int(ultimo) + 1 if ultimo else CONTRATO_INICIO)
+
+
+def numeros_contrato(cantidad):
+    return [str(n).zfill(8) for n in _reservar(SECUENCIA_CONTRATO, cantidad, _siguiente_contrato_libre)]
+
+
+def numero_contrato():
+    return numeros_contrato(1)[0]
+
+
+def registrar_contratos(numeros):
+    """Adelanta la secuencia de contratos más allá de números asignados explícitamente"""
+    usados = [int(n) for n in numeros if n and re.fullmatch(r'[0-9]{8}', n)]
+    if usados:
+        _avanzar(SECUENCIA_CONTRATO, max(usados), _siguiente_contrato_libre)
+
+
+# ---------------------------------------------------------------------------
+# Órdenes de trabajo (correlativo por año)
+# ---------------------------------------------------------------------------
+def _siguiente_ot_libre(anio):
+    from .models import OrdenTrabajo
+    prefijo = f'OT{anio}'
+
+    def siguiente_libre():
+        ultimo = OrdenTrabajo.objects.filter(numero_ot__regex=rf'^{prefijo}[0-9]+$').annotate(
+            correlativo=Cast(Substr('numero_ot', len(prefijo) + 1), IntegerField())
+        ).aggregate(max_num=Max('correlativo'))['max_num']
+        return (ultimo or 0) + 1
+
+    return siguiente_libre
+
+
+def numeros_ot(cantidad, anio=None):
+    anio = anio or date.today().year
+    return [
+        f'OT{anio}{str(n).zfill(4)}'
+        for n in _reservar(_secuencia_ot(anio), cantidad, _siguiente_ot_libre(anio))
+    ]
+
+
+def numero_ot(anio=None):
+    return numeros_ot(1, anio)[0]
+
+
+def registrar_ots(numeros):
+    """Adelanta las secuencias anuales de OT más allá de números asignados explícitamente"""
+    usados = {}
+    for numero in numeros:
+        coincidencia = re.fullmatch(r'OT([0-9]{4})([0-9]+)', numero or '')
+        if coincidencia:
+            anio, correlativo = int(coincidencia[1]), int(coincidencia[2])
+            usados[anio] = max(usados.get(anio, 0), correlativo)
+    for anio, correlativo in usados.items():
+        _avanzar(_secuencia_ot(anio), correlativo, _siguiente_ot_libre(anio))
+
+
+# ---------------------------------------------------------------------------
+# Códigos internos de equipos ONU
+# ---------------------------------------------------------------------------
+def _siguiente_equipo_libre():
+    from almacenes.models import EquipoONU
+    ultimo = EquipoONU.objects.filter(codigo_interno__regex=r'^EQ-[0-9]+$').annotate(
+        correlativo=Cast(Substr('codigo_interno', 4), BigIntegerField())
+    ).aggregate(max_num=Max('correlativo'))['max_num']
+    return (ultimo or 0) + 1
+
+
+def codigos_equipo(cantidad):
+    return [f'EQ-{str(n).zfill(6)}' for n in _reservar(SECUENCIA_EQUIPO, cantidad, _siguiente_equipo_libre)]
+
+
+def codigo_equipo():
+    return codigos_equipo(1)[0]
+
+
+def registrar_codigos_equipo(codigos):
+    """Adelanta la secuencia de equipos más allá de códigos asignados explícitamente"""
+    usados = [int(c[3:]) for c in codigos if c and re.fullmatch(r'EQ-[0-9]+', c)]
+    if usados:
+        _avanzar(SECUENCIA_EQUIPO, max(usados), _siguiente_equipo_libre)
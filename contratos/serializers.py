@@ -4,61 +4,46 @@
 
 from rest_framework import serializers
 from django.core.validators import RegexValidator
+from django.db import transaction
+from . import contadores, estadisticas
 from .models import (
     Cliente, TipoTramite, FormaPago, TipoServicio, PlanComercial,
-    Contrato, Servicio, OrdenTrabajo
+    Contrato, Servicio, OrdenTrabajo, EventoEstado
 )
 
 
 class TipoServicioSerializer(serializers.ModelSerializer):
-    lotes_count = serializers.SerializerMethodField()
-    planes_count = serializers.SerializerMethodField()
+    lotes_count = serializers.IntegerField(source='total_lotes', read_only=True)
+    planes_count = serializers.IntegerField(source='total_planes', read_only=True)
 
     class Meta:
         model = TipoServicio
         fields = ['id', 'nombre', 'descripcion', 'lotes_count', 'planes_count', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
-    def get_lotes_count(self, obj):
-        # Importar aquí para evitar circular imports
-        try:
-            from apps.almacenes.models import Lote
-            return Lote.objects.filter(tipo_servicio=obj).count()
-        except ImportError:
-            return 0
-
-    def get_planes_count(self, obj):
-        return obj.plancomercial_set.count()
-
 
 class TipoTramiteSerializer(serializers.ModelSerializer):
-    contratos_count = serializers.SerializerMethodField()
+    contratos_count = serializers.IntegerField(source='total_contratos', read_only=True)
 
     class Meta:
         model = TipoTramite
         fields = ['id', 'nombre', 'descripcion', 'activo', 'contratos_count', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
-    def get_contratos_count(self, obj):
-        return obj.contrato_set.count()
-
 
 class FormaPagoSerializer(serializers.ModelSerializer):
-    contratos_count = serializers.SerializerMethodField()
+    contratos_count = serializers.IntegerField(source='total_contratos', read_only=True)
 
     class Meta:
         model = FormaPago
         fields = ['id', 'nombre', 'descripcion', 'activo', 'contratos_count', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
-    def get_contratos_count(self, obj):
-        return obj.contrato_set.count()
-
 
 class ClienteSerializer(serializers.ModelSerializer):
     nombre_completo = serializers.SerializerMethodField()
-    contratos_count = serializers.SerializerMethodField()
-    contratos_activos = serializers.SerializerMethodField()
+    contratos_count = serializers.IntegerField(source='total_contratos', read_only=True)
+    contratos_activos = serializers.IntegerField(source='total_contratos_activos', read_only=True)
 
     class Meta:
         model = Cliente
@@ -73,12 +58,6 @@ class ClienteSerializer(serializers.ModelSerializer):
     def get_nombre_completo(self, obj):
         return f"{obj.nombres} {obj.apellidos}"
 
-    def get_contratos_count(self, obj):
-        return obj.contratos.count()
-
-    def get_contratos_activos(self, obj):
-        return obj.contratos.filter(estado_contrato='ACTIVO').count()
-
     def validate_ci(self, value):
         """Validación para CI boliviano"""
         if not value.isdigit() or len(value) < 7 or len(value) > 8:
@@ -102,7 +81,7 @@ class ClienteSerializer(serializers.ModelSerializer):
 
 class PlanComercialSerializer(serializers.ModelSerializer):
     tipo_servicio_nombre = serializers.CharField(source='tipo_servicio.nombre', read_only=True)
-    servicios_count = serializers.SerializerMethodField()
+    servicios_count = serializers.IntegerField(source='total_servicios', read_only=True)
     velocidad_completa = serializers.SerializerMethodField()
 
     class Meta:
@@ -115,9 +94,6 @@ class PlanComercialSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at']
 
-    def get_servicios_count(self, obj):
-        return obj.servicio_set.count()
-
     def get_velocidad_completa(self, obj):
         if obj.velocidad_descarga and obj.velocidad_subida:
             return f"{obj.velocidad_descarga}MB/{obj.velocidad_subida}MB"
@@ -166,9 +142,14 @@ class ContratoSerializer(serializers.ModelSerializer):
         return f"{obj.cliente.nombres} {obj.cliente.apellidos}"
 
     def get_servicios_count(self, obj):
+        # Anotado por Contrato.objects.para_listado()
+        if hasattr(obj, 'servicios_total'):
+            return obj.servicios_total
         return obj.servicios.count()
 
     def get_ordenes_trabajo_count(self, obj):
+        if hasattr(obj, 'ordenes_trabajo_total'):
+            return obj.ordenes_trabajo_total
         return obj.ordenes_trabajo.count()
 
 
@@ -187,20 +168,31 @@ class ContratoCreateSerializer(serializers.ModelSerializer):
             'observaciones', 'servicios'
         ]
 
+    def validate_servicios(self, value):
+        """Todos los planes se resuelven en una sola consulta; los repetidos, inexistentes o inactivos son error"""
+        ids = list(value)
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Hay planes comerciales repetidos")
+        activos = set(PlanComercial.objects.filter(id__in=ids, activo=True).values_list('id', flat=True))
+        invalidos = [plan_id for plan_id in ids if plan_id not in activos]
+        if invalidos:
+            raise serializers.ValidationError(
+                f"Planes comerciales inexistentes o inactivos: {', '.join(map(str, invalidos))}"
+            )
+        return ids
+
     def create(self, validated_data):
         servicios_ids = validated_data.pop('servicios')
-        contrato = Contrato.objects.create(**validated_data)
-
-        # Crear servicios asociados
-        for plan_id in servicios_ids:
-            try:
-                plan = PlanComercial.objects.get(id=plan_id, activo=True)
-                Servicio.objects.create(
-                    contrato=contrato,
-                    plan_comercial=plan
-                )
-            except PlanComercial.DoesNotExist:
-                pass  # Ignorar planes que no existen o no están activos
+        with transaction.atomic():
+            contrato = Contrato.objects.create(**validated_data)
+
+            # Servicios asociados en un solo INSERT
+            servicios = Servicio.objects.bulk_create([
+                Servicio(contrato=contrato, plan_comercial_id=plan_id) for plan_id in servicios_ids
+            ])
+            # bulk_create no emite señales
+            contadores.registrar(servicios)
+            estadisticas.invalidar('tipos_servicio')
 
         return contrato
 
@@ -208,17 +200,26 @@ class ContratoCreateSerializer(serializers.ModelSerializer):
 class OrdenTrabajoSerializer(serializers.ModelSerializer):
     contrato_numero = serializers.CharField(source='contrato.numero_contrato', read_only=True)
     cliente_nombre = serializers.SerializerMethodField()
+    tecnico_nombre = serializers.SerializerMethodField()
     servicios_contrato = serializers.SerializerMethodField()
 
     class Meta:
         model = OrdenTrabajo
         fields = [
             'id', 'numero_ot', 'contrato', 'contrato_numero', 'cliente_nombre',
-            'tecnico_asignado', 'fecha_asignacion', 'fecha_programada', 'fecha_ejecucion',
+            'tecnico', 'tecnico_nombre', 'tecnico_asignado',
+            'fecha_asignacion', 'fecha_programada', 'fecha_ejecucion',
             'estado_ot', 'tipo_trabajo', 'observaciones_tecnico', 'materiales_utilizados',
             'servicios_contrato', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['numero_ot', 'created_at', 'updated_at']
+        read_only_fields = ['numero_ot', 'tecnico_asignado', 'created_at', 'updated_at']
+
+    def validate(self, attrs):
+        # El nombre del técnico se guarda al asignar (histórico de la OT)
+        if 'tecnico' in attrs:
+            tecnico = attrs['tecnico']
+            attrs['tecnico_asignado'] = tecnico.nombre_completo() if tecnico else ''
+        return attrs
 
     def get_cliente_nombre(self, obj):
         try:
@@ -226,9 +227,15 @@ class OrdenTrabajoSerializer(serializers.ModelSerializer):
         except AttributeError:
             return "Cliente no disponible"
 
+    def get_tecnico_nombre(self, obj):
+        return obj.tecnico.nombre_completo() if obj.tecnico_id else obj.tecnico_asignado
+
     def get_servicios_contrato(self, obj):
         try:
-            servicios = obj.contrato.servicios.filter(estado_servicio='ACTIVO')
+            # Precargados por OrdenTrabajo.objects.para_listado()
+            servicios = getattr(obj.contrato, 'servicios_activos', None)
+            if servicios is None:
+                servicios = obj.contrato.servicios.filter(estado_servicio='ACTIVO')
             servicios_info = []
             for s in servicios:
                 try:
@@ -239,4 +246,37 @@ class OrdenTrabajoSerializer(serializers.ModelSerializer):
                     continue
             return servicios_info
         except AttributeError:
-            return []
\ No newline at end of file
+            return []
+
+
+class OrdenTrabajoAgendaSerializer(serializers.ModelSerializer):
+    """OT resumida para la agenda de técnicos (sin servicios: una sola consulta)"""
+    contrato_numero = serializers.CharField(source='contrato.numero_contrato', read_only=True)
+    cliente_nombre = serializers.SerializerMethodField()
+    direccion_instalacion = serializers.CharField(source='contrato.direccion_instalacion', read_only=True)
+
+    class Meta:
+        model = OrdenTrabajo
+        fields = [
+            'id', 'numero_ot', 'contrato', 'contrato_numero', 'cliente_nombre', 'direccion_instalacion',
+            'fecha_programada', 'estado_ot', 'tipo_trabajo'
+        ]
+        read_only_fields = fields
+
+    def get_cliente_nombre(self, obj):
+        return f"{obj.contrato.cliente.nombres} {obj.contrato.cliente.apellidos}"
+
+
+class EventoEstadoSerializer(serializers.ModelSerializer):
+    actor_nombre = serializers.SerializerMethodField()
+
+    class Meta:
+        model = EventoEstado
+        fields = [
+            'id', 'entidad', 'entidad_id', 'estado_anterior', 'estado_nuevo',
+            'actor', 'actor_nombre', 'nota', 'fecha'
+        ]
+        read_only_fields = fields
+
+    def get_actor_nombre(self, obj):
+        return obj.actor.nombre_completo() if obj.actor else None
@@ -0,0 +1,98 @@
+# ======================================================
+# apps/contratos/signals.py
+# ======================================================
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from prod_a import catalogos
+from . import contadores
+from .models import Contrato, ContratoMensual
+
+CAMPOS_MENSUAL = ('fecha_firma', 'estado_contrato', 'tipo_tramite_id')
+
+
+def recordar_referencias(sender, instance, **kwargs):
+    """Guarda los contadores en los que cuenta la instancia al cargarla, para detectar cambios"""
+    diferidos = instance.get_deferred_fields()
+    campos = contadores.CAMPOS[sender._meta.label]
+    if instance._state.adding or any(campo in diferidos for campo in campos):
+        instance._referencias_contador = None
+    else:
+        instance._referencias_contador = contadores.referencias(instance)
+
+
+def cargar_referencias(sender, instance, **kwargs):
+    """Si la instancia se cargó con campos diferidos, obtener los valores originales de la BD"""
+    if instance._state.adding or getattr(instance, '_referencias_contador', None) is not None:
+        return
+    original = sender._base_manager.filter(pk=instance.pk).only(*contadores.CAMPOS[sender._meta.label]).first()
+    instance._referencias_contador = contadores.referencias(original) if original else frozenset()
+
+
+def actualizar_contadores_guardado(sender, instance, created, **kwargs):
+    nuevas = contadores.referencias(instance)
+    anteriores = frozenset() if created else getattr(instance, '_referencias_contador', None) or frozenset()
+    contadores.mover(anteriores, nuevas)
+    instance._referencias_contador = nuevas
+
+
+def actualizar_contadores_eliminado(sender, instance, **kwargs):
+    anteriores = getattr(instance, '_referencias_contador', None)
+    if anteriores is None:
+        anteriores = contadores.referencias(instance)
+    contadores.mover(anteriores, frozenset())
+
+
+for modelo in contadores.CAMPOS:
+    post_init.connect(recordar_referencias, sender=modelo, dispatch_uid=f'contadores:init:{modelo}')
+    pre_save.connect(cargar_referencias, sender=modelo, dispatch_uid=f'contadores:pre_save:{modelo}')
+    post_save.connect(actualizar_contadores_guardado, sender=modelo, dispatch_uid=f'contadores:save:{modelo}')
+    post_delete.connect(actualizar_contadores_eliminado, sender=modelo, dispatch_uid=f'contadores:delete:{modelo}')
+
+
+# ---------------------------------------------------------------------------
+# Resumen mensual de contratos (ContratoMensual)
+# ---------------------------------------------------------------------------
+@receiver(post_init, sender=Contrato)
+def recordar_clave_mensual(sender, instance, **kwargs):
+    diferidos = instance.get_deferred_fields()
+    if instance._state.adding or any(campo in diferidos for campo in CAMPOS_MENSUAL):
+        instance._clave_mensual = None
+    else:
+        instance._clave_mensual = ContratoMensual.clave(instance)
+
+
+@receiver(pre_save, sender=Contrato)
+def cargar_clave_mensual(sender, instance, **kwargs):
+    if instance._state.adding or getattr(instance, '_clave_mensual', None) is not None:
+        return
+    original = Contrato.objects.filter(pk=instance.pk).only(*CAMPOS_MENSUAL).first()
+    instance._clave_mensual = ContratoMensual.clave(original) if original else None
+
+
+@receiver(post_save, sender=Contrato)
+def actualizar_resumen_mensual(sender, instance, created, **kwargs):
+    nueva = ContratoMensual.clave(instance)
+    anterior = None if created else getattr(instance, '_clave_mensual', None)
+
+    if anterior != nueva:
+        if anterior is not None:
+            ContratoMensual.objects.ajustar(*anterior, -1)
+        ContratoMensual.objects.ajustar(*nueva, 1)
+
+    instance._clave_mensual = nueva
+
+
+@receiver(post_delete, sender=Contrato)
+def descontar_resumen_mensual(sender, instance, **kwargs):
+    clave = getattr(instance, '_clave_mensual', None) or ContratoMensual.clave(instance)
+    ContratoMensual.objects.ajustar(*clave, -1)
+
+
+# ---------------------------------------------------------------------------
+# Catálogos cacheados (prod_a/catalogos.py)
+# ---------------------------------------------------------------------------
+catalogos.registrar('contratos.tipos_servicio', 'contratos.TipoServicio')
+catalogos.registrar('contratos.tipos_tramite', 'contratos.TipoTramite')
+catalogos.registrar('contratos.formas_pago', 'contratos.FormaPago')
+catalogos.registrar('contratos.planes_comerciales', 'contratos.PlanComercial', 'contratos.TipoServicio')
@@ -1,3 +1,536 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from soli.models import CobfactuLocal
+from usuarios.models import Permission, Roles, Usuario
+from . import contadores, cortes, numeracion
+from .models import (
+    Cliente, Contrato, ContratoMensual, EventoEstado, FormaPago, OrdenTrabajo, PlanComercial, Servicio, TipoServicio,
+    TipoTramite
+)
+
+
+class ContratoListadoQueriesTest(TestCase):
+    """El listado de contratos tiene un número fijo de consultas, sin importar contratos ni servicios"""
+
+    @classmethod
+    def setUpTestData(cls):
+        tipos = [TipoServicio.objects.create(nombre=nombre) for nombre in ('FIBRA', 'TV')]
+        planes = [
+            PlanComercial.objects.create(tipo_servicio=tipo, nombre=f'Plan {tipo.nombre}', codigo_plan=f'P-{tipo.nombre}')
+            for tipo in tipos
+        ]
+        cls.contratos = []
+        for i in range(5):
+            cliente = Cliente.objects.create(ci=f'100{i}', nombres=f'Cliente {i}', apellidos='Perez')
+            contrato = Contrato.objects.create(cliente=cliente, direccion_instalacion=f'Calle {i}')
+            for plan in planes[:1 + i % 2]:
+                Servicio.objects.create(contrato=contrato, plan_comercial=plan)
+            for _ in range(i):
+                OrdenTrabajo.objects.create(contrato=contrato, tipo_trabajo='INSTALACION')
+            cls.contratos.append(contrato)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_listado_contratos(self):
+        # Contratos (con conteos anotados) + servicios precargados
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/contratos/contratos/')
+        self.assertEqual(response.status_code, 200)
+
+        por_id = {c['id']: c for c in response.json()['results']}
+        self.assertEqual(len(por_id), len(self.contratos))
+        contrato = por_id[self.contratos[3].id]
+        self.assertEqual(contrato['servicios_count'], 2)
+        self.assertEqual(contrato['ordenes_trabajo_count'], 3)
+        self.assertEqual(sorted(s['tipo_servicio'] for s in contrato['servicios']), ['FIBRA', 'TV'])
+
+    def test_detalle_contrato(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/contratos/contratos/{self.contratos[4].id}/')
+        self.assertEqual(response.json()['servicios_count'], 1)
+        self.assertEqual(response.json()['ordenes_trabajo_count'], 4)
+
+
+class ContadoresCatalogosTest(TestCase):
+    """Los contadores de los catálogos siguen a las escrituras y se reparan con recalcular()"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tipo_servicio = TipoServicio.objects.create(nombre='FIBRA')
+        cls.plan = PlanComercial.objects.create(tipo_servicio=cls.tipo_servicio, nombre='Plan 50', codigo_plan='P50')
+        cls.tramite = TipoTramite.objects.create(nombre='ALTA')
+        FormaPago.objects.create(nombre='EFECTIVO')
+        cls.clientes = [
+            Cliente.objects.create(ci=f'200{i}', nombres=f'Cliente {i}', apellidos='Quispe') for i in range(2)
+        ]
+
+    def test_contadores_siguen_escrituras(self):
+        contrato = Contrato.objects.create(
+            cliente=self.clientes[0], tipo_tramite=self.tramite, direccion_instalacion='Calle 1'
+        )
+        Servicio.objects.create(contrato=contrato, plan_comercial=self.plan)
+        self.clientes[0].refresh_from_db()
+        self.assertEqual((self.clientes[0].total_contratos, self.clientes[0].total_contratos_activos), (1, 1))
+
+        contrato.estado_contrato = 'SUSPENDIDO'
+        contrato.save(update_fields=['estado_contrato'])
+        # Cargado con campos diferidos: los valores originales se leen de la BD
+        movido = Contrato.objects.only('id', 'cliente_id').get(pk=contrato.pk)
+        movido.cliente = self.clientes[1]
+        movido.save()
+
+        for cliente, esperado in zip(self.clientes, [(0, 0), (1, 0)]):
+            cliente.refresh_from_db()
+            self.assertEqual((cliente.total_contratos, cliente.total_contratos_activos), esperado)
+
+        contrato.refresh_from_db()
+        contrato.delete()
+        self.plan.refresh_from_db()
+        self.tramite.refresh_from_db()
+        self.assertEqual((self.plan.total_servicios, self.tramite.total_contratos), (0, 0))
+
+        self.tipo_servicio.refresh_from_db()
+        self.assertEqual(self.tipo_servicio.total_planes, 1)
+
+    def test_recalcular_corrige_desvios(self):
+        Contrato.objects.create(cliente=self.clientes[0], direccion_instalacion='Calle 2')
+        Cliente.objects.update(total_contratos=7, total_contratos_activos=7)
+        PlanComercial.objects.update(total_servicios=3)
+
+        contadores.recalcular()
+
+        self.assertEqual(
+            list(Cliente.objects.order_by('ci').values_list('total_contratos', 'total_contratos_activos')),
+            [(1, 1), (0, 0)]
+        )
+        self.assertEqual(PlanComercial.objects.get().total_servicios, 0)
+
+    def test_listados_de_catalogos_en_una_consulta(self):
+        cache.clear()
+        client = APIClient()
+        with self.assertNumQueries(1):
+            client.get('/api/contratos/clientes/')
+        for url in [
+            '/api/contratos/tipos-servicio/', '/api/contratos/tipos-tramite/',
+            '/api/contratos/formas-pago/', '/api/contratos/planes-comerciales/'
+        ]:
+            client.get(url)
+            caches['local'].clear()
+            # Versión (cache compartido) + conteo de la página + la página
+            with self.assertNumQueries(3):
+                client.get(url)
+
+
+class CatalogosCacheadosTest(TestCase):
+    """Los catálogos se sirven desde el cache versionado y responden 304 a If-None-Match"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tramite = TipoTramite.objects.create(nombre='ALTA')
+        cls.cliente = Cliente.objects.create(ci='6001', nombres='Cliente', apellidos='Apaza')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_etag_y_version(self):
+        url = '/api/contratos/tipos-tramite/'
+        primera = self.client.get(url)
+        etag = primera['ETag']
+
+        # Solo la lectura de la versión en el cache compartido, una por petición
+        with self.assertNumQueries(2):
+            segunda = self.client.get(url)
+            no_modificado = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(segunda.json(), primera.json())
+        self.assertEqual(no_modificado.status_code, 304)
+
+        # Los contadores (UPDATE sin señales) también cambian la versión
+        with self.captureOnCommitCallbacks(execute=True):
+            Contrato.objects.create(cliente=self.cliente, tipo_tramite=self.tramite, direccion_instalacion='Calle 1')
+        tercera = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(tercera.status_code, 200)
+        self.assertNotEqual(tercera['ETag'], etag)
+        self.assertEqual(tercera.json()['results'][0]['contratos_count'], 1)
+
+        # Otra URL (filtros, página) es otra variante
+        self.assertNotEqual(self.client.get(url, {'search': 'AL'})['ETag'], tercera['ETag'])
+
+    def test_version_compartida_entre_workers(self):
+        url = '/api/contratos/tipos-tramite/'
+        etag = self.client.get(url)['ETag']
+
+        # Otro worker (cache local vacío) ve la misma versión y responde 304
+        caches['local'].clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Una escritura confirmada en ese worker cambia la versión para todos: la respuesta
+        # anterior que quede en el cache local de otro worker ya no se usa
+        with self.captureOnCommitCallbacks(execute=True):
+            TipoTramite.objects.create(nombre='BAJA')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['nombre'] for t in response.json()['results']], ['ALTA', 'BAJA'])
+
+
+class BootstrapTest(TestCase):
+    """El arranque del front-end trae usuario y catálogos en una respuesta con versión combinada"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rol = Roles.objects.create(nombre='ALMACEN')
+        cls.rol.permisos.add(Permission.objects.create(recurso='equipos', accion='leer'))
+        cls.usuario = Usuario.objects.create(codigocotel=9100, nombres='Ana', rol=cls.rol)
+        TipoTramite.objects.create(nombre='ALTA')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_bootstrap_y_304(self):
+        self.assertEqual(APIClient().get('/api/bootstrap/').status_code, 401)
+
+        datos = self.client.get('/api/bootstrap/').json()
+        self.assertEqual(datos['usuario']['permisos'], [{'recurso': 'equipos', 'accion': 'leer'}])
+        self.assertEqual([t['nombre'] for t in datos['catalogos']['tipos_tramite']], ['ALTA'])
+        self.assertEqual(set(datos['catalogos']), {
+            'tipos_servicio', 'tipos_tramite', 'formas_pago', 'planes_comerciales',
+            'marcas', 'tipos_equipo', 'estados_equipo'
+        })
+
+        # Sin cambios: usuario, permisos y las versiones (una lectura del cache compartido)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/bootstrap/', {'version': datos['version']})
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FormaPago.objects.create(nombre='QR')
+        response = self.client.get('/api/bootstrap/', HTTP_IF_NONE_MATCH=f'"{datos["version"]}"')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()['version'], datos['version'])
+        self.assertEqual([f['nombre'] for f in response.json()['catalogos']['formas_pago']], ['QR'])
+
+    def test_parametros_no_alteran_el_cache(self):
+        TipoTramite.objects.create(nombre='BAJA')
+        filtrado = self.client.get('/api/bootstrap/', {'search': 'zzz', 'ordering': '-nombre'}).json()
+        self.assertEqual([t['nombre'] for t in filtrado['catalogos']['tipos_tramite']], ['ALTA', 'BAJA'])
+
+        otro = APIClient()
+        otro.force_authenticate(Usuario.objects.create(codigocotel=9101, nombres='Luis'))
+        datos = otro.get('/api/bootstrap/').json()
+        self.assertEqual([t['nombre'] for t in datos['catalogos']['tipos_tramite']], ['ALTA', 'BAJA'])
+
+
+class ContratoMensualTest(TestCase):
+    """El resumen mensual sigue a los contratos y alimenta las estadísticas de meses cerrados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = Cliente.objects.create(ci='3001', nombres='Cliente', apellidos='Mamani')
+        cls.tramite = TipoTramite.objects.create(nombre='ALTA')
+
+    def test_resumen_sigue_al_contrato(self):
+        mes = timezone.localdate().replace(day=1)
+        contrato = Contrato.objects.create(
+            cliente=self.cliente, tipo_tramite=self.tramite, direccion_instalacion='Calle 1'
+        )
+        contrato.estado_contrato = 'SUSPENDIDO'
+        contrato.save()
+
+        self.assertEqual(
+            list(ContratoMensual.objects.filter(cantidad__gt=0).values_list('mes', 'estado_contrato', 'cantidad')),
+            [(mes, 'SUSPENDIDO', 1)]
+        )
+        contrato.delete()
+        self.assertFalse(ContratoMensual.objects.filter(cantidad__gt=0).exists())
+
+    def test_estadisticas_combinan_resumen_y_mes_en_curso(self):
+        cache.clear()
+        mes_anterior = (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1)
+        ContratoMensual.objects.create(mes=mes_anterior, estado_contrato='ACTIVO', cantidad=4)
+        Contrato.objects.create(cliente=self.cliente, direccion_instalacion='Calle 2')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().get('/api/contratos/contratos/estadisticas/')
+        datos = response.json()
+
+        self.assertEqual(datos['total_contratos'], 5)
+        self.assertEqual(datos['por_estado'], [{'estado_contrato': 'ACTIVO', 'cantidad': 5}])
+        self.assertEqual([fila['cantidad'] for fila in datos['por_mes']], [4, 1])
+
+
+class CreacionContratosTest(TestCase):
+    """Alta de contratos con sus servicios: individual y por importación masiva"""
+
+    @classmethod
+    def setUpTestData(cls):
+        tipo = TipoServicio.objects.create(nombre='FIBRA')
+        cls.planes = [
+            PlanComercial.objects.create(tipo_servicio=tipo, nombre=f'Plan {i}', codigo_plan=f'P{i}') for i in range(3)
+        ]
+        cls.tramite = TipoTramite.objects.create(nombre='ALTA')
+        cls.cliente = Cliente.objects.create(ci='4001', nombres='Cliente', apellidos='Choque')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_crear_contrato_con_servicios(self):
+        datos = {
+            'cliente': self.cliente.id, 'direccion_instalacion': 'Calle 1',
+            'servicios': [plan.id for plan in self.planes]
+        }
+        response = self.client.post('/api/contratos/contratos/', {**datos, 'servicios': [self.planes[0].id, 999]},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('999', str(response.json()['servicios']))
+        repetidos = [self.planes[0].id, self.planes[0].id]
+        response = self.client.post('/api/contratos/contratos/', {**datos, 'servicios': repetidos}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('repetidos', str(response.json()['servicios']))
+
+        response = self.client.post('/api/contratos/contratos/', datos, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Servicio.objects.filter(contrato__cliente=self.cliente).count(), 3)
+        self.assertEqual(
+            list(PlanComercial.objects.order_by('id').values_list('total_servicios', flat=True)), [1, 1, 1]
+        )
+
+    def test_importar_contratos(self):
+        Contrato.objects.create(cliente=self.cliente, numero_contrato='70000001', direccion_instalacion='Calle 0')
+        archivo = SimpleUploadedFile('contratos.csv', (
+            "ci,direccion_instalacion,numero_contrato,tipo_tramite,planes,fecha_firma\n"
+            "4001,Calle 1,70000002,alta,P0|P1,2023-03-15\n"
+            "4001,Calle 2,,,P2,\n"
+            "9999,Calle 3,,,,\n"
+            "4001,Calle 4,70000001,,,\n"
+            "4001,Calle 5,,OTRO,,\n"
+            "4001,Calle 6,,,P9,\n"
+            "4001,Calle 7,,,,31/02/2023\n"
+        ).encode())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/contratos/contratos/importar/', {'archivo': archivo})
+        self.assertEqual(response.status_code, 201)
+        reporte = response.json()
+        self.assertEqual((reporte['contratos_creados'], reporte['servicios_creados']), (2, 3))
+        self.assertEqual(
+            [(e['fila'], e['campo']) for e in reporte['errores']],
+            [(4, 'ci'), (5, 'numero_contrato'), (6, 'tipo_tramite'), (7, 'planes'), (8, 'fecha_firma')]
+        )
+
+        importado = Contrato.objects.get(numero_contrato='70000002')
+        self.assertEqual(importado.tipo_tramite, self.tramite)
+        self.assertEqual(importado.servicios.count(), 2)
+        self.assertEqual(importado.fecha_firma, date(2023, 3, 15))
+        self.cliente.refresh_from_db()
+        self.tramite.refresh_from_db()
+        self.assertEqual((self.cliente.total_contratos, self.tramite.total_contratos), (3, 1))
+        self.assertEqual(sum(ContratoMensual.objects.values_list('cantidad', flat=True)), 3)
+        self.assertEqual(ContratoMensual.objects.get(mes=date(2023, 3, 1)).cantidad, 1)
+
+    def test_importar_numero_explicito_y_crear(self):
+        """Un número heredado del archivo adelanta la secuencia: el alta siguiente no colisiona"""
+        archivo = SimpleUploadedFile('contratos.csv', (
+            "ci,direccion_instalacion,numero_contrato\n"
+            "4001,Calle 1,90000005\n"
+            "4001,Calle 2,\n"
+        ).encode())
+        registrar_real = numeracion.registrar_contratos
+        with mock.patch('contratos.importacion.registrar_contratos', wraps=registrar_real) as registrar:
+            response = self.client.post('/api/contratos/contratos/importar/', {'archivo': archivo})
+        self.assertEqual(response.status_code, 201, response.content)
+        registrar.assert_called_once_with(['90000005'])
+        self.assertEqual(response.json()['contratos_creados'], 2)
+
+        response = self.client.post('/api/contratos/contratos/', {
+            'cliente': self.cliente.id, 'direccion_instalacion': 'Calle 3', 'servicios': [self.planes[0].id]
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertGreater(Contrato.objects.get(direccion_instalacion='Calle 3').numero_contrato, '90000005')
+
+
+class CortesPorDeudaTest(TestCase):
+    """Corte y reposición masiva de servicios según las facturas impagas del contrato"""
+
+    @classmethod
+    def setUpTestData(cls):
+        tipo = TipoServicio.objects.create(nombre='FIBRA')
+        planes = [
+            PlanComercial.objects.create(tipo_servicio=tipo, nombre=f'Plan {i}', codigo_plan=f'P{i}') for i in range(2)
+        ]
+        cliente = Cliente.objects.create(ci='5001', nombres='Cliente', apellidos='Condori')
+        cls.contratos = []
+        for i in range(3):
+            contrato = Contrato.objects.create(
+                cliente=cliente, numero_contrato=f'8000000{i}', direccion_instalacion=f'Calle {i}'
+            )
+            for plan in planes:
+                Servicio.objects.create(contrato=contrato, plan_comercial=plan)
+            cls.contratos.append(contrato)
+
+        vencida = timezone.localdate() - timedelta(days=90)
+        for contrato, estado, emision in [
+            (80000000, 'NP', vencida),                   # moroso
+            (80000001, 'G', timezone.localdate()),        # deuda reciente
+            (80000002, 'P', vencida),                     # pagada
+        ]:
+            CobfactuLocal.objects.create(
+                factura_interna=contrato, contrato=contrato, estado=estado, fecha_emision=emision
+            )
+
+    def test_suspender_y_reactivar(self):
+        self.assertEqual(
+            cortes.suspender_morosos(dias=60, dry_run=True), {'dry_run': True, 'servicios': 2, 'contratos': 1}
+        )
+        self.assertFalse(Servicio.objects.filter(estado_servicio='SUSPENDIDO').exists())
+
+        self.assertEqual(cortes.suspender_morosos(dias=60, chunk_size=1)['servicios'], 2)
+        self.assertEqual(
+            set(Servicio.objects.filter(estado_servicio='SUSPENDIDO').values_list('contrato', flat=True)),
+            {self.contratos[0].id}
+        )
+        self.assertEqual(
+            EventoEstado.objects.filter(entidad=EventoEstado.SERVICIO, nota=cortes.NOTA_CORTE).count(), 2
+        )
+
+        # Un servicio suspendido a mano no se reactiva con el proceso
+        manual = Servicio.objects.filter(contrato=self.contratos[1]).first()
+        Servicio.objects.filter(pk=manual.pk).update(estado_servicio='SUSPENDIDO')
+
+        self.assertEqual(cortes.reactivar_pagados(dias=60)['servicios'], 0)
+        CobfactuLocal.objects.filter(contrato=80000000).update(estado='P')
+        self.assertEqual(cortes.reactivar_pagados(dias=60)['servicios'], 2)
+        self.assertEqual(list(Servicio.objects.filter(estado_servicio='SUSPENDIDO')), [manual])
+
+    def test_contrato_de_mas_de_8_digitos_no_coincide(self):
+        # LPAD('180000001', 8) sería '18000000': no debe suspender ese contrato
+        otro = Contrato.objects.create(
+            cliente=self.contratos[0].cliente, numero_contrato='18000000', direccion_instalacion='Calle 9'
+        )
+        Servicio.objects.create(contrato=otro, plan_comercial=self.contratos[0].servicios.first().plan_comercial)
+        CobfactuLocal.objects.create(
+            factura_interna=9, contrato=180000001, estado='NP', fecha_emision=timezone.localdate() - timedelta(days=90)
+        )
+
+        self.assertEqual(cortes.suspender_morosos(dias=60, dry_run=True)['contratos'], 1)
+        self.assertEqual(list(cortes.numeros_morosos(dias=60).values_list('numero', flat=True)), ['80000000'])
+
+
+class AgendaTecnicosTest(TestCase):
+    """La agenda de varios técnicos en un rango de fechas se arma con una sola consulta"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cliente = Cliente.objects.create(ci='3001', nombres='Ana', apellidos='Mamani')
+        contrato = Contrato.objects.create(cliente=cliente, direccion_instalacion='Av. Arce 1')
+        cls.tecnicos = [
+            Usuario.objects.create(codigocotel=100 + i, nombres=f'Tecnico{i}', apellidopaterno='Choque')
+            for i in range(3)
+        ]
+        cls.hoy = date(2026, 10, 19)
+        for dia in range(5):
+            for tecnico in cls.tecnicos:
+                OrdenTrabajo.objects.create(
+                    contrato=contrato, tecnico=tecnico, tipo_trabajo='INSTALACION',
+                    estado_ot='ASIGNADA', fecha_programada=cls.hoy + timedelta(days=dia)
+                )
+        OrdenTrabajo.objects.create(
+            contrato=contrato, tecnico=cls.tecnicos[0], tipo_trabajo='INSTALACION',
+            estado_ot='COMPLETADA', fecha_programada=cls.hoy
+        )
+
+    def test_agenda_rango_varios_tecnicos(self):
+        with self.assertNumQueries(1):
+            response = APIClient().get('/api/contratos/ordenes-trabajo/agenda_tecnico/', {
+                'tecnicos': f'{self.tecnicos[0].id},{self.tecnicos[2].id}',
+                'desde': '2026-10-20', 'hasta': '2026-10-22'
+            })
+        self.assertEqual(response.status_code, 200, response.content)
+        agenda = response.json()['tecnicos']
+        self.assertEqual([t['tecnico'] for t in agenda], [self.tecnicos[0].id, self.tecnicos[2].id])
+        self.assertEqual(
+            [o['fecha_programada'] for o in agenda[0]['ordenes']], ['2026-10-20', '2026-10-21', '2026-10-22']
+        )
+
+    def test_agenda_rango_invalido(self):
+        response = APIClient().get('/api/contratos/ordenes-trabajo/agenda_tecnico/', {
+            'desde': '2026-10-20', 'hasta': '2026-10-01'
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_asignar_tecnico(self):
+        ot = OrdenTrabajo.objects.filter(estado_ot='COMPLETADA').get()
+        response = APIClient().post(
+            f'/api/contratos/ordenes-trabajo/{ot.id}/asignar_tecnico/',
+            {'tecnico': self.tecnicos[1].id, 'fecha_programada': '2026-10-25'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['tecnico'], self.tecnicos[1].id)
+        self.assertEqual(response.json()['tecnico_asignado'], self.tecnicos[1].nombre_completo())
+
+    def test_formato_anterior(self):
+        # asignar_tecnico con texto libre: se vincula por código Cotel o nombre, si no queda solo el texto
+        ot = OrdenTrabajo.objects.filter(estado_ot='COMPLETADA').get()
+        url = f'/api/contratos/ordenes-trabajo/{ot.id}/asignar_tecnico/'
+        response = APIClient().post(url, {'tecnico_asignado': ' tecnico1  choque '}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['tecnico'], self.tecnicos[1].id)
+        response = APIClient().post(url, {'tecnico_asignado': '102'}, format='json')
+        self.assertEqual(response.json()['tecnico'], self.tecnicos[2].id)
+        response = APIClient().post(url, {'tecnico_asignado': 'Contratista Externo'}, format='json')
+        self.assertEqual((response.json()['tecnico'], response.json()['tecnico_asignado']),
+                         (None, 'Contratista Externo'))
+
+        # agenda_tecnico con ?tecnico=<nombre> o solo ?fecha=: lista de OTs abiertas
+        response = APIClient().get('/api/contratos/ordenes-trabajo/agenda_tecnico/', {
+            'tecnico': 'externo', 'fecha': '2026-10-19'
+        })
+        self.assertEqual([o['id'] for o in response.json()], [ot.id])
+        response = APIClient().get('/api/contratos/ordenes-trabajo/agenda_tecnico/', {'fecha': '2026-10-20'})
+        self.assertEqual(len(response.json()), len(self.tecnicos))
+
+
+class NumeracionTest(TestCase):
+    """Los números indicados explícitamente adelantan la secuencia correspondiente"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = Cliente.objects.create(ci='8001', nombres='Cliente', apellidos='Flores')
+
+    def test_registrar_numeros_explicitos(self):
+        with mock.patch.object(numeracion, '_avanzar') as avanzar:
+            numeracion.registrar_contratos(['00001234', 'A-1', '80000010', ''])
+            numeracion.registrar_ots(['OT20250012', 'OT20250003', 'OT20260001', 'X'])
+            numeracion.registrar_codigos_equipo(['EQ-000120', 'EQ-9', 'OTRO'])
+            numeracion.registrar_contratos(['sin-numero'])
+
+        self.assertEqual(
+            [c.args[:2] for c in avanzar.call_args_list],
+            [
+                (numeracion.SECUENCIA_CONTRATO, 80000010),
+                (numeracion._secuencia_ot(2025), 12),
+                (numeracion._secuencia_ot(2026), 1),
+                (numeracion.SECUENCIA_EQUIPO, 120),
+            ]
+        )
 
-# Create your tests here.
+    def test_save_registra_numero_explicito(self):
+        with mock.patch.object(numeracion, 'registrar_contratos') as registrar:
+            contrato = Contrato.objects.create(
+                cliente=self.cliente, numero_contrato='90000000', direccion_instalacion='Calle 1'
+            )
+            Contrato.objects.create(cliente=self.cliente, direccion_instalacion='Calle 2')
+            contrato.save()
+        registrar.assert_called_once_with(['90000000'])
+        # Fuera de PostgreSQL el siguiente número sale del máximo de la tabla
+        siguiente = Contrato.objects.create(cliente=self.cliente, direccion_instalacion='Calle 3')
+        self.assertEqual(siguiente.numero_contrato, '90000002')
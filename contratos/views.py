@@ -4,24 +4,37 @@
 
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count, Q
-from datetime import date, datetime, timedelta
+from django.db import transaction
+from django.db.models import Q
+from datetime import date, datetime
 from .models import (
     Cliente, TipoTramite, FormaPago, TipoServicio, PlanComercial,
-    Contrato, Servicio, OrdenTrabajo
+    Contrato, Servicio, OrdenTrabajo, EventoEstado
 )
 from .serializers import (
     ClienteSerializer, TipoTramiteSerializer, FormaPagoSerializer,
     TipoServicioSerializer, PlanComercialSerializer, ContratoSerializer,
-    ContratoCreateSerializer, ServicioSerializer, OrdenTrabajoSerializer
+    ContratoCreateSerializer, ServicioSerializer, OrdenTrabajoSerializer, OrdenTrabajoAgendaSerializer
 )
+from prod_a.archivos import ArchivoInvalido, leer_filas
+from prod_a.catalogos import CatalogoCacheadoMixin
+from prod_a.paginacion import PaginacionCursor, PaginacionEstimada
+from usuarios.models import Usuario
+from .eventos import HistorialEstadosMixin, actor_de
+from .estadisticas import respuesta as respuesta_estadistica
+from .importacion import COLUMNAS_OBLIGATORIAS, ImportadorContratos
 
+MAX_DIAS_AGENDA = 62
 
-class TipoServicioViewSet(viewsets.ModelViewSet):
+
+class TipoServicioViewSet(CatalogoCacheadoMixin, viewsets.ModelViewSet):
     queryset = TipoServicio.objects.all()
     serializer_class = TipoServicioSerializer
+    catalogo = 'contratos.tipos_servicio'
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'descripcion']
     ordering = ['nombre']
@@ -36,35 +49,23 @@ class TipoServicioViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
-        """Estadísticas de tipos de servicio"""
-        stats = TipoServicio.objects.annotate(
-            total_planes=Count('plancomercial'),
-            total_servicios=Count('plancomercial__servicio')
-        ).order_by('-total_servicios')
-
-        data = []
-        for tipo in stats:
-            data.append({
-                'id': tipo.id,
-                'nombre': tipo.nombre,
-                'total_planes': tipo.total_planes,
-                'total_servicios': tipo.total_servicios
-            })
-
-        return Response(data)
+        """Estadísticas de tipos de servicio (cacheadas, ver contratos/estadisticas.py)"""
+        return respuesta_estadistica('tipos_servicio', clave_lista='tipos_servicio')
 
 
-class TipoTramiteViewSet(viewsets.ModelViewSet):
+class TipoTramiteViewSet(CatalogoCacheadoMixin, viewsets.ModelViewSet):
     queryset = TipoTramite.objects.filter(activo=True)
     serializer_class = TipoTramiteSerializer
+    catalogo = 'contratos.tipos_tramite'
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'descripcion']
     ordering = ['nombre']
 
 
-class FormaPagoViewSet(viewsets.ModelViewSet):
+class FormaPagoViewSet(CatalogoCacheadoMixin, viewsets.ModelViewSet):
     queryset = FormaPago.objects.filter(activo=True)
     serializer_class = FormaPagoSerializer
+    catalogo = 'contratos.formas_pago'
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'descripcion']
     ordering = ['nombre']
@@ -73,10 +74,12 @@ class FormaPagoViewSet(viewsets.ModelViewSet):
 class ClienteViewSet(viewsets.ModelViewSet):
     queryset = Cliente.objects.all()
     serializer_class = ClienteSerializer
+    pagination_class = PaginacionCursor
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['ci', 'nombres', 'apellidos', 'telefono']
     ordering_fields = ['nombres', 'apellidos', 'fecha_registro']
-    ordering = ['-fecha_registro']
+    # Mismo orden que -fecha_registro (auto_now_add) pero único: estable para el cursor
+    ordering = ['-id']
     filterset_fields = ['estado', 'zona', 'ciudad']
 
     @action(detail=True, methods=['get'])
@@ -103,26 +106,14 @@ class ClienteViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
-        """Estadísticas de clientes"""
-        total_clientes = self.queryset.count()
-        por_estado = self.queryset.values('estado').annotate(
-            cantidad=Count('id')
-        ).order_by('-cantidad')
+        """Estadísticas de clientes (cacheadas, ver contratos/estadisticas.py)"""
+        return respuesta_estadistica('clientes')
 
-        por_zona = self.queryset.values('zona').annotate(
-            cantidad=Count('id')
-        ).order_by('-cantidad')[:10]
 
-        return Response({
-            'total_clientes': total_clientes,
-            'por_estado': list(por_estado),
-            'top_zonas': list(por_zona)
-        })
-
-
-class PlanComercialViewSet(viewsets.ModelViewSet):
+class PlanComercialViewSet(CatalogoCacheadoMixin, viewsets.ModelViewSet):
     queryset = PlanComercial.objects.select_related('tipo_servicio')
     serializer_class = PlanComercialSerializer
+    catalogo = 'contratos.planes_comerciales'
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'codigo_plan', 'descripcion']
     ordering_fields = ['nombre', 'precio_mensual', 'created_at']
@@ -152,13 +143,17 @@ class PlanComercialViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ContratoViewSet(viewsets.ModelViewSet):
-    queryset = Contrato.objects.select_related('cliente', 'tipo_tramite', 'forma_pago')
+class ContratoViewSet(HistorialEstadosMixin, viewsets.ModelViewSet):
+    queryset = Contrato.objects.para_listado()
+    pagination_class = PaginacionCursor
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['numero_contrato', 'cliente__nombres', 'cliente__apellidos', 'cliente__ci']
     ordering_fields = ['numero_contrato', 'fecha_firma']
-    ordering = ['-fecha_firma']
+    # Orden de inserción (único, estable para el cursor). No equivale a -fecha_firma: los
+    # contratos importados llevan su fecha de firma histórica. Por firma: ?ordering=-fecha_firma
+    ordering = ['-id']
     filterset_fields = ['estado_contrato', 'tipo_tramite', 'forma_pago']
+    entidad_eventos = EventoEstado.CONTRATO
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -209,52 +204,60 @@ class ContratoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        estado_anterior = contrato.estado_contrato
         contrato.estado_contrato = nuevo_estado
-        if observaciones:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
-            nueva_obs = f"[{timestamp}] Estado: {nuevo_estado} - {observaciones}"
-            if contrato.observaciones:
-                contrato.observaciones = f"{contrato.observaciones}\n{nueva_obs}"
-            else:
-                contrato.observaciones = nueva_obs
-
-        contrato.save()
+        with transaction.atomic():
+            contrato.save(update_fields=['estado_contrato', 'updated_at'])
+            EventoEstado.objects.registrar(
+                EventoEstado.CONTRATO, contrato.pk, nuevo_estado, estado_anterior,
+                actor=actor_de(request), nota=observaciones
+            )
 
         serializer = self.get_serializer(contrato)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def importar(self, request):
+        """
+        Importación masiva de contratos con sus servicios desde un archivo CSV/XLSX
+        (ver contratos/importacion.py). Campo 'archivo' (multipart); opcional 'dry_run'.
+        Devuelve el reporte de contratos creados y errores por fila.
+        """
+        archivo = request.FILES.get('archivo')
+        if not archivo:
+            return Response(
+                {'error': 'Debe adjuntar un archivo en el campo "archivo"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'si')
+
+        importador = ImportadorContratos(dry_run=dry_run)
+        try:
+            reporte = importador.procesar(leer_filas(archivo, COLUMNAS_OBLIGATORIAS))
+        except ArchivoInvalido as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if reporte['contratos_creados'] and not dry_run:
+            return Response(reporte, status=status.HTTP_201_CREATED)
+        return Response(reporte)
+
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
-        """Estadísticas de contratos"""
-        total_contratos = self.queryset.count()
-        por_estado = self.queryset.values('estado_contrato').annotate(
-            cantidad=Count('id')
-        ).order_by('-cantidad')
-
-        # Contratos por mes (últimos 12 meses)
-        desde = date.today() - timedelta(days=365)
-        por_mes = self.queryset.filter(
-            fecha_firma__gte=desde
-        ).extra(
-            select={'mes': "DATE_TRUNC('month', fecha_firma)"}
-        ).values('mes').annotate(
-            cantidad=Count('id')
-        ).order_by('mes')
-
-        return Response({
-            'total_contratos': total_contratos,
-            'por_estado': list(por_estado),
-            'por_mes': list(por_mes)
-        })
-
-
-class ServicioViewSet(viewsets.ModelViewSet):
+        """Estadísticas de contratos (cacheadas, ver contratos/estadisticas.py)"""
+        return respuesta_estadistica('contratos')
+
+
+class ServicioViewSet(HistorialEstadosMixin, viewsets.ModelViewSet):
     queryset = Servicio.objects.select_related('contrato__cliente', 'plan_comercial__tipo_servicio')
     serializer_class = ServicioSerializer
+    pagination_class = PaginacionCursor
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['contrato__numero_contrato', 'contrato__cliente__nombres']
+    entidad_eventos = EventoEstado.SERVICIO
     ordering_fields = ['fecha_activacion']
-    ordering = ['-fecha_activacion']
+    # Mismo orden que -fecha_activacion (auto_now_add) pero único: estable para el cursor
+    ordering = ['-id']
 
     # CAMBIAR: Eliminar filtros que causan problemas con templates
     # filterset_fields = ['estado_servicio', 'plan_comercial__tipo_servicio']
@@ -282,16 +285,14 @@ class ServicioViewSet(viewsets.ModelViewSet):
         servicio = self.get_object()
         observaciones = request.data.get('observaciones', '')
 
+        estado_anterior = servicio.estado_servicio
         servicio.estado_servicio = 'SUSPENDIDO'
-        if observaciones:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
-            nueva_obs = f"[{timestamp}] Suspendido - {observaciones}"
-            if servicio.observaciones:
-                servicio.observaciones = f"{servicio.observaciones}\n{nueva_obs}"
-            else:
-                servicio.observaciones = nueva_obs
-
-        servicio.save()
+        with transaction.atomic():
+            servicio.save(update_fields=['estado_servicio', 'updated_at'])
+            EventoEstado.objects.registrar(
+                EventoEstado.SERVICIO, servicio.pk, servicio.estado_servicio, estado_anterior,
+                actor=actor_de(request), nota=observaciones
+            )
 
         serializer = self.get_serializer(servicio)
         return Response(serializer.data)
@@ -302,25 +303,64 @@ class ServicioViewSet(viewsets.ModelViewSet):
         servicio = self.get_object()
         observaciones = request.data.get('observaciones', '')
 
+        estado_anterior = servicio.estado_servicio
         servicio.estado_servicio = 'ACTIVO'
         servicio.fecha_desactivacion = None
-        if observaciones:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
-            nueva_obs = f"[{timestamp}] Reactivado - {observaciones}"
-            if servicio.observaciones:
-                servicio.observaciones = f"{servicio.observaciones}\n{nueva_obs}"
-            else:
-                servicio.observaciones = nueva_obs
-
-        servicio.save()
+        with transaction.atomic():
+            servicio.save(update_fields=['estado_servicio', 'fecha_desactivacion', 'updated_at'])
+            EventoEstado.objects.registrar(
+                EventoEstado.SERVICIO, servicio.pk, servicio.estado_servicio, estado_anterior,
+                actor=actor_de(request), nota=observaciones
+            )
 
         serializer = self.get_serializer(servicio)
         return Response(serializer.data)
 
 
+def _ids_tecnicos(request):
+    """
+    Ids de técnicos de ?tecnicos=1,2 y/o ?tecnico=1&tecnico=2 (ValueError si no son numéricos).
+    Los ?tecnico= de texto (formato anterior, nombre del técnico) se devuelven aparte.
+    """
+    valores = [valor.strip() for valor in request.query_params.getlist('tecnico') if valor.strip()]
+    textos = [valor for valor in valores if not valor.isdigit()]
+    valores = [valor for valor in valores if valor.isdigit()]
+    valores += (request.query_params.get('tecnicos') or '').split(',')
+    return [int(valor) for valor in valores if valor.strip()], textos
+
+
+def _filtro_textos_tecnico(textos):
+    """Filtro del formato anterior: tecnico_asignado contiene alguno de los textos"""
+    filtro = Q()
+    for texto in textos:
+        filtro |= Q(tecnico_asignado__icontains=texto)
+    return filtro
+
+
+def _tecnico_por_texto(texto):
+    """
+    Usuario activo que corresponde al texto libre del formato anterior de asignar_tecnico:
+    código Cotel o nombre completo exacto (sin distinguir mayúsculas ni espacios), como
+    en la migración 0010. None si no hay uno solo.
+    """
+    normalizado = ' '.join(texto.upper().split())
+    activos = Usuario.objects.filter(is_active=True)
+    if normalizado.isdigit():
+        return activos.filter(codigocotel=int(normalizado)).first()
+    candidatos = [
+        usuario for usuario in activos.filter(nombres__iexact=normalizado.split(' ')[0])
+        if ' '.join(
+            f"{usuario.nombres or ''} {usuario.apellidopaterno or ''} {usuario.apellidomaterno or ''}".upper().split()
+        ) == normalizado
+    ]
+    return candidatos[0] if len(candidatos) == 1 else None
+
+
 class OrdenTrabajoViewSet(viewsets.ModelViewSet):
     queryset = OrdenTrabajo.objects.select_related('contrato__cliente')
     serializer_class = OrdenTrabajoSerializer
+    # fecha_programada admite nulos: no sirve como posición de cursor
+    pagination_class = PaginacionEstimada
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['numero_ot', 'contrato__numero_contrato', 'tecnico_asignado']
     ordering_fields = ['fecha_programada', 'fecha_asignacion']
@@ -331,7 +371,7 @@ class OrdenTrabajoViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Queryset que maneja relaciones faltantes"""
-        queryset = OrdenTrabajo.objects.select_related('contrato__cliente')
+        queryset = OrdenTrabajo.objects.para_listado()
 
         # Filtros manuales desde query params
         estado = self.request.query_params.get('estado_ot')
@@ -342,54 +382,107 @@ class OrdenTrabajoViewSet(viewsets.ModelViewSet):
         if tipo_trabajo:
             queryset = queryset.filter(tipo_trabajo__icontains=tipo_trabajo)
 
-        tecnico = self.request.query_params.get('tecnico_asignado')
-        if tecnico:
-            queryset = queryset.filter(tecnico_asignado__icontains=tecnico)
+        try:
+            tecnicos, textos = _ids_tecnicos(self.request)
+        except ValueError:
+            raise ValidationError({'tecnicos': 'Use ids de técnico numéricos'})
+        if tecnicos:
+            queryset = queryset.filter(tecnico_id__in=tecnicos)
+        if textos:
+            queryset = queryset.filter(_filtro_textos_tecnico(textos))
 
         return queryset
 
     @action(detail=False, methods=['get'])
     def agenda_tecnico(self, request):
-        """Agenda de trabajo por técnico"""
-        tecnico = request.query_params.get('tecnico')
-        fecha = request.query_params.get('fecha')  # YYYY-MM-DD
+        """
+        Agenda de OTs abiertas por técnico en un rango de fechas, en una sola consulta.
+        ?tecnicos=3,7 (o ?tecnico=3&tecnico=7), ?desde=YYYY-MM-DD&hasta=YYYY-MM-DD
+        (por defecto hoy; ?fecha= equivale a un solo día).
+
+        Formato anterior, mientras el front-end migra: sin ninguno de esos parámetros
+        (solo ?fecha=) o con ?tecnico=<nombre>, responde la lista de OTs abiertas
+        filtrada por tecnico_asignado.
+        """
+        try:
+            tecnicos, textos = _ids_tecnicos(request)
+            fecha = request.query_params.get('fecha')
+            desde = request.query_params.get('desde') or fecha
+            desde = datetime.strptime(desde, '%Y-%m-%d').date() if desde else date.today()
+            hasta = request.query_params.get('hasta') or fecha
+            hasta = datetime.strptime(hasta, '%Y-%m-%d').date() if hasta else desde
+        except ValueError:
+            return Response(
+                {'error': 'Parámetros inválidos. Use fechas YYYY-MM-DD e ids de técnico numéricos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        queryset = self.get_queryset()
+        nuevos = tecnicos or any(request.query_params.get(campo) for campo in ('desde', 'hasta'))
+        if textos or not nuevos:
+            return self._agenda_anterior(textos, fecha and desde)
 
-        if tecnico:
-            queryset = queryset.filter(tecnico_asignado__icontains=tecnico)
+        if hasta < desde or (hasta - desde).days >= MAX_DIAS_AGENDA:
+            return Response(
+                {'error': f'El rango debe ser de 1 a {MAX_DIAS_AGENDA} días'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
+        agenda = []
+        for orden in OrdenTrabajo.objects.agenda(desde, hasta, tecnicos):
+            if not agenda or agenda[-1]['tecnico'] != orden.tecnico_id:
+                agenda.append({
+                    'tecnico': orden.tecnico_id,
+                    'tecnico_nombre': orden.tecnico.nombre_completo(),
+                    'ordenes': []
+                })
+            agenda[-1]['ordenes'].append(orden)
+
+        for tecnico in agenda:
+            tecnico['ordenes'] = OrdenTrabajoAgendaSerializer(tecnico['ordenes'], many=True).data
+
+        return Response({'desde': desde, 'hasta': hasta, 'tecnicos': agenda})
+
+    def _agenda_anterior(self, textos, fecha):
+        """Respuesta del formato anterior de agenda_tecnico: lista de OTs abiertas"""
+        queryset = OrdenTrabajo.objects.para_listado().filter(
+            _filtro_textos_tecnico(textos), estado_ot__in=OrdenTrabajo.ESTADOS_ABIERTOS
+        ).order_by(*self.ordering)
         if fecha:
-            try:
-                fecha_obj = datetime.strptime(fecha, '%Y-%m-%d').date()
-                queryset = queryset.filter(fecha_programada=fecha_obj)
-            except ValueError:
-                return Response(
-                    {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-        queryset = queryset.filter(
-            estado_ot__in=['PENDIENTE', 'ASIGNADA', 'EN_PROCESO']
-        )
-
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+            queryset = queryset.filter(fecha_programada=fecha)
+        return Response(self.get_serializer(queryset, many=True).data)
 
     @action(detail=True, methods=['post'])
     def asignar_tecnico(self, request, pk=None):
-        """Asignar técnico a una OT"""
+        """
+        Asignar técnico (id de usuario en `tecnico`) a una OT.
+        Formato anterior, mientras el front-end migra: texto libre en `tecnico_asignado`;
+        se vincula al usuario si el texto es su código Cotel o su nombre completo.
+        """
         ot = self.get_object()
-        tecnico = request.data.get('tecnico_asignado')
+        tecnico_id = request.data.get('tecnico')
+        texto = str(request.data.get('tecnico_asignado') or '').strip()
         fecha_programada = request.data.get('fecha_programada')
 
-        if not tecnico:
+        if not tecnico_id and not texto:
             return Response(
                 {'error': 'Técnico requerido'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        ot.tecnico_asignado = tecnico
+        if tecnico_id:
+            try:
+                tecnico = Usuario.objects.get(pk=tecnico_id, is_active=True)
+            except (Usuario.DoesNotExist, ValueError):
+                return Response(
+                    {'error': 'Técnico no encontrado'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            texto = tecnico.nombre_completo()
+        else:
+            tecnico = _tecnico_por_texto(texto)
+
+        ot.tecnico = tecnico
+        ot.tecnico_asignado = texto
         ot.estado_ot = 'ASIGNADA'
         ot.fecha_asignacion = date.today()
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PlanesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'planes'
+
+    def ready(self):
+        from . import estadisticas, signals  # noqa: F401
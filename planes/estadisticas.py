@@ -0,0 +1,77 @@
+# ======================================================
+# apps/planes/estadisticas.py
+# ======================================================
+"""
+Tablero de estadísticas de clientes de planes (ver contratos/estadisticas.py).
+
+Un GROUP BY estado × tipo × cobertura (a lo sumo 20 filas) da el resumen y todos
+los desgloses; las zonas van en una segunda consulta agrupada. El rango de
+fechas filtra por fecha_registro en ambas, con límites datetime del día (sin
+convertir la columna a fecha, para que pueda usar su índice).
+
+Los clientes registrados antes de existir fecha_registro la tienen vacía y no
+hay otro dato del que derivarla: quedan fuera de los totales de un rango y
+resumen.total_sin_fecha_registro informa cuántos son.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from contratos.estadisticas import tablero, totalizar
+from .models import Cliente
+
+TOP_ZONAS = 5
+ESTADOS_PENDIENTES = ('PEND_COBERTURA', 'PEND_EQUIPO', 'PEND_INSTALACION')
+
+
+@tablero('planes_clientes', 'planes.Cliente')
+def clientes(desde=None, hasta=None):
+    sin_fecha = Q(fecha_registro__isnull=True)
+    en_rango = Q()
+    if desde:
+        en_rango &= Q(fecha_registro__gte=_inicio_del_dia(desde))
+    if hasta:
+        en_rango &= Q(fecha_registro__lt=_inicio_del_dia(hasta + timedelta(days=1)))
+
+    todos = Cliente.objects.order_by()
+    clientes = todos.filter(en_rango)
+    # Con rango, los clientes sin fecha se leen en la misma consulta solo para contarlos aparte
+    filas = list((todos.filter(en_rango | sin_fecha) if en_rango else todos).values(
+        'estado', 'tipo_cliente', 'cobertura'
+    ).annotate(
+        total=Count('id', filter=en_rango) if en_rango else Count('id'),
+        sin_fecha=Count('id', filter=sin_fecha),
+    ))
+    total_sin_fecha = sum(fila['sin_fecha'] for fila in filas)
+    filas = [fila for fila in filas if fila['total']]
+    top_zonas = list(clientes.values('zona').annotate(total=Count('id')).order_by('-total')[:TOP_ZONAS])
+
+    por_estado = totalizar(filas, ['estado'], medida='total')
+    for fila in por_estado:
+        for cobertura in ('CON_COBERTURA', 'SIN_COBERTURA'):
+            fila[cobertura.lower()] = sum(
+                f['total'] for f in filas if f['estado'] == fila['estado'] and f['cobertura'] == cobertura
+            )
+
+    total = sum(fila['total'] for fila in filas)
+    por_estado_total = {fila['estado']: fila['total'] for fila in por_estado}
+    activos = por_estado_total.get('ACTIVO', 0)
+    return {
+        'resumen': {
+            'total_clientes': total,
+            'total_activos': activos,
+            'total_pendientes': sum(por_estado_total.get(estado, 0) for estado in ESTADOS_PENDIENTES),
+            'total_suspendidos': por_estado_total.get('SUSPENDIDO', 0),
+            'porcentaje_activos': round(activos / total * 100, 2) if total else 0,
+            'total_sin_fecha_registro': total_sin_fecha,
+        },
+        'por_estado': por_estado,
+        'por_tipo': totalizar(filas, ['tipo_cliente'], medida='total'),
+        'por_cobertura': totalizar(filas, ['cobertura'], medida='total'),
+        'top_zonas': top_zonas,
+    }
+
+
+def _inicio_del_dia(fecha):
+    return timezone.make_aware(datetime.combine(fecha, time.min))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planes', '0004_cobfactu'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='fecha_registro',
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+    ]
@@ -72,6 +72,9 @@ class Cliente(models.Model):
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='PEND_COBERTURA')
     observaciones = models.TextField(blank=True, null=True)
     plan = models.ForeignKey('Plan', on_delete=models.SET_NULL, null=True, blank=True)
+    # Vacío en los clientes registrados antes de agregar el campo (no hay otra fecha de la que
+    # derivarlo); las estadísticas por rango los excluyen y los informan aparte
+    fecha_registro = models.DateTimeField(auto_now_add=True, null=True)
 
     def __str__(self):
         return f"{self.nombre} {self.apellido} ({self.ci if self.ci else 'Empresa'})"
@@ -94,7 +97,8 @@ from django.db import models
 
 class Cobfactu(models.Model):
     cod_concesion = models.DecimalField(max_digits=20, decimal_places=0, null=True, blank=True)
-    factura_interna = models.DecimalField(max_digits=20, decimal_places=0, null=True, blank=True)
+    # La tabla foránea no tiene id: factura_interna identifica la factura (igual que soli.CobfactuConsulta)
+    factura_interna = models.DecimalField(max_digits=20, decimal_places=0, primary_key=True)
     cod_dosificacion = models.DecimalField(max_digits=20, decimal_places=0, null=True, blank=True)
     contrato = models.DecimalField(max_digits=20, decimal_places=0, null=True, blank=True)
     periodo_desde = models.DecimalField(max_digits=20, decimal_places=0, null=True, blank=True)
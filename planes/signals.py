@@ -0,0 +1,6 @@
+from prod_a import catalogos
+
+# Catálogos cacheados (prod_a/catalogos.py)
+catalogos.registrar('planes.formas_pago', 'planes.FormaPago')
+catalogos.registrar('planes.tipos_conexion', 'planes.TipoConexion')
+catalogos.registrar('planes.planes', 'planes.Plan', 'planes.FormaPago', 'planes.TipoConexion')
@@ -1,3 +1,150 @@
+import csv
+from datetime import timedelta
+
+from django.core.cache import cache, caches
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Cliente, Cobfactu
+
+
+class EstadisticasClientesTest(TestCase):
+    """Las estadísticas de clientes salen de dos consultas agrupadas y se sirven desde el cache"""
+
+    URL = '/api/planes/clientes/estadisticas/'
+
+    @classmethod
+    def setUpTestData(cls):
+        datos = [
+            ('ACTIVO', 'CON_COBERTURA', 'COMUN', 'Sopocachi'),
+            ('ACTIVO', 'CON_COBERTURA', 'EMPRESA', 'Sopocachi'),
+            ('ACTIVO', 'SIN_COBERTURA', 'COMUN', 'Miraflores'),
+            ('PEND_EQUIPO', 'CON_COBERTURA', 'COMUN', 'Obrajes'),
+            ('SUSPENDIDO', 'SIN_COBERTURA', 'COMUN', 'Sopocachi'),
+        ]
+        for i, (estado, cobertura, tipo, zona) in enumerate(datos):
+            Cliente.objects.create(
+                nombre=f'Cliente {i}', apellido='Mamani', ci=f'900{i}', telefono='70000000', vivienda='Casa',
+                calle='Calle 1', zona=zona, direccion_completa='Calle 1', numero_puerta=str(i),
+                tipo_cliente=tipo, cobertura=cobertura, estado=estado,
+            )
+        # Uno registrado hace un mes y uno anterior al campo fecha_registro, para el filtro por fecha
+        Cliente.objects.filter(ci='9004').update(fecha_registro=timezone.now() - timedelta(days=30))
+        Cliente.objects.create(
+            nombre='Heredado', apellido='Mamani', ci='9005', telefono='70000000', vivienda='Casa', calle='Calle 1',
+            zona='Miraflores', direccion_completa='Calle 1', numero_puerta='5', tipo_cliente='EMPRESA',
+            cobertura='SIN_COBERTURA', estado='ACTIVO',
+        )
+        Cliente.objects.filter(ci='9005').update(fecha_registro=None)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_resumen_y_cache(self):
+        self.client.get(self.URL)
+        # Worker sin el resultado en su cache local: generación (cache compartido) + dos consultas agrupadas
+        caches['local'].clear()
+        with self.assertNumQueries(3):
+            datos = self.client.get(self.URL).json()
+        self.assertEqual(datos['resumen'], {
+            'total_clientes': 6, 'total_activos': 4, 'total_pendientes': 1, 'total_suspendidos': 1,
+            'porcentaje_activos': 66.67, 'total_sin_fecha_registro': 1,
+        })
+        activos = next(fila for fila in datos['por_estado'] if fila['estado'] == 'ACTIVO')
+        self.assertEqual((activos['con_cobertura'], activos['sin_cobertura']), (2, 2))
+        self.assertEqual(datos['top_zonas'][0], {'zona': 'Sopocachi', 'total': 3})
+
+        with self.assertNumQueries(1):
+            self.client.get(self.URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Cliente.objects.filter(ci='9003').get().delete()
+        self.assertEqual(self.client.get(self.URL).json()['resumen']['total_pendientes'], 0)
+
+    def test_rango_fechas(self):
+        hoy = timezone.localdate()
+        # El cliente sin fecha de registro queda fuera de cualquier rango y se informa aparte
+        datos = self.client.get(self.URL, {'desde': hoy.isoformat()}).json()
+        self.assertEqual(datos['resumen']['total_suspendidos'], 0)
+        self.assertEqual(datos['resumen']['total_clientes'], 4)
+        self.assertEqual(datos['resumen']['total_activos'], 3)
+        self.assertEqual(datos['resumen']['total_sin_fecha_registro'], 1)
+        self.assertEqual({fila['zona']: fila['total'] for fila in datos['top_zonas']}['Miraflores'], 1)
+
+        datos = self.client.get(self.URL, {'hasta': (hoy - timedelta(days=1)).isoformat()}).json()
+        self.assertEqual(datos['resumen']['total_clientes'], 1)
+        self.assertEqual({fila['tipo_cliente']: fila['total'] for fila in datos['por_tipo']}, {'COMUN': 1})
+
+        # Un rango anterior al sistema no tiene clientes
+        datos = self.client.get(self.URL, {'desde': '2000-01-01', 'hasta': '2000-12-31'}).json()
+        self.assertEqual(datos['resumen']['total_clientes'], 0)
+        self.assertEqual(datos['por_estado'], [])
+        self.assertEqual(datos['top_zonas'], [])
+        self.assertEqual(datos['resumen']['total_sin_fecha_registro'], 1)
+
+        self.assertEqual(self.client.get(self.URL, {'desde': '01/02/2025'}).status_code, 400)
+        self.assertEqual(
+            self.client.get(self.URL, {'desde': hoy.isoformat(), 'hasta': '2000-01-01'}).status_code, 400
+        )
+
+
+class CobfactuTest(TestCase):
+    """Facturas: paginación por cursor sobre factura_interna, filtros y exportación CSV con el mismo conjunto"""
+
+    URL = '/api/planes/facturas/'
+
+    @classmethod
+    def setUpClass(cls):
+        # cobfactu es una tabla foránea (managed=False): se crea solo para las pruebas
+        with connection.schema_editor() as editor:
+            editor.create_model(Cobfactu)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            editor.delete_model(Cobfactu)
+
+    @classmethod
+    def setUpTestData(cls):
+        # Insertadas fuera de orden: el listado ordena por factura_interna
+        for factura, contrato, periodo, estado in [
+            (105, 80000001, 202501, 'NP'), (101, 80000001, 202412, 'P'), (130, 80000002, 202501, 'NP'),
+            (102, 80000001, 202502, 'G'), (120, 80000001, 202503, 'NP'), (110, 80000002, 202502, 'P'),
+            (103, 80000001, 202501, 'P'),
+        ]:
+            Cobfactu.objects.create(factura_interna=factura, contrato=contrato, periodo=periodo, estado=estado)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def paginas(self, **parametros):
+        ids, url, params = [], self.URL, parametros
+        while url:
+            pagina = self.client.get(url, params).json()
+            self.assertNotIn('count', pagina)
+            ids.append([int(f['factura_interna']) for f in pagina['results']])
+            url, params = pagina['next'], None
+        return ids
+
+    def exportar(self, **parametros):
+        response = self.client.get(f'{self.URL}exportar/', parametros)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        filas = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        return [int(fila['factura_interna']) for fila in filas]
+
+    def test_paginas_por_factura_interna(self):
+        self.assertEqual(self.paginas(limite=3), [[101, 102, 103], [105, 110, 120], [130]])
+
+    def test_filtros_y_exportacion(self):
+        filtros = {'contrato': 80000001, 'periodo__gte': 202501, 'estado__in': 'NP,G'}
+        self.assertEqual(self.paginas(limite=2, **filtros), [[102, 105], [120]])
+        self.assertEqual(self.exportar(**filtros), [102, 105, 120])
 
-# Create your tests here.
+        self.assertEqual(self.exportar(), [101, 102, 103, 105, 110, 120, 130])
+        self.assertEqual(self.exportar(periodo__lte=202412), [101])
@@ -1,90 +1,115 @@
+import csv
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import AllowAny
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count, Case, When, IntegerField, Q
+from contratos.estadisticas import respuesta as respuesta_estadistica
+from prod_a.catalogos import CatalogoCacheadoMixin
+from prod_a.paginacion import PaginacionCursor
 from .models import FormaPago, TipoConexion, Plan, Cliente,Cobfactu
 from .serializers import FormaPagoSerializer, TipoConexionSerializer, PlanSerializer, ClienteSerializer, CobfactuSerializer
 
-class FormaPagoViewSet(viewsets.ModelViewSet):
-    queryset = FormaPago.objects.all()
+TAMANO_BLOQUE_EXPORTACION = 2000
+
+class FormaPagoViewSet(CatalogoCacheadoMixin, viewsets.ModelViewSet):
+    queryset = FormaPago.objects.order_by('id')
     serializer_class = FormaPagoSerializer
+    catalogo = 'planes.formas_pago'
     permission_classes = [AllowAny]  # <---
 
-class TipoConexionViewSet(viewsets.ModelViewSet):
-    queryset = TipoConexion.objects.all()
+class TipoConexionViewSet(CatalogoCacheadoMixin, viewsets.ModelViewSet):
+    queryset = TipoConexion.objects.order_by('id')
     serializer_class = TipoConexionSerializer
+    catalogo = 'planes.tipos_conexion'
     permission_classes = [AllowAny]  # <---
 
-class PlanViewSet(viewsets.ModelViewSet):
-    queryset = Plan.objects.all()
+class PlanViewSet(CatalogoCacheadoMixin, viewsets.ModelViewSet):
+    queryset = Plan.objects.select_related('forma_pago', 'tipo_conexion').order_by('id')
     serializer_class = PlanSerializer
+    catalogo = 'planes.planes'
     permission_classes = [AllowAny]  # <---
 
 class ClienteViewSet(viewsets.ModelViewSet):
     queryset = Cliente.objects.all()
     serializer_class = ClienteSerializer
+    pagination_class = PaginacionCursor
     permission_classes = [AllowAny]  # <---
     
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
-        # Conteo por estado
-        por_estado = Cliente.objects.values('estado').annotate(
-            total=Count('id'),
-            con_cobertura=Count(Case(When(cobertura='CON_COBERTURA', then=1), output_field=IntegerField())),
-            sin_cobertura=Count(Case(When(cobertura='SIN_COBERTURA', then=1), output_field=IntegerField()))
-        )
-        
-        # Conteo por tipo de cliente
-        por_tipo = Cliente.objects.values('tipo_cliente').annotate(
-            total=Count('id')
-        )
-        
-        # Conteo por cobertura
-        por_cobertura = Cliente.objects.values('cobertura').annotate(
-            total=Count('id')
-        )
-        
-        # Top 5 zonas con más clientes
-        top_zonas = Cliente.objects.values('zona').annotate(
-            total=Count('id')
-        ).order_by('-total')[:5]
-        
-        # Resumen general
-        total_clientes = Cliente.objects.count()
-        total_activos = Cliente.objects.filter(estado='ACTIVO').count()
-        total_pendientes = Cliente.objects.filter(
-            Q(estado='PEND_COBERTURA') | 
-            Q(estado='PEND_EQUIPO') | 
-            Q(estado='PEND_INSTALACION')
-        ).count()
-        total_suspendidos = Cliente.objects.filter(estado='SUSPENDIDO').count()
-        
-        return Response({
-            'resumen': {
-                'total_clientes': total_clientes,
-                'total_activos': total_activos,
-                'total_pendientes': total_pendientes,
-                'total_suspendidos': total_suspendidos,
-                'porcentaje_activos': round((total_activos / total_clientes * 100), 2) if total_clientes > 0 else 0,
-            },
-            'por_estado': list(por_estado),
-            'por_tipo': list(por_tipo),
-            'por_cobertura': list(por_cobertura),
-            'top_zonas': list(top_zonas),
-        })
+        """
+        Estadísticas de clientes (cacheadas, ver planes/estadisticas.py).
+        Opcional ?desde=YYYY-MM-DD&hasta=YYYY-MM-DD sobre la fecha de registro
+        (los clientes sin fecha de registro quedan fuera del rango y se informan aparte).
+        """
+        try:
+            rango = {
+                campo: datetime.strptime(request.query_params[campo], '%Y-%m-%d').date()
+                for campo in ('desde', 'hasta') if request.query_params.get(campo)
+            }
+        except ValueError:
+            return Response(
+                {'error': 'Parámetros inválidos. Use fechas YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if 'desde' in rango and 'hasta' in rango and rango['hasta'] < rango['desde']:
+            return Response(
+                {'error': 'La fecha hasta no puede ser anterior a desde'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return respuesta_estadistica('planes_clientes', **rango)
+
+class CobfactuPagination(PaginacionCursor):
+    ordering = 'factura_interna'
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en lugar de escribirla"""
+
+    def write(self, valor):
+        return valor
+
 
 class CobfactuViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Cobfactu.objects.all()
+    """
+    Facturas (tabla foránea cobfactu). El listado pagina por cursor sobre
+    factura_interna (WHERE factura_interna > último ORDER BY ... LIMIT), sin
+    COUNT ni OFFSET, y los filtros ?contrato=, ?periodo= y ?estado= son
+    comparaciones simples que postgres_fdw envía al servidor remoto.
+    `exportar` entrega el mismo conjunto filtrado como CSV por streaming.
+    """
+    queryset = Cobfactu.objects.order_by('factura_interna')
     serializer_class = CobfactuSerializer
-    
-    def list(self, request, *args, **kwargs):
+    pagination_class = CobfactuPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = {
+        'contrato': ['exact'],
+        'periodo': ['exact', 'gte', 'lte'],
+        'estado': ['exact', 'in'],
+    }
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
         """
-        Endpoint para obtener todas las facturas
+        CSV de las facturas filtradas. Las filas se leen con un cursor del lado
+        del servidor (iterator) y se escriben a medida que llegan, con memoria acotada.
         """
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            'count': queryset.count(),
-            'data': serializer.data
-        })
\ No newline at end of file
+        campos = [campo.name for campo in Cobfactu._meta.concrete_fields]
+        filas = self.filter_queryset(self.get_queryset()).values_list(*campos).iterator(
+            chunk_size=TAMANO_BLOQUE_EXPORTACION
+        )
+        escritor = csv.writer(_Eco())
+
+        def contenido():
+            yield escritor.writerow(campos)
+            for fila in filas:
+                yield escritor.writerow(fila)
+
+        respuesta = StreamingHttpResponse(contenido(), content_type='text/csv; charset=utf-8')
+        respuesta['Content-Disposition'] = 'attachment; filename="facturas.csv"'
+        return respuesta
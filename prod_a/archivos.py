@@ -0,0 +1,108 @@
+# ======================================================
+# prod_a/archivos.py
+# ======================================================
+"""
+Lectura de archivos CSV/XLSX subidos para las importaciones masivas
+(equipos ONU de un lote en almacenes, contratos heredados en contratos).
+
+leer_filas() entrega las filas de a una, sin cargar el archivo completo en
+memoria; cada importador valida sus columnas y procesa por bloques.
+"""
+import codecs
+import csv
+import io
+
+TAMANO_MUESTRA_CODIFICACION = 64 * 1024
+
+
+class ArchivoInvalido(Exception):
+    """El archivo no se puede leer o no tiene las columnas requeridas"""
+
+
+def leer_filas(archivo, obligatorias):
+    """
+    Generador de filas (dict columna -> valor) de un archivo CSV o XLSX subido.
+    Lee de forma incremental, sin cargar el archivo completo en memoria.
+    `obligatorias` son las columnas que deben estar en los encabezados.
+    Los CSV pueden venir en UTF-8 (con o sin BOM) o en Windows-1252.
+    """
+    nombre = (getattr(archivo, 'name', '') or '').lower()
+
+    if nombre.endswith('.xlsx'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ArchivoInvalido("Soporte XLSX no disponible (instale openpyxl) o suba un CSV")
+
+        try:
+            libro = load_workbook(archivo, read_only=True, data_only=True)
+        except Exception as e:
+            raise ArchivoInvalido(f"No se pudo leer el archivo XLSX: {e}")
+
+        try:
+            filas = libro.active.iter_rows(values_only=True)
+            encabezados = _normalizar_encabezados(next(filas, None), obligatorias)
+            for valores in filas:
+                if valores is None or all(v is None or str(v).strip() == '' for v in valores):
+                    continue
+                yield {
+                    col: ('' if v is None else str(v).strip())
+                    for col, v in zip(encabezados, valores)
+                }
+        finally:
+            libro.close()
+
+    elif nombre.endswith('.csv') or nombre.endswith('.txt'):
+        binario = getattr(archivo, 'file', archivo)
+        codificacion = _detectar_codificacion(binario)
+        texto = io.TextIOWrapper(binario, encoding=codificacion, newline='')
+        try:
+            muestra = texto.read(4096)
+            texto.seek(0)
+            try:
+                dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+            except csv.Error:
+                dialecto = csv.excel
+
+            lector = csv.reader(texto, dialecto)
+            encabezados = _normalizar_encabezados(next(lector, None), obligatorias)
+            for valores in lector:
+                if not any(v.strip() for v in valores):
+                    continue
+                yield {col: v.strip() for col, v in zip(encabezados, valores)}
+        except UnicodeDecodeError:
+            # Bytes no UTF-8 después de la muestra inicial
+            raise ArchivoInvalido(
+                "El archivo mezcla codificaciones; guárdelo como CSV UTF-8 y vuelva a subirlo"
+            )
+        finally:
+            texto.detach()
+
+    else:
+        raise ArchivoInvalido("Formato no soportado. Use .csv o .xlsx")
+
+
+def _detectar_codificacion(binario):
+    """
+    'utf-8-sig' si el inicio del archivo es UTF-8 válido; si no, 'cp1252'
+    (CSV exportado por Excel en Windows).
+    """
+    muestra = binario.read(TAMANO_MUESTRA_CODIFICACION)
+    binario.seek(0)
+    try:
+        # final=False: un carácter multibyte cortado al final de la muestra no es error
+        codecs.getincrementaldecoder('utf-8')().decode(muestra, final=False)
+    except UnicodeDecodeError:
+        return 'cp1252'
+    return 'utf-8-sig'
+
+
+def _normalizar_encabezados(encabezados, obligatorias):
+    if not encabezados:
+        raise ArchivoInvalido("El archivo está vacío o no tiene encabezados")
+
+    columnas = [str(c or '').strip().lower().replace(' ', '_') for c in encabezados]
+    faltantes = [c for c in obligatorias if c not in columnas]
+    if faltantes:
+        raise ArchivoInvalido(f"Columnas obligatorias faltantes: {', '.join(faltantes)}")
+    return columnas
@@ -0,0 +1,60 @@
+# ======================================================
+# prod_a/bootstrap.py
+# ======================================================
+"""
+Datos de arranque del front-end en una sola respuesta: usuario (rol y permisos)
+y los catálogos que antes se pedían uno por uno.
+
+Los catálogos salen del cache versionado (prod_a/catalogos.py). La respuesta
+lleva `version`, un hash de los datos del usuario y de las versiones de cada
+catálogo: si el cliente la envía (If-None-Match o ?version=) y nada cambió,
+se responde 304 sin armar el payload.
+"""
+import hashlib
+import json
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from almacenes.views import EstadoEquipoViewSet, MarcaViewSet, TipoEquipoViewSet
+from contratos.views import FormaPagoViewSet, PlanComercialViewSet, TipoServicioViewSet, TipoTramiteViewSet
+from usuarios.models import Usuario
+from .catalogos import contenido, versiones
+
+CATALOGOS = {
+    'tipos_servicio': TipoServicioViewSet,
+    'tipos_tramite': TipoTramiteViewSet,
+    'formas_pago': FormaPagoViewSet,
+    'planes_comerciales': PlanComercialViewSet,
+    'marcas': MarcaViewSet,
+    'tipos_equipo': TipoEquipoViewSet,
+    'estados_equipo': EstadoEquipoViewSet,
+}
+
+
+class BootstrapView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        # Rol y permisos precargados, como en el login
+        usuario = Usuario.objects.para_login(request.user.codigocotel).datos_sesion()
+        vigentes = versiones(*(vista.catalogo for vista in CATALOGOS.values()))
+        por_clave = {clave: vigentes[vista.catalogo] for clave, vista in CATALOGOS.items()}
+        huella = hashlib.sha1(
+            json.dumps([usuario, por_clave], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        encabezados = {'ETag': f'"{huella}"', 'Cache-Control': 'private, no-cache'}
+
+        recibidos = {e.removeprefix('W/') for e in parse_etags(request.headers.get('If-None-Match', ''))}
+        if f'"{huella}"' in recibidos or request.query_params.get('version') == huella:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=encabezados)
+
+        # Los datos se leen después de las versiones: si algo cambia mientras tanto, la
+        # huella queda vieja y la próxima petición recibe el payload nuevo
+        catalogos = {
+            clave: contenido(vista, request, por_clave[clave])[1] for clave, vista in CATALOGOS.items()
+        }
+        return Response({'version': huella, 'usuario': usuario, 'catalogos': catalogos}, headers=encabezados)
@@ -0,0 +1,146 @@
+# ======================================================
+# prod_a/catalogos.py
+# ======================================================
+"""
+Cache versionado de los catálogos de la API (tipos, estados, formas de pago...).
+
+Cada catálogo registrado tiene una versión en el cache compartido ('default')
+que cambia al confirmar cualquier escritura en los modelos de los que depende
+(post_save / post_delete, o modelo_modificado() desde los caminos masivos sin
+señales). Las respuestas de list/retrieve se guardan en el cache local del
+proceso ('local') con la versión en la clave: como la versión es la misma en
+todos los workers, ninguno sirve una respuesta vieja, solo la deja de usar.
+
+CatalogoCacheadoMixin responde con ETag (versión + URL) y, si el cliente envía
+If-None-Match con el mismo valor, devuelve 304 sin consultar la BD.
+
+Los catálogos se registran al iniciar cada app (signals.py) para que también
+los comandos de gestión, que no cargan las vistas, actualicen las versiones.
+"""
+import hashlib
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+PREFIJO_CACHE = 'catalogos'
+TTL_DEFAULT = 3600
+
+# 'app_label.Modelo' -> catálogos que dependen del modelo
+_CATALOGOS_POR_MODELO = defaultdict(set)
+
+
+def _clave_version(nombre):
+    return f'{PREFIJO_CACHE}:version:{nombre}'
+
+
+def _al_escribir(sender, **kwargs):
+    modelo_modificado(sender)
+
+
+def registrar(nombre, *modelos):
+    """Registra el catálogo `nombre`, cuya versión cambia al escribir en `modelos` ('app_label.Modelo')"""
+    for modelo in modelos:
+        _CATALOGOS_POR_MODELO[modelo].add(nombre)
+        for senal in (post_save, post_delete):
+            senal.connect(
+                _al_escribir, sender=modelo, weak=False,
+                dispatch_uid=f'{PREFIJO_CACHE}:{modelo}:{senal is post_save}'
+            )
+
+
+def invalidar(*nombres):
+    """Asigna una versión nueva a los catálogos cuando la transacción actual se confirma"""
+    if nombres:
+        transaction.on_commit(
+            lambda: cache.set_many({_clave_version(nombre): uuid.uuid4().hex for nombre in nombres}, None)
+        )
+
+
+def modelo_modificado(*modelos):
+    """Invalida los catálogos que dependen de `modelos` (clases de modelo); para bulk_create / update"""
+    nombres = set()
+    for modelo in modelos:
+        nombres |= _CATALOGOS_POR_MODELO.get(modelo._meta.label, set())
+    invalidar(*nombres)
+
+
+def versiones(*nombres):
+    """Versiones vigentes de los catálogos en una sola lectura del cache compartido"""
+    claves = {_clave_version(nombre): nombre for nombre in nombres}
+    actuales = cache.get_many(list(claves))
+    faltantes = [clave for clave in claves if clave not in actuales]
+    if faltantes:
+        # Aleatoria, para no repetir ETags tras vaciar el cache; add() respeta la de otro worker
+        for clave in faltantes:
+            cache.add(clave, uuid.uuid4().hex, None)
+        actuales.update(cache.get_many(faltantes))
+    return {nombre: actuales[clave] for clave, nombre in claves.items()}
+
+
+def version(nombre):
+    """Versión vigente del catálogo"""
+    return versiones(nombre)[nombre]
+
+
+def contenido(vista, request, vigente=None):
+    """
+    (versión, lista completa sin paginar) del catálogo de un ViewSet con
+    CatalogoCacheadoMixin, con el orden por defecto de la vista. Cacheado por versión;
+    `vigente` evita volver a leerla si ya se obtuvo (los datos nunca son anteriores a ella).
+
+    No aplica los filtros de la vista (search, ordering, filterset): el resultado
+    se comparte entre todos los usuarios y no debe depender de los parámetros
+    de la request que lo calculó.
+    """
+    vigente = vigente or version(vista.catalogo)
+    clave = f'{PREFIJO_CACHE}:contenido:{vista.catalogo}:{vigente}'
+    datos = caches['local'].get(clave)
+    if datos is None:
+        instancia = vista(request=request, format_kwarg=None, action='list', args=(), kwargs={})
+        queryset = instancia.get_queryset()
+        orden = getattr(vista, 'ordering', None) or queryset.model._meta.ordering or ['pk']
+        queryset = queryset.order_by(*([orden] if isinstance(orden, str) else orden))
+        datos = list(instancia.get_serializer(queryset, many=True).data)
+        caches['local'].set(clave, datos, getattr(settings, 'CATALOGOS_CACHE_TTL', TTL_DEFAULT))
+    return vigente, datos
+
+
+class CatalogoCacheadoMixin:
+    """
+    list y retrieve cacheados para ViewSets de catálogos. El ViewSet indica
+    `catalogo`, el nombre registrado con registrar().
+    """
+    catalogo = None
+
+    def list(self, request, *args, **kwargs):
+        return self._respuesta_cacheada(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._respuesta_cacheada(request, super().retrieve, *args, **kwargs)
+
+    def _respuesta_cacheada(self, request, calcular, *args, **kwargs):
+        variante = f'{request.build_absolute_uri()}|{request.accepted_renderer.format}'
+        huella = hashlib.sha1(f'{self.catalogo}:{version(self.catalogo)}:{variante}'.encode()).hexdigest()
+        etag = f'"{huella}"'
+        encabezados = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+        recibidos = {e.removeprefix('W/') for e in parse_etags(request.headers.get('If-None-Match', ''))}
+        if etag in recibidos or '*' in recibidos:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=encabezados)
+
+        clave = f'{PREFIJO_CACHE}:respuesta:{huella}'
+        datos = caches['local'].get(clave)
+        if datos is None:
+            respuesta = calcular(request, *args, **kwargs)
+            if respuesta.status_code != status.HTTP_200_OK:
+                return respuesta
+            datos = respuesta.data
+            caches['local'].set(clave, datos, getattr(settings, 'CATALOGOS_CACHE_TTL', TTL_DEFAULT))
+        return Response(datos, headers=encabezados)
@@ -0,0 +1,100 @@
+# ======================================================
+# prod_a/paginacion.py
+# ======================================================
+"""
+Paginación de los listados de la API.
+
+- PaginacionNumerada (default en REST_FRAMEWORK): ?page=N, para catálogos chicos.
+- PaginacionEstimada: igual, pero si el listado recorre una tabla grande sin
+  filtros, `count` se toma de pg_class.reltuples (estadística del último
+  ANALYZE / autovacuum) en lugar de un COUNT(*) completo. La respuesta lo indica
+  con 'count_estimado'. Con filtros el conteo es exacto.
+- PaginacionCursor: para tablas grandes; ?cursor=... sobre un orden estable
+  (siempre desempatado por id), sin COUNT ni OFFSET.
+
+En todas el tamaño de página se cambia con ?limite= (máximo 500).
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+TAMANO_PAGINA = 50
+TAMANO_MAXIMO = 500
+UMBRAL_CONTEO_EXACTO = 10000
+
+
+def filas_estimadas(queryset, minimo=UMBRAL_CONTEO_EXACTO):
+    """
+    Filas de la tabla según pg_class.reltuples, solo si el queryset la recorre
+    completa (sin WHERE, DISTINCT, GROUP BY ni slicing) y la estimación es de al
+    menos `minimo` filas. En otro caso devuelve None (conviene contar exacto).
+    """
+    if not isinstance(queryset, QuerySet):
+        return None
+    conexion = connections[queryset.db]
+    query = queryset.query
+    if conexion.vendor != 'postgresql' or query.where or query.distinct or query.group_by \
+            or query.combinator or query.is_sliced:
+        return None
+
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [queryset.model._meta.db_table]
+        )
+        fila = cursor.fetchone()
+    # reltuples es -1 (o 0) si la tabla nunca se analizó
+    if not fila or fila[0] is None or fila[0] < max(minimo, 1):
+        return None
+    return fila[0]
+
+
+class PaginadorEstimado(Paginator):
+    minimo_estimacion = UMBRAL_CONTEO_EXACTO
+    estimado = False
+
+    @cached_property
+    def count(self):
+        estimado = filas_estimadas(self.object_list, self.minimo_estimacion)
+        if estimado is None:
+            return super().count
+        self.estimado = True
+        return estimado
+
+
+class PaginacionNumerada(PageNumberPagination):
+    page_size = TAMANO_PAGINA
+    page_size_query_param = 'limite'
+    max_page_size = TAMANO_MAXIMO
+
+
+class PaginacionEstimada(PaginacionNumerada):
+    # Tablas con menos filas estimadas que esto se cuentan exacto
+    umbral_conteo_exacto = UMBRAL_CONTEO_EXACTO
+
+    def django_paginator_class(self, object_list, per_page, **kwargs):
+        paginador = PaginadorEstimado(object_list, per_page, **kwargs)
+        paginador.minimo_estimacion = self.umbral_conteo_exacto
+        return paginador
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_estimado'] = self.page.paginator.estimado
+        return response
+
+
+class PaginacionCursor(CursorPagination):
+    page_size = TAMANO_PAGINA
+    page_size_query_param = 'limite'
+    max_page_size = TAMANO_MAXIMO
+    ordering = '-id'
+
+    def get_ordering(self, request, queryset, view):
+        """Orden de la vista (o ?ordering=) desempatado por la pk para que las páginas no se solapen"""
+        ordering = list(super().get_ordering(request, queryset, view))
+        pk = queryset.model._meta.pk.name
+        if not any(campo.lstrip('-') in (pk, 'pk') for campo in ordering):
+            ordering.append(f'-{pk}' if ordering[0].startswith('-') else pk)
+        return tuple(ordering)
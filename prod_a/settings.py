@@ -102,6 +102,22 @@ DATABASES = {
     }
 }
 
+# 'default' es compartido entre todos los workers: las versiones de los catálogos (ETag),
+# las generaciones de las estadísticas y los códigos de estado deben ser los mismos en
+# cada proceso. Tabla creada con: python manage.py createcachetable
+# 'local' guarda, por proceso, solo payloads cuya clave incluye esa versión o generación.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'prod_a_cache',
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'prod_a_local',
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -171,7 +187,11 @@ AUTHENTICATION_BACKENDS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+    ),
+    # Catálogos por número de página; las tablas grandes usan PaginacionCursor o
+    # PaginacionEstimada en su ViewSet (ver prod_a/paginacion.py)
+    'DEFAULT_PAGINATION_CLASS': 'prod_a.paginacion.PaginacionNumerada',
+    'PAGE_SIZE': 50,
 }
 
 SIMPLE_JWT = {
@@ -20,11 +20,14 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from .bootstrap import BootstrapView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    # Datos de arranque del front-end (usuario + catálogos) en una sola respuesta
+    path('api/bootstrap/', BootstrapView.as_view(), name='bootstrap'),
 
     # apps del proyecto
     path('api/usuarios/', include('usuarios.urls')),
@@ -0,0 +1,125 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import check_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from usuarios.models import Usuario
+from usuarios.views import LoginJWTView
+
+
+class Command(BaseCommand):
+    """
+    Benchmark de throughput del login JWT (LoginJWTView).
+
+    Ejecuta logins reales en proceso (sin servidor HTTP) con varios hilos
+    concurrentes para dimensionar workers ante picos de login en cambios de turno:
+        python manage.py benchmark_login --codigocotel 1234 --password secreto
+        python manage.py benchmark_login --codigocotel 1234 --password secreto -n 500 -c 8
+
+    Reporta logins/segundo, latencias p50/p95/p99, consultas SQL por login
+    y el costo aislado del hash de contraseña (normalmente el factor dominante).
+    Como el hash es igual en ambos caminos, compara además las consultas y el
+    tiempo sin hash del login contra el camino anterior (get + authenticate +
+    carga perezosa de rol y permisos), que es lo que cambia entre ambos.
+    """
+    help = 'Mide throughput y latencia del endpoint de login JWT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--codigocotel', type=int, required=True, help='Código COTEL de prueba')
+        parser.add_argument('--password', required=True, help='Contraseña del usuario de prueba')
+        parser.add_argument('-n', '--requests', type=int, default=100, help='Total de logins (default: 100)')
+        parser.add_argument('-c', '--concurrency', type=int, default=4, help='Hilos concurrentes (default: 4)')
+
+    def handle(self, *args, **options):
+        codigocotel = options['codigocotel']
+        password = options['password']
+        total = options['requests']
+        concurrencia = options['concurrency']
+
+        if total <= 0 or concurrencia <= 0:
+            raise CommandError('--requests y --concurrency deben ser mayores a 0')
+
+        try:
+            usuario = Usuario.objects.get(codigocotel=codigocotel)
+        except Usuario.DoesNotExist:
+            raise CommandError(f'No existe el usuario {codigocotel}')
+
+        vista = LoginJWTView.as_view()
+        factory = APIRequestFactory()
+        payload = {'codigocotel': codigocotel, 'password': password}
+
+        def login():
+            request = factory.post('/api/usuarios/login/', payload, format='json')
+            inicio = time.perf_counter()
+            response = vista(request)
+            return time.perf_counter() - inicio, response.status_code
+
+        # 1) Login de calentamiento: valida credenciales y cuenta consultas SQL
+        with CaptureQueriesContext(connection) as consultas:
+            _, status_code = login()
+        if status_code != 200:
+            raise CommandError(f'El login de prueba respondió {status_code}; verifique las credenciales')
+
+        # 2) Costo aislado del hash de contraseña
+        inicio = time.perf_counter()
+        check_password(password, usuario.password)
+        costo_hash = time.perf_counter() - inicio
+
+        # 3) Camino anterior: el usuario se cargaba dos veces y el rol y sus permisos en consultas aparte
+        def login_previo():
+            inicio = time.perf_counter()
+            Usuario.objects.get(codigocotel=codigocotel)
+            user = authenticate(payload_request, username=codigocotel, password=password)
+            if user.rol:
+                list(user.rol.permisos.values('recurso', 'accion'))
+            return time.perf_counter() - inicio
+
+        payload_request = factory.post('/api/usuarios/login/', payload, format='json')
+        with CaptureQueriesContext(connection) as consultas_previas:
+            login_previo()
+        muestras = min(total, 20)
+        sin_hash_actual = statistics.mean(login()[0] for _ in range(muestras)) - costo_hash
+        sin_hash_previo = statistics.mean(login_previo() for _ in range(muestras)) - costo_hash
+
+        # 4) Carga concurrente
+        def worker(cantidad):
+            try:
+                return [login() for _ in range(cantidad)]
+            finally:
+                connections.close_all()
+
+        reparto = [total // concurrencia + (1 if i < total % concurrencia else 0) for i in range(concurrencia)]
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+            resultados = [r for lote in executor.map(worker, reparto) for r in lote]
+        duracion = time.perf_counter() - inicio
+
+        latencias = sorted(r[0] for r in resultados)
+        errores = sum(1 for r in resultados if r[1] != 200)
+
+        def percentil(p):
+            return latencias[min(len(latencias) - 1, int(round(p / 100 * (len(latencias) - 1))))] * 1000
+
+        self.stdout.write(f"Logins: {total} | Concurrencia: {concurrencia} | Errores: {errores}")
+        self.stdout.write(f"Duración total: {duracion:.2f} s")
+        self.stdout.write(self.style.SUCCESS(f"Throughput: {total / duracion:.1f} logins/s"))
+        self.stdout.write(
+            f"Latencia ms -> media: {statistics.mean(latencias) * 1000:.1f} | "
+            f"p50: {percentil(50):.1f} | p95: {percentil(95):.1f} | p99: {percentil(99):.1f}"
+        )
+        self.stdout.write(
+            f"Consultas SQL por login: {len(consultas)} (camino anterior: {len(consultas_previas)})"
+        )
+        self.stdout.write(
+            f"Tiempo sin hash por login ms -> actual: {sin_hash_actual * 1000:.1f} | "
+            f"anterior: {sin_hash_previo * 1000:.1f}"
+        )
+        self.stdout.write(
+            f"Costo del hash de contraseña: {costo_hash * 1000:.1f} ms "
+            f"(techo teórico por núcleo: {1 / costo_hash:.1f} logins/s)"
+        )
@@ -0,0 +1,136 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from usuarios.models import Empleado_fdw, Usuario
+
+
+class Command(BaseCommand):
+    """
+    Reconcilia la tabla Usuario contra la tabla FDW de empleados.
+
+    Pensado para ejecutarse de forma programada (cron):
+        python manage.py reconciliar_empleados
+        python manage.py reconciliar_empleados --dry-run
+
+    Lee los pares (codigocotel, estadoempleado) del FDW en un solo recorrido
+    por bloques, compara en memoria contra los usuarios migrados y aplica
+    los cambios con bulk_update en lugar de una consulta por empleado.
+    """
+    help = 'Reconcilia usuarios migrados con el estado actual de empleados_activos_fdw'
+
+    CAMPOS_NOMBRE = ('nombres', 'apellidopaterno', 'apellidomaterno')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo reporta los cambios, no los aplica'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Filas leídas del FDW por bloque (default: 2000)'
+        )
+        parser.add_argument(
+            '--desactivar-ausentes',
+            action='store_true',
+            help='Desactiva usuarios migrados que ya no figuran en el FDW'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        chunk_size = options['chunk_size']
+
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size debe ser mayor a 0')
+
+        # 1) Usuarios migrados indexados por código COTEL (una sola consulta)
+        usuarios = {
+            u.codigocotel: u
+            for u in Usuario.objects.filter(
+                Q(codigocotel__lt=9000) | Q(persona__isnull=False)
+            ).only(
+                'id', 'codigocotel', 'estadoempleado', 'is_active', *self.CAMPOS_NOMBRE
+            )
+        }
+
+        # 2) Recorrido único del FDW por bloques
+        empleados = Empleado_fdw.objects.order_by().values_list(
+            'codigocotel', 'estadoempleado', *self.CAMPOS_NOMBRE
+        )
+
+        modificados = {}
+        campos_modificados = set()
+        desactivados = []
+        renombrados = []
+        vistos = set()
+
+        try:
+            for codigo, estado, *nombre in empleados.iterator(chunk_size=chunk_size):
+                codigo = int(codigo)
+                vistos.add(codigo)
+
+                usuario = usuarios.get(codigo)
+                if usuario is None:
+                    continue
+
+                if usuario.estadoempleado != estado:
+                    usuario.estadoempleado = estado
+                    campos_modificados.add('estadoempleado')
+                    modificados[codigo] = usuario
+
+                # Empleado dado de baja: desactivar el usuario (no se reactiva automáticamente)
+                if estado != 0 and usuario.is_active:
+                    usuario.is_active = False
+                    campos_modificados.add('is_active')
+                    modificados[codigo] = usuario
+                    desactivados.append(codigo)
+
+                cambio_nombre = False
+                for campo, valor in zip(self.CAMPOS_NOMBRE, nombre):
+                    if valor and getattr(usuario, campo) != valor:
+                        setattr(usuario, campo, valor)
+                        campos_modificados.add(campo)
+                        cambio_nombre = True
+                if cambio_nombre:
+                    modificados[codigo] = usuario
+                    renombrados.append(codigo)
+        except Exception as e:
+            raise CommandError(f'Error al leer la tabla FDW de empleados: {e}')
+
+        # 3) Usuarios migrados que ya no existen en el FDW
+        ausentes = sorted(set(usuarios) - vistos)
+        if options['desactivar_ausentes']:
+            for codigo in ausentes:
+                usuario = usuarios[codigo]
+                if usuario.is_active:
+                    usuario.is_active = False
+                    campos_modificados.add('is_active')
+                    modificados[codigo] = usuario
+                    desactivados.append(codigo)
+
+        # 4) Aplicar cambios en bloque
+        if modificados and not dry_run:
+            with transaction.atomic():
+                Usuario.objects.bulk_update(
+                    list(modificados.values()),
+                    sorted(campos_modificados),
+                    batch_size=chunk_size
+                )
+
+        self._reportar(usuarios, vistos, modificados, desactivados, renombrados, ausentes, dry_run)
+
+    def _reportar(self, usuarios, vistos, modificados, desactivados, renombrados, ausentes, dry_run):
+        prefijo = '[DRY-RUN] ' if dry_run else ''
+        self.stdout.write(f"{prefijo}Empleados leídos del FDW: {len(vistos)}")
+        self.stdout.write(f"{prefijo}Usuarios migrados: {len(usuarios)}")
+        self.stdout.write(f"{prefijo}Usuarios modificados: {len(modificados)}")
+        self.stdout.write(f"{prefijo}  Desactivados: {len(desactivados)} {sorted(desactivados)}")
+        self.stdout.write(f"{prefijo}  Nombres actualizados: {len(renombrados)} {sorted(renombrados)}")
+        self.stdout.write(f"{prefijo}Usuarios migrados ausentes en FDW: {len(ausentes)} {ausentes}")
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('Dry-run: no se aplicó ningún cambio'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Reconciliación completada'))
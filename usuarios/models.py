@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db.models import Max
+from django.db.models import Max, Prefetch
 
 
 class UsuarioManager(BaseUserManager):
@@ -50,6 +50,16 @@ class UsuarioManager(BaseUserManager):
             # Código disponible encontrado
             return codigo_candidato
 
+    def para_login(self, codigocotel):
+        """
+        Obtiene el usuario con su rol y permisos precargados para el login:
+        un JOIN usuario-rol más una consulta de permisos, sin cargas perezosas
+        posteriores al construir el token y user_data.
+        """
+        return self.select_related('rol').prefetch_related(
+            Prefetch('rol__permisos', queryset=Permission.objects.only('id', 'recurso', 'accion'))
+        ).get(codigocotel=codigocotel)
+
 
 class Permission(models.Model):
     recurso = models.CharField(max_length=50)  # ej: "contratos"
@@ -167,6 +177,25 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
         """Retorna el nombre completo del usuario"""
         return f"{self.nombres} {self.apellidopaterno} {self.apellidomaterno}".strip()
 
+    def permisos_login(self):
+        """Lista de permisos {recurso, accion} del rol (usa los permisos precargados si existen)"""
+        if not self.rol:
+            return []
+        return [
+            {"recurso": permiso.recurso, "accion": permiso.accion}
+            for permiso in self.rol.permisos.all()
+        ]
+
+    def datos_sesion(self):
+        """user_data del login y del bootstrap del front-end"""
+        return {
+            "nombres": self.nombres,
+            "codigocotel": self.codigocotel,
+            "password_changed": self.password_changed,
+            "rol": self.rol.nombre if self.rol else None,
+            "permisos": self.permisos_login()
+        }
+
     def requiere_cambio_password(self):
         """Verifica si requiere cambio de contraseña"""
         return not self.password_changed
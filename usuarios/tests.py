@@ -1,3 +1,119 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.signals import user_login_failed
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import Permission, Roles, Usuario
+
+
+def fdw_con(filas):
+    """Sustituto de Empleado_fdw cuyo recorrido devuelve `filas` (la tabla FDW no existe en pruebas)"""
+    empleados = mock.MagicMock()
+    empleados.objects.order_by.return_value.values_list.return_value.iterator.return_value = iter(filas)
+    return mock.patch('usuarios.management.commands.reconciliar_empleados.Empleado_fdw', empleados)
+
+
+class ReconciliarEmpleadosTest(TestCase):
+    """reconciliar_empleados aplica estado, bajas y nombres del FDW sobre los usuarios migrados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for codigo, nombres in ((100, 'ANA'), (200, 'LUIS'), (300, 'EVA'), (400, 'JUAN')):
+            Usuario.objects.create_user(
+                codigocotel=codigo, persona=codigo, nombres=nombres, apellidopaterno='QUISPE', apellidomaterno='MAMANI'
+            )
+        # Usuario manual: no participa
+        Usuario.objects.create_user(codigocotel=9000, nombres='MANUAL')
+
+    # (codigocotel, estadoempleado, nombres, apellidopaterno, apellidomaterno)
+    FILAS = [
+        (100, 0, 'ANA', 'QUISPE', 'MAMANI'),        # sin cambios
+        (200, 1, 'LUIS', 'QUISPE', 'MAMANI'),       # dado de baja
+        (300, 0, 'EVA MARIA', 'QUISPE', 'MAMANI'),  # nombre cambiado
+        (500, 0, 'NUEVO', 'CHOQUE', 'LIMA'),        # aún no migrado: no se crea
+    ]
+
+    def reconciliar(self, *args):
+        salida = StringIO()
+        with fdw_con(self.FILAS):
+            call_command('reconciliar_empleados', *args, stdout=salida)
+        return salida.getvalue()
+
+    def test_reconciliacion(self):
+        salida = self.reconciliar()
+        usuarios = {u.codigocotel: u for u in Usuario.objects.all()}
+
+        self.assertEqual((usuarios[200].estadoempleado, usuarios[200].is_active), (1, False))
+        self.assertEqual(usuarios[300].nombres, 'EVA MARIA')
+        self.assertTrue(usuarios[100].is_active)
+        # Ausente en el FDW: solo se reporta sin --desactivar-ausentes
+        self.assertTrue(usuarios[400].is_active)
+        self.assertFalse(Usuario.objects.filter(codigocotel=500).exists())
+        self.assertTrue(usuarios[9000].is_active)
+        self.assertIn('Usuarios modificados: 2', salida)
+        self.assertIn('Usuarios migrados ausentes en FDW: 1 [400]', salida)
+
+    def test_desactivar_ausentes(self):
+        self.reconciliar('--desactivar-ausentes')
+        self.assertFalse(Usuario.objects.get(codigocotel=400).is_active)
+
+    def test_dry_run(self):
+        salida = self.reconciliar('--dry-run', '--desactivar-ausentes')
+        self.assertIn('Desactivados: 2 [200, 400]', salida)
+        self.assertEqual(Usuario.objects.filter(is_active=False).count(), 0)
+        self.assertEqual(Usuario.objects.get(codigocotel=300).nombres, 'EVA')
+
+
+class LoginJWTTest(TestCase):
+    """El login verifica la contraseña una vez sobre el usuario precargado y arma user_data con su rol"""
+
+    URL = '/api/usuarios/login/'
+
+    @classmethod
+    def setUpTestData(cls):
+        rol = Roles.objects.create(nombre='TECNICO')
+        rol.permisos.set([
+            Permission.objects.create(recurso='contratos', accion='leer'),
+            Permission.objects.create(recurso='contratos', accion='crear'),
+        ])
+        cls.usuario = Usuario.objects.create_user(
+            codigocotel=1234, password='secreto', nombres='ANA', rol=rol, password_changed=True
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_login(self):
+        # Usuario + rol (JOIN) y permisos: sin segunda carga del usuario ni escritura de last_login
+        with self.assertNumQueries(2):
+            response = self.client.post(self.URL, {'codigocotel': 1234, 'password': 'secreto'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        datos = response.json()
+        self.assertIn('refresh', datos)
+        self.assertEqual(datos['user_data']['rol'], 'TECNICO')
+        self.assertCountEqual(
+            datos['user_data']['permisos'],
+            [{'recurso': 'contratos', 'accion': 'leer'}, {'recurso': 'contratos', 'accion': 'crear'}]
+        )
+        self.usuario.refresh_from_db()
+        self.assertIsNone(self.usuario.last_login)
+
+    def test_credenciales_invalidas(self):
+        fallidos = []
+        receptor = lambda sender, credentials, **kwargs: fallidos.append(credentials['username'])  # noqa: E731
+        user_login_failed.connect(receptor)
+        self.addCleanup(user_login_failed.disconnect, receptor)
+
+        response = self.client.post(self.URL, {'codigocotel': 1234, 'password': 'otra'}, format='json')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(fallidos, [1234])
+
+        Usuario.objects.filter(pk=self.usuario.pk).update(is_active=False)
+        response = self.client.post(self.URL, {'codigocotel': 1234, 'password': 'secreto'}, format='json')
+        self.assertEqual(response.status_code, 401)
 
-# Create your tests here.
+        response = self.client.post(self.URL, {'codigocotel': 4321, 'password': 'secreto'}, format='json')
+        self.assertEqual(response.status_code, 404)
@@ -1,5 +1,5 @@
 from decimal import Decimal
-from django.contrib.auth import authenticate
+from django.contrib.auth.signals import user_login_failed
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
@@ -118,17 +118,20 @@ class LoginJWTView(APIView):
             )
 
         try:
-            # Verificar si el usuario existe
-            usuario = Usuario.objects.get(codigocotel=codigocotel)
-        except Usuario.DoesNotExist:
+            # Usuario, rol y permisos en una sola carga (select_related + prefetch)
+            user = Usuario.objects.para_login(codigocotel)
+        except (Usuario.DoesNotExist, ValueError, TypeError):
             return Response(
                 {"error": "Usuario no migrado. Diríjase al módulo de migración."},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Autenticación
-        user = authenticate(request, username=codigocotel, password=password)
-        if not user:
+        # Autenticación: la contraseña se verifica una sola vez sobre el usuario ya cargado
+        # (mismas reglas que ModelBackend: contraseña válida y usuario activo)
+        if not user.check_password(password) or not user.is_active:
+            user_login_failed.send(
+                sender=__name__, credentials={'username': codigocotel}, request=request
+            )
             return Response(
                 {"error": "Credenciales inválidas."},
                 status=status.HTTP_401_UNAUTHORIZED
@@ -138,30 +141,20 @@ class LoginJWTView(APIView):
         refresh = RefreshToken.for_user(user)
         access_token = str(refresh.access_token)
 
+        user_data = user.datos_sesion()
+
         # Verificar si debe cambiar contraseña
         if not user.password_changed:
             return Response({
                 "redirect_to_password_change": True,
                 "access": access_token,
-                "user_data": {
-                    "nombres": user.nombres,
-                    "codigocotel": user.codigocotel,
-                    "password_changed": user.password_changed,
-                    "rol": user.rol.nombre if user.rol else None,
-                    "permisos": list(user.rol.permisos.values("recurso", "accion")) if user.rol else []
-                }
+                "user_data": user_data
             }, status=status.HTTP_200_OK)
 
         return Response({
             "refresh": str(refresh),
             "access": access_token,
-            "user_data": {
-                "nombres": user.nombres,
-                "codigocotel": user.codigocotel,
-                "password_changed": user.password_changed,
-                "rol": user.rol.nombre if user.rol else None,
-                "permisos": list(user.rol.permisos.values("recurso", "accion")) if user.rol else []
-            }
+            "user_data": user_data
         }, status=status.HTTP_200_OK)
 
 